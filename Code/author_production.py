@@ -0,0 +1,189 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from fields import read_scopus_csv
+from indices import top_k
+from ragged import field_ragged
+
+YEAR_COLUMN = 'Year'
+CITATION_COLUMN = 'Cited by'
+RANK_BY = {'articles': 'production', 'citations': 'citations', 'tc_per_year': 'tc_per_year'}
+
+
+class AuthorYearMatrix:
+    """Author x year production and citation matrices built from the author-paper incidence
+
+    ``production`` counts the papers of every author per year, ``citations``
+    sums their total citations (TC) and ``tc_per_year`` sums TC / (reference
+    year - PY + 1), the citation weighting of bibliometrix authorProdOverTime.
+    All three are sparse (CSC, so year windows are cheap column slices) and
+    every query below is a slice and a row reduction.
+    """
+
+    def __init__(self, df, field='AU', reference_year=None):
+        field_values = field_ragged(df, field)
+        year = pd.to_numeric(df[YEAR_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+        cites = pd.to_numeric(df[CITATION_COLUMN], errors='coerce').fillna(0).to_numpy(dtype=np.float64) \
+            if CITATION_COLUMN in df.columns else np.zeros(len(df))
+
+        paper = field_values.rows
+        known = ~np.isnan(year[paper])
+        paper = paper[known]
+        # Authors with a dated paper only, in order of first appearance
+        codes, kept = pd.factorize(field_values.ids[known])
+        authors = field_values.table[kept]
+        pair_year = year[paper].astype(np.int64)
+
+        self.field = field
+        self.authors = pd.Index(authors)
+        self.first_year = int(pair_year.min()) if len(pair_year) else 0
+        n_years = int(pair_year.max()) - self.first_year + 1 if len(pair_year) else 0
+        self.reference_year = int(reference_year if reference_year is not None else self.first_year + n_years - 1)
+        shape = (len(authors), n_years)
+        column = pair_year - self.first_year
+
+        def build(values, dtype):
+            return sparse.csc_matrix((values.astype(dtype), (codes, column)), shape=shape)
+
+        self.production = build(np.ones(len(codes)), np.int32)
+        self.citations = build(cites[paper], np.float64)
+        self.tc_per_year = build(cites[paper] / np.maximum(self.reference_year - pair_year + 1, 1), np.float64)
+        self._pairs = pd.DataFrame({'author': codes, 'paper': paper})
+
+    @property
+    def years(self):
+        return np.arange(self.first_year, self.first_year + self.production.shape[1])
+
+    def _columns(self, start=None, end=None):
+        lo = 0 if start is None else max(int(start) - self.first_year, 0)
+        hi = self.production.shape[1] if end is None else min(int(end) - self.first_year + 1, self.production.shape[1])
+        return slice(lo, max(hi, lo))
+
+    def careers(self):
+        """Articles, citations, career start/end, activity span and active years of every author"""
+        production = self.production.tocsr()
+        production.sort_indices()
+        indptr, indices = production.indptr, production.indices
+        has_papers = np.diff(indptr) > 0
+        first = np.where(has_papers, indices[np.minimum(indptr[:-1], len(indices) - 1)], 0) + self.first_year
+        last = np.where(has_papers, indices[np.maximum(indptr[1:] - 1, 0)], 0) + self.first_year
+        careers = pd.DataFrame({
+            'Author': self.authors,
+            'Articles': np.asarray(production.sum(axis=1)).ravel(),
+            'TC': np.asarray(self.citations.sum(axis=1)).ravel(),
+            'TC_per_year': np.asarray(self.tc_per_year.sum(axis=1)).ravel(),
+            'Career_start': first,
+            'Last_year': last,
+            'Span': last - first + 1,
+            'Active_years': np.diff(indptr),
+        })
+        return careers.sort_values(['Articles', 'TC'], ascending=False).reset_index(drop=True)
+
+    def top_authors(self, k=10, start=None, end=None, by='articles'):
+        """Top-k authors by articles, citations or TC per year within the years [start, end]"""
+        window = self._columns(start, end)
+        matrices = {name: getattr(self, attr)[:, window] for name, attr in RANK_BY.items()}
+        totals = {name: np.asarray(m.sum(axis=1)).ravel() for name, m in matrices.items()}
+        score = totals[by]
+        k = min(k, int((score > 0).sum()))
+        top = top_k(score, k, self.authors, -totals['articles'])
+        return pd.DataFrame({'Author': self.authors[top], 'Articles': totals['articles'][top],
+                             'TC': totals['citations'][top], 'TC_per_year': totals['tc_per_year'][top]})
+
+    def top_per_window(self, k=10, window=5, by='articles'):
+        """Top-k authors of every consecutive ``window``-year period
+
+        Years are mapped to windows with a sparse indicator matrix, so the
+        author x window totals are one sparse product per measure.
+        """
+        n_years = self.production.shape[1]
+        window_of_year = np.arange(n_years) // window
+        n_windows = int(window_of_year.max()) + 1 if n_years else 0
+        indicator = sparse.csr_matrix((np.ones(n_years), (np.arange(n_years), window_of_year)),
+                                      shape=(n_years, n_windows))
+        totals = {name: (getattr(self, attr) @ indicator).toarray() for name, attr in RANK_BY.items()}
+
+        frames = []
+        for w in range(n_windows):
+            score = totals[by][:, w]
+            n = min(k, int((score > 0).sum()))
+            if n == 0:
+                continue
+            top = top_k(score, n, self.authors, -totals['articles'][:, w])
+            start = self.first_year + w * window
+            frames.append(pd.DataFrame({
+                'Window': f'{start}-{min(start + window - 1, self.first_year + n_years - 1)}',
+                'Rank': np.arange(1, n + 1), 'Author': self.authors[top],
+                'Articles': totals['articles'][top, w].astype(np.int64),
+                'TC': totals['citations'][top, w], 'TC_per_year': totals['tc_per_year'][top, w]}))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=['Window', 'Rank', 'Author', 'Articles', 'TC', 'TC_per_year'])
+
+    def production_over_time(self, k=10):
+        """Long table (Author, year, freq, TC, TCpY) of the k most productive authors (bibliometrix dfAU)"""
+        top = self.authors.get_indexer(self.top_authors(k)['Author'])
+        production = self.production[top].tocoo()
+        citations = self.citations[top].tocsr()
+        tc_per_year = self.tc_per_year[top].tocsr()
+        table = pd.DataFrame({
+            'Author': self.authors[top][production.row],
+            'year': production.col + self.first_year,
+            'freq': production.data,
+            'TC': np.asarray(citations[production.row, production.col]).ravel(),
+            'TCpY': np.asarray(tc_per_year[production.row, production.col]).ravel(),
+        })
+        order = pd.Categorical(table['Author'], categories=self.authors[top], ordered=True)
+        return table.assign(Author=order).sort_values(['Author', 'year']).reset_index(drop=True)
+
+    def author_papers(self, authors):
+        """Row positions of the papers of the given authors (bibliometrix dfPapersAU)"""
+        codes = self.authors.get_indexer(authors)
+        return self._pairs[np.isin(self._pairs['author'].to_numpy(), codes[codes >= 0])].assign(
+            author=lambda d: self.authors[d['author']]).rename(columns={'author': 'Author'}).reset_index(drop=True)
+
+
+def plot_production_over_time(table, output_file='authors_production_over_time.png'):
+    """Authors' production over time: a line over each career, points sized by articles and shaded by TC per year"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    authors = list(table['Author'].cat.categories) if hasattr(table['Author'], 'cat') else \
+        list(dict.fromkeys(table['Author']))
+    position = {a: i for i, a in enumerate(reversed(authors))}
+    y = table['Author'].astype(str).map(position).to_numpy()
+
+    fig, ax = plt.subplots(figsize=(12, max(5, 0.6 * len(authors))))
+    span = table.groupby('Author', observed=True)['year'].agg(['min', 'max'])
+    ax.hlines([position[a] for a in span.index.astype(str)], span['min'], span['max'],
+              color='#E74C3C', alpha=0.5, linewidth=1.5)
+    scatter = ax.scatter(table['year'], y, s=40 + 60 * table['freq'], c=table['TCpY'], cmap='Blues',
+                         edgecolors='#2C3E50', linewidths=0.5, zorder=3)
+    fig.colorbar(scatter, ax=ax, label='TC per Year')
+    ax.set_yticks(range(len(authors)))
+    ax.set_yticklabels(list(reversed(authors)), fontsize=11)
+    ax.set_xlabel('Year', fontsize=14)
+    ax.set_title("Authors' Production over Time", fontsize=16)
+    ax.grid(axis='x', alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close()
+    print(f"Production over time plot saved to: {output_file}")
+    return output_file
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    output_folder = 'author_production'
+    os.makedirs(output_folder, exist_ok=True)
+
+    matrix = AuthorYearMatrix(read_scopus_csv(file))
+    careers = matrix.careers()
+    careers.to_csv(os.path.join(output_folder, 'author_careers.csv'), index=False)
+    table = matrix.production_over_time(k=10)
+    table.to_csv(os.path.join(output_folder, 'authors_production_over_time.csv'), index=False)
+    print(careers.head(10).to_string(index=False))
+    print(matrix.top_per_window(k=3, window=5).to_string(index=False))
+    plot_production_over_time(table, os.path.join(output_folder, 'authors_production_over_time.png'))
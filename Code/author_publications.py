@@ -1,7 +1,7 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from collections import defaultdict
 
 def calculate_h_index(citations):
     """Calculates h-index from a list of citations"""
@@ -16,27 +16,22 @@ def calculate_h_index(citations):
 
 def process_authors(df):
     """Processes the authors column and calculates metrics"""
-    author_citations = defaultdict(list)
-
-    for _, row in df.iterrows():
-        if pd.notna(row['Authors']):
-            authors = [a.strip() for a in row['Authors'].split(';')]
-            citations = row['Cited by']
-            for author in authors:
-                author_citations[author].append(citations)
-
-    # Calculate metrics for each author
-    results = []
-    for author, citations in author_citations.items():
-        h_index = calculate_h_index(citations)
-        results.append({
-            'Author': author,
-            'H-Index': h_index,
-            'Total Publications': len(citations),
-            'Total Citations': sum(citations)
-        })
-
-    return pd.DataFrame(results)
+    from indices import grouped_hg_index
+    from ragged import RaggedField
+
+    # Authors split once into integer IDs; every metric is a grouped reduction over them
+    authors = RaggedField.from_values(df['Authors'], sep=';')
+    citations = df['Cited by'].to_numpy()
+    author_citations = citations[authors.rows]
+    h_index, _ = grouped_hg_index(authors.ids, author_citations, authors.n_values)
+    total = np.bincount(authors.ids, weights=author_citations, minlength=authors.n_values)
+
+    return pd.DataFrame({
+        'Author': authors.table,
+        'H-Index': h_index,
+        'Total Publications': authors.counts(),
+        'Total Citations': total.astype(citations.dtype) if citations.dtype.kind in 'iu' else total
+    })
 
 def visualize_top_authors_by_pubs(top_authors):
     """Generates visualization of the top 10 authors by total publications"""
@@ -0,0 +1,238 @@
+import os
+import io
+import json
+import time
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from fields import csv_encoding, read_scopus_csv
+
+COUNTRY_TABLE_FILE = 'country_resolver.json'
+
+
+def read_manifest(path):
+    """Corpora to compare as a DataFrame (name, path)
+
+    The manifest is a CSV with ``path`` and optional ``name`` columns, a JSON
+    list of paths or of {"name", "path"} objects (or a {name: path} mapping),
+    or a text file with one path per line. Relative paths are taken from the
+    manifest's folder; names default to the file name without extension.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as fh:
+            entries = json.load(fh)
+        if isinstance(entries, dict):
+            entries = [{'name': k, 'path': v} for k, v in entries.items()]
+        manifest = pd.DataFrame([e if isinstance(e, dict) else {'path': e} for e in entries])
+    elif path.lower().endswith('.csv'):
+        manifest = pd.read_csv(path)
+    else:
+        with open(path, encoding='utf-8') as fh:
+            lines = [line.strip() for line in fh]
+        manifest = pd.DataFrame({'path': [line for line in lines if line and not line.startswith('#')]})
+
+    if 'path' not in manifest.columns:
+        raise ValueError("The manifest needs a 'path' column")
+    manifest['path'] = [p if os.path.isabs(p) else os.path.join(base, p) for p in manifest['path']]
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in manifest['path']]
+    manifest['name'] = manifest['name'].fillna(pd.Series(stems)) if 'name' in manifest.columns else stems
+    if manifest['name'].duplicated().any():
+        raise ValueError(f"Duplicate corpus names: {', '.join(manifest['name'][manifest['name'].duplicated()])}")
+    return manifest[['name', 'path']].reset_index(drop=True)
+
+
+# -- work done in the worker processes -------------------------------------
+
+_SHARED = {}
+
+
+def _init_worker(country_table, cache_dir):
+    _SHARED['country_table'] = country_table
+    _SHARED['cache'] = None
+    if cache_dir:
+        from result_cache import ResultCache
+        _SHARED['cache'] = ResultCache(cache_dir)
+
+
+def _call(func, path, *args, load=None, ignore=(), **kwargs):
+    cache = _SHARED.get('cache')
+    if cache is None:
+        return func(load(path) if load is not None else path, *args, **kwargs)
+    return cache.call(func, path, *args, load=load, ignore=ignore, **kwargs)
+
+
+def _yearly_production(path):
+    """Articles, citations and mean citations per article of every publication year"""
+    header, encoding = csv_encoding(path)
+    df = pd.read_csv(path, usecols=[c for c in ('Year', 'Cited by') if c in header], encoding=encoding)
+    year = pd.to_numeric(df['Year'], errors='coerce')
+    cites = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0) if 'Cited by' in df.columns else 0 * year
+    yearly = pd.DataFrame({'Year': year, 'Citations': cites}).dropna(subset=['Year'])
+    yearly = yearly.groupby(yearly['Year'].astype(int)).agg(Articles=('Citations', 'size'),
+                                                            Citations=('Citations', 'sum'))
+    yearly['Mean_TC'] = yearly['Citations'] / yearly['Articles']
+    return yearly.reset_index()
+
+
+def _read_with_citations(path):
+    df = read_scopus_csv(path)
+    df['Cited by'] = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0).astype(int)
+    return df
+
+
+def analyze_corpus(name, path, output_folder, top_n=10):
+    """Metric suite of one corpus: publication/citation metrics, yearly production and the
+    country, author and source rankings; the tables are written to ``output_folder``/``name``
+    and returned. Runs in a worker process of run_batch (or directly).
+    """
+    import bibliometri
+    from index_h import process_authors
+    from source_metrics import source_metrics
+
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Corpus file not found: {path}")
+    table_path = _SHARED.get('country_table')
+    if table_path:
+        bibliometri.load_country_table(table_path)
+    known = set(bibliometri.COUNTRY_TABLE)
+    started = time.perf_counter()
+    folder = os.path.join(output_folder, name)
+    os.makedirs(folder, exist_ok=True)
+
+    with redirect_stdout(io.StringIO()):  # the analyses print their results
+        metrics = _call(bibliometri.analyze_bibliometric_metrics, path, output_folder=folder,
+                        ignore=('output_folder',))
+        production_df, citation_df = _call(bibliometri.analyze_countries, path, output_folder=folder,
+                                           ignore=('output_folder',))
+    if production_df is None:
+        raise ValueError(f"Country analysis failed for {path}")
+    authors = _call(process_authors, path, load=_read_with_citations)
+    sources, _ = _call(source_metrics, path, load=read_scopus_csv)
+
+    countries = production_df.merge(citation_df, on='Country')
+    countries = countries.sort_values('Publications', ascending=False).reset_index(drop=True)
+    authors = authors.sort_values(['Total Publications', 'Total Citations'], ascending=False).reset_index(drop=True)
+    yearly = _yearly_production(path)
+
+    metrics.to_csv(os.path.join(folder, 'bibliometric_metrics.csv'), index=False)
+    countries.to_csv(os.path.join(folder, 'country_ranking.csv'), index=False)
+    authors.to_csv(os.path.join(folder, 'author_ranking.csv'), index=False)
+    sources.to_csv(os.path.join(folder, 'source_metrics.csv'), index=False)
+    yearly.to_csv(os.path.join(folder, 'annual_production.csv'), index=False)
+
+    summary = dict(zip(metrics['Metric'], metrics['Value']))
+    summary.update({
+        'Countries': len(countries),
+        'Sources': len(sources),
+        'Top country': countries['Country'].iloc[0] if len(countries) else None,
+        'Top author': authors['Author'].iloc[0] if len(authors) else None,
+        'Top source': sources['Source'].iloc[0] if len(sources) else None,
+        'First year': int(yearly['Year'].min()) if len(yearly) else None,
+        'Last year': int(yearly['Year'].max()) if len(yearly) else None,
+        'Seconds': round(time.perf_counter() - started, 2),
+    })
+    new_countries = {k: v for k, v in bibliometri.COUNTRY_TABLE.items() if k not in known}
+    return {'name': name, 'summary': summary, 'yearly': yearly, 'countries': countries.head(top_n),
+            'authors': authors.head(top_n), 'sources': sources.head(top_n), 'new_countries': new_countries}
+
+
+# -- batch driver and comparison outputs -------------------------------------
+
+def run_batch(manifest, output_folder='batch_analysis', workers=None, top_n=10, cache_dir=None, plot=True):
+    """Run analyze_corpus on every corpus of the manifest in a process pool
+
+    The workers share the country resolutions through a JSON table in
+    ``output_folder`` (merged after every corpus, read before the next one)
+    and, with ``cache_dir``, the result cache on disk. Writes
+    corpus_comparison.csv (one row per corpus), the top-n country, author and
+    source rankings of all corpora in long format, the annual production of
+    every corpus and the overlay plots; returns the comparison table.
+    A corpus that fails is reported and skipped.
+    """
+    import bibliometri
+
+    if not isinstance(manifest, pd.DataFrame):
+        manifest = read_manifest(manifest)
+    os.makedirs(output_folder, exist_ok=True)
+    table_path = os.path.join(output_folder, COUNTRY_TABLE_FILE)
+    bibliometri.load_country_table(table_path)
+    workers = workers or min(len(manifest), os.cpu_count() or 1)
+
+    results, failures = {}, {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(table_path, cache_dir)) as pool:
+        futures = {pool.submit(analyze_corpus, name, path, output_folder, top_n): name
+                   for name, path in zip(manifest['name'], manifest['path'])}
+        for done, future in enumerate(as_completed(futures), start=1):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures[name] = str(e)
+                print(f"[{done}/{len(futures)}] {name}: failed ({e})")
+                continue
+            results[name] = result
+            if result['new_countries']:
+                bibliometri.COUNTRY_TABLE.update(result['new_countries'])
+                bibliometri.save_country_table(table_path)
+            print(f"[{done}/{len(futures)}] {name}: {int(result['summary']['TP'])} records "
+                  f"in {result['summary']['Seconds']} s")
+
+    names = [n for n in manifest['name'] if n in results]
+    comparison = pd.DataFrame([results[n]['summary'] for n in names], index=pd.Index(names, name='Corpus'))
+    for name, error in failures.items():
+        comparison.loc[name, 'Error'] = error
+    comparison.to_csv(os.path.join(output_folder, 'corpus_comparison.csv'))
+
+    def combined(key):
+        frames = [results[n][key].assign(Corpus=n) for n in names]
+        table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['Corpus'])
+        return table[['Corpus'] + [c for c in table.columns if c != 'Corpus']]
+
+    yearly = combined('yearly')
+    yearly.to_csv(os.path.join(output_folder, 'annual_production_by_corpus.csv'), index=False)
+    for key in ('countries', 'authors', 'sources'):
+        combined(key).to_csv(os.path.join(output_folder, f'top_{key}_by_corpus.csv'), index=False)
+    if plot and len(yearly):
+        plot_overlay(yearly, 'Articles', os.path.join(output_folder, 'annual_production_overlay.png'))
+        plot_overlay(yearly, 'Articles', os.path.join(output_folder, 'annual_share_overlay.png'), normalize=True)
+        plot_overlay(yearly, 'Mean_TC', os.path.join(output_folder, 'mean_citations_overlay.png'))
+    return comparison
+
+
+def plot_overlay(yearly, value='Articles', output_file='annual_production_overlay.png', normalize=False):
+    """One line per corpus of a yearly measure; ``normalize`` plots each corpus' share of its own total"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    table = yearly.pivot_table(index='Year', columns='Corpus', values=value, aggfunc='sum').sort_index()
+    if normalize:
+        table = 100 * table / table.sum()
+    fig, ax = plt.subplots(figsize=(14, 7))
+    cmap = plt.get_cmap('tab20' if table.shape[1] > 10 else 'tab10')
+    for i, corpus in enumerate(table.columns):
+        ax.plot(table.index, table[corpus], marker='o', markersize=3, linewidth=1.5,
+                color=cmap(i % cmap.N), label=corpus)
+    labels = {'Articles': 'Number of Publications', 'Mean_TC': 'Mean Citations per Article',
+              'Citations': 'Citations'}
+    ax.set_xlabel('Year', fontsize=14)
+    ax.set_ylabel('Share of the corpus (%)' if normalize else labels.get(value, value), fontsize=14)
+    ax.set_title(('Annual Share of Publications' if normalize else labels.get(value, value)) + ' by Corpus',
+                 fontsize=16)
+    ax.grid(alpha=0.3)
+    ax.legend(loc='upper left', bbox_to_anchor=(1.01, 1), fontsize=9, ncol=1 if table.shape[1] <= 20 else 2)
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close()
+    print(f"Overlay plot saved to: {output_file}")
+    return output_file
+
+
+if __name__ == '__main__':
+    manifest_file = 'corpora.csv'
+    comparison = run_batch(manifest_file, output_folder='batch_analysis')
+    print(comparison.to_string())
@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import time
+import runpy
+import platform
+import resource
+import tempfile
+import multiprocessing as mp
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from profiling import CODE_DIR, load_script
+from synthetic_corpus import write_corpus
+
+
+def _read_with_citations(path):
+    # Same preparation as the __main__ blocks of index_h.py / author_publications.py
+    df = pd.read_csv(path, low_memory=False)
+    df['Cited by'] = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0).astype(int)
+    return df
+
+
+# Each benchmark does its imports and input preparation untimed and returns the call to time
+
+def bench_analyze_countries(path):
+    bibliometri = load_script('bibliometri.py')
+    return lambda: bibliometri.analyze_countries(path)
+
+
+def bench_bibliometric_metrics(path):
+    bibliometri = load_script('bibliometri.py')
+    return lambda: bibliometri.analyze_bibliometric_metrics(path)
+
+
+def bench_science_mapping(path):
+    bibliometri = load_script('bibliometri.py')
+    return lambda: bibliometri.science_mapping_analysis(path)
+
+
+def bench_cooccurrence(path):
+    cooc = load_script('co-ocurrence.py')
+    return lambda: cooc.create_cooccurrence_matrix(cooc.read_keywords_from_csv(path), top_n=10)
+
+
+def bench_index_h(path):
+    index_h = load_script('index_h.py')
+    df = _read_with_citations(path)
+    return lambda: index_h.process_authors(df)
+
+
+def bench_author_publications(path):
+    author_publications = load_script('author_publications.py')
+    df = _read_with_citations(path)
+    return lambda: author_publications.process_authors(df)
+
+
+def bench_citas_indice_h(path):
+    import matplotlib.pyplot  # noqa: F401  (keep the plotting import out of the timing)
+    # Module-level script with a hard-coded input name: link the corpus under that name
+    os.symlink(path, 'Scopus_VR_ED_only_2024.csv')
+    script = os.path.join(CODE_DIR, 'citas_indice_h_publicaciones.py')
+    return lambda: runpy.run_path(script, run_name='__main__')
+
+
+# name -> (callable, largest scale it is run at by default)
+BENCHMARKS = {
+    'analyze_countries': (bench_analyze_countries, 200000),
+    'analyze_bibliometric_metrics': (bench_bibliometric_metrics, 1000000),
+    'science_mapping_analysis': (bench_science_mapping, 1000),
+    'create_cooccurrence_matrix': (bench_cooccurrence, 1000000),
+    'index_h': (bench_index_h, 1000000),
+    'author_publications': (bench_author_publications, 1000000),
+    'citas_indice_h_publicaciones': (bench_citas_indice_h, 100000),
+}
+
+
+def _max_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _run_case(name, path, trace_memory, queue):
+    """Run one benchmark in a fresh process and report time and memory"""
+    import tracemalloc
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    sys.path.insert(0, CODE_DIR)
+    os.chdir(tempfile.mkdtemp(prefix=f'bench_{name}_'))
+    setup = BENCHMARKS[name][0]
+
+    result = {'status': 'ok'}
+    try:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            func = setup(path)
+            start_rss = _max_rss_mb()
+            if trace_memory:
+                tracemalloc.start()
+            t0 = time.perf_counter()
+            func()
+            result['seconds'] = time.perf_counter() - t0
+            if trace_memory:
+                result['peak_traced_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+        result['max_rss_mb'] = _max_rss_mb()
+        result['rss_growth_mb'] = result['max_rss_mb'] - start_rss
+    except Exception as e:
+        result = {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+    queue.put(result)
+
+
+def run_case(name, path, timeout=600, trace_memory=False):
+    """Run a benchmark case in an isolated process with a timeout"""
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(name, os.path.abspath(path), trace_memory, queue))
+    proc.start()
+    try:
+        result = queue.get(timeout=timeout)
+    except Exception:
+        proc.terminate()
+        result = {'status': 'timeout', 'seconds': None}
+    proc.join()
+    return result
+
+
+def corpus_path(data_dir, n_records, seed):
+    """Generate (once) and return the synthetic corpus for a given scale"""
+    path = os.path.join(data_dir, f'synthetic_scopus_{n_records}_seed{seed}.csv')
+    if not os.path.exists(path):
+        print(f"Generating synthetic corpus with {n_records} records...")
+        write_corpus(path + '.tmp', n_records, seed=seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def run_benchmarks(scales=(1000, 10000), analyses=None, seed=0, data_dir='benchmark_data',
+                   output='benchmark_results.json', timeout=600, trace_memory=False, force=False):
+    """Time and memory-profile each analysis across corpus scales and save results as JSON"""
+    analyses = analyses or list(BENCHMARKS)
+    unknown = [a for a in analyses if a not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {unknown}")
+
+    results = []
+    for n_records in scales:
+        path = corpus_path(data_dir, n_records, seed)
+        for name in analyses:
+            if n_records > BENCHMARKS[name][1] and not force:
+                print(f"- {name} @ {n_records}: skipped (above default limit {BENCHMARKS[name][1]})")
+                results.append({'analysis': name, 'n_records': n_records, 'status': 'skipped'})
+                continue
+            result = run_case(name, path, timeout=timeout, trace_memory=trace_memory)
+            result.update({'analysis': name, 'n_records': n_records})
+            results.append(result)
+            if result['status'] == 'ok':
+                print(f"- {name} @ {n_records}: {result['seconds']:.3f} s, "
+                      f"max RSS {result['max_rss_mb']:.1f} MB")
+            else:
+                print(f"- {name} @ {n_records}: {result['status']} {result.get('error', '')}")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'scales': list(scales),
+            'trace_memory': trace_memory,
+        },
+        'results': results,
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results saved to: {output}")
+    return report
+
+
+def compare_results(baseline_file, current_file, tolerance=0.2):
+    """List (analysis, scale) cases that got slower than the baseline by more than `tolerance`"""
+    with open(baseline_file) as f:
+        baseline = {(r['analysis'], r['n_records']): r for r in json.load(f)['results']}
+    with open(current_file) as f:
+        current = json.load(f)['results']
+
+    regressions = []
+    for r in current:
+        base = baseline.get((r['analysis'], r['n_records']))
+        if not base or base.get('status') != 'ok' or r.get('status') != 'ok':
+            continue
+        ratio = r['seconds'] / base['seconds'] if base['seconds'] else float('inf')
+        if ratio > 1 + tolerance:
+            regressions.append({'analysis': r['analysis'], 'n_records': r['n_records'],
+                                'baseline_seconds': base['seconds'], 'seconds': r['seconds'],
+                                'ratio': round(ratio, 2)})
+    return regressions
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the analysis scripts on synthetic Scopus corpora')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10000], help='Corpus sizes to run')
+    parser.add_argument('--analyses', nargs='+', choices=list(BENCHMARKS), help='Subset of benchmarks to run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default='benchmark_data', help='Where synthetic corpora are cached')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--timeout', type=float, default=600, help='Seconds per case before it is killed')
+    parser.add_argument('--trace-memory', action='store_true', help='Also record tracemalloc peaks (slower)')
+    parser.add_argument('--force', action='store_true', help='Ignore the per-analysis scale limits')
+    parser.add_argument('--compare', metavar='BASELINE', help='Report regressions against a previous results file')
+    args = parser.parse_args()
+
+    run_benchmarks(args.scales, args.analyses, seed=args.seed, data_dir=args.data_dir, output=args.output,
+                   timeout=args.timeout, trace_memory=args.trace_memory, force=args.force)
+
+    if args.compare:
+        regressions = compare_results(args.compare, args.output)
+        print(f"\nRegressions against {args.compare}: {len(regressions)}")
+        for r in regressions:
+            print(f"- {r['analysis']} @ {r['n_records']}: {r['baseline_seconds']:.3f} s -> "
+                  f"{r['seconds']:.3f} s (x{r['ratio']})")
@@ -1,21 +1,34 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import defaultdict
-import matplotlib as mpl
 import os
 import re
-from collections import Counter
-import pycountry
-from matplotlib.colors import ListedColormap
-
-
 import math
+import functools
+from collections import defaultdict, Counter
+from itertools import combinations
+
 import numpy as np
-from matplotlib.colors import ListedColormap
-from matplotlib.cm import hsv
+import pandas as pd
+
+
+# matplotlib, seaborn, networkx and pycountry are imported inside the functions
+# that need them so that importing this module (e.g. for the metrics) stays cheap.
+
+
+@functools.lru_cache(maxsize=None)
+def _plotting():
+    """Import and configure matplotlib/seaborn once, on first use"""
+    import matplotlib as mpl
+    mpl.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    # Style configuration
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.figsize'] = (14, 7)
+    plt.rcParams['font.size'] = 12
+    return mpl, plt, sns
+
 
 def generate_colormap(N):
+    mpl, _, _ = _plotting()
     arr = np.arange(N)/N
     N_up = int(math.ceil(N/7)*7)
     arr.resize(N_up)
@@ -29,13 +42,9 @@ def generate_colormap(N):
     ret[n//2:,3] *= np.arange(1,0.1,-0.9/b)
 #     print(ret)
     return ret
-mpl.use('Agg')
-# Style configuration
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (14, 7)
-plt.rcParams['font.size'] = 12
 
 def plot_yearly_publications(scopus_file):
+    _, plt, sns = _plotting()
     try:
         # Read file with automatic encoding detection
         encodings = ['utf-8', 'ISO-8859-1', 'latin1']
@@ -118,33 +127,77 @@ def plot_yearly_publications(scopus_file):
         print(f"Error: {str(e)}")
         return None
 
+# Resolved candidates, also filled from / written to disk by load_country_table /
+# save_country_table so that several processes (batch mode) share the lookups. It is a
+# memo of a deterministic lookup, so it is not part of the result cache keys
+COUNTRY_TABLE = {}
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_country(country_candidate):
+    """Canonical pycountry name for a country candidate (cached: many authors share a country)"""
+    if country_candidate in COUNTRY_TABLE:
+        return COUNTRY_TABLE[country_candidate]
+    import pycountry
+
+    try:
+        # Try to match with pycountry database
+        resolved = pycountry.countries.search_fuzzy(country_candidate)[0].name
+    except:
+        # If not found, return cleaned candidate
+        resolved = country_candidate
+    COUNTRY_TABLE[country_candidate] = resolved
+    return resolved
+
+
+def load_country_table(path):
+    """Add the resolutions stored in a JSON file to COUNTRY_TABLE; returns how many were new"""
+    import json
+
+    try:
+        with open(path, encoding='utf-8') as fh:
+            table = json.load(fh)
+    except (OSError, ValueError):
+        return 0
+    new = {k: v for k, v in table.items() if k not in COUNTRY_TABLE}
+    COUNTRY_TABLE.update(new)
+    return len(new)
+
+
+def save_country_table(path):
+    """Write COUNTRY_TABLE merged with the file's current content, atomically"""
+    import json
+
+    load_country_table(path)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(COUNTRY_TABLE, fh, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp, path)
+    return path
+
+
+# Common patterns for country extraction
+COUNTRY_PATTERNS = [
+    r',\s*([A-Za-z\s]+?)\s*(?:,\s*\d{5}|$)',
+    r',\s*([A-Za-z\s]+?)\s*$',
+    r'\[([A-Za-z\s]+)\]'
+]
+
+
 def get_country(affiliation_text):
     """Extract country from affiliation string"""
     if not isinstance(affiliation_text, str):
         return 'Unknown'
     
-    # Common patterns for country extraction
-    patterns = [
-        r',\s*([A-Za-z\s]+?)\s*(?:,\s*\d{5}|$)',
-        r',\s*([A-Za-z\s]+?)\s*$',
-        r'\[([A-Za-z\s]+)\]'
-    ]
-    
-    for pattern in patterns:
+    for pattern in COUNTRY_PATTERNS:
         match = re.search(pattern, affiliation_text)
         if match:
-            country_candidate = match.group(1).strip()
-            try:
-                # Try to match with pycountry database
-                country = pycountry.countries.search_fuzzy(country_candidate)[0].name
-                return country
-            except:
-                # If not found, return cleaned candidate
-                return country_candidate
+            return resolve_country(match.group(1).strip())
     
     return 'Unknown'
 
 def analyze_scopus_authors(scopus_file, output_folder='scopus_analysis', top_n=10):
+    _, plt, sns = _plotting()
     try:
         # Setup output directory
         os.makedirs(output_folder, exist_ok=True)
@@ -178,18 +231,13 @@ def analyze_scopus_authors(scopus_file, output_folder='scopus_analysis', top_n=1
                         name = re.sub(r'\([^)]*\)', '', author.split(',')[0]).strip()
                         name = re.sub(r'^\d+\s*', '', name).strip()
                         
-                        # Extract affiliation info
-                        affil_parts = author.split(',')[1:]
-                        institution = affil_parts[0].strip() if affil_parts else 'Unknown'
-                        institution = re.sub(r'\[.*?\]', '', institution).split('(')[0].strip()
-                        
                         # Extract country
                         country = get_country(author)
                         
-                        if name and institution:
+                        if name:
                             author_data.append({
                                 'author': name,
-                                'institution': institution,
+                                'affiliation': author,
                                 'country': country
                             })
                     except Exception as e:
@@ -201,6 +249,10 @@ def analyze_scopus_authors(scopus_file, output_folder='scopus_analysis', top_n=1
         if authors_df.empty:
             raise ValueError("No valid author data found")
         
+        # Canonical institution of every affiliation, resolved in one batch
+        from fields import canonical_institutions
+        authors_df['institution'] = canonical_institutions(authors_df.pop('affiliation')).to_numpy()
+        
         # Count publications per author
         author_counts = authors_df['author'].value_counts().head(top_n)
         
@@ -316,31 +368,21 @@ def analyze_countries(scopus_file, output_folder='country_analysis'):
         if not all(col in df.columns for col in required_cols):
             raise ValueError(f"Required columns missing: {required_cols}")
 
-        # Process country data
-        production_data = defaultdict(int)
-        citation_data = defaultdict(float)
-        
-        for _, row in df.iterrows():
-            affil_text = str(row['Authors with affiliations'])
-            citations = float(row['Cited by']) if pd.notna(row['Cited by']) else 0
-            
-            # Extract unique countries for this paper
-            countries = set()
-            authors = re.split(r';\s*(?=[A-ZÀ-ÿ])', affil_text)
-            for author in authors:
-                if ',' in author:
-                    country = get_country(author)
-                    if country != 'Unknown':
-                        countries.add(country)
-            
-            # Distribute production and citations
-            for country in countries:
-                production_data[country] += 1
-                citation_data[country] += citations / len(countries) if countries else 0
-        
-        # Convert to DataFrames
-        production_df = pd.DataFrame(production_data.items(), columns=['Country', 'Publications'])
-        citation_df = pd.DataFrame(citation_data.items(), columns=['Country', 'Citations'])
+        # Unique countries per paper, extracted for the whole corpus at once
+        from country_collaboration import paper_countries
+        from ragged import RaggedField
+        countries = RaggedField.from_pairs(paper_countries(df), len(df))
+        citations = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        paper = countries.rows
+
+        # Distribute production and citations
+        shares = citations[paper] / countries.lengths[paper]
+        by_country = pd.DataFrame({'Country': countries.table,
+                                   'Publications': countries.counts(),
+                                   'Citations': np.bincount(countries.ids, weights=shares,
+                                                            minlength=countries.n_values)})
+        production_df = by_country[['Country', 'Publications']]
+        citation_df = by_country[['Country', 'Citations']]
         
         # Sort and clean
         production_df = production_df.sort_values('Publications', ascending=False)
@@ -354,6 +396,7 @@ def analyze_countries(scopus_file, output_folder='country_analysis'):
 
 def plot_country_data(country_df, metric, output_folder, top_n=15):
     """Generate country bar chart"""
+    _, plt, sns = _plotting()
     try:
         # Prepare data
         top_countries = country_df.head(top_n).sort_values(metric, ascending=True)
@@ -402,7 +445,7 @@ def plot_country_data(country_df, metric, output_folder, top_n=15):
         print(f"Error generating chart: {str(e)}")
         return None
 
-def analyze_bibliometric_metrics(scopus_file, output_folder='bibliometric_analysis'):
+def analyze_bibliometric_metrics(scopus_file, output_folder='bibliometric_analysis', n_boot=0, ci=0.95, seed=0):
     """
     Analiza métricas de publicación y de citación a partir de un archivo Scopus.
     
@@ -424,6 +467,9 @@ def analyze_bibliometric_metrics(scopus_file, output_folder='bibliometric_analys
     
     Science mapping:
       - Se indican como placeholders, ya que requieren análisis y datos adicionales.
+
+    Con n_boot > 0 se añaden intervalos de confianza bootstrap (percentil, nivel
+    ``ci``) de todas las métricas: columnas Lower, Upper y SE.
     """
     os.makedirs(output_folder, exist_ok=True)
     
@@ -445,54 +491,31 @@ def analyze_bibliometric_metrics(scopus_file, output_folder='bibliometric_analys
     # Aseguramos que 'Cited by' sea numérica
     df['Cited by'] = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0)
     
-    # Métricas de publicación
+    # Métricas de publicación y de citación, calculadas de forma vectorizada
+    # (misma separación de autores por ', ')
+    from metric_bootstrap import paper_arrays, corpus_metrics
+    cites, n_authors, incidence = paper_arrays(df)
+    point = {k: v[0] for k, v in corpus_metrics(cites, n_authors, incidence, np.arange(len(df))).items()}
     TP = len(df)
-    unique_authors = set()
-    sole_authored = 0
-    multi_authored = 0
-    total_authors_in_multi = 0
-    
-    for _, row in df.iterrows():
-        # Se asume que los autores vienen separados por coma y espacio
-        authors = str(row['Authors']).split(', ')
-        unique_authors.update(authors)
-        if len(authors) == 1:
-            sole_authored += 1
-        else:
-            multi_authored += 1
-            total_authors_in_multi += len(authors)
-    
-    NCA = len(unique_authors)
-    CI = total_authors_in_multi / multi_authored if multi_authored > 0 else 0  # Índice de Colaboración
-    CC = 1 - (sole_authored / TP)  # Coeficiente de Colaboración (una variante)
-    
-    # Métricas de citación
-    TC = df['Cited by'].sum()
+    NCA = int(point['NCA'])
+    sole_authored = int(point['SA'])
+    multi_authored = int(point['CA'])
+    CI = float(point['CI'])  # Índice de Colaboración
+    CC = float(point['CC'])  # Coeficiente de Colaboración (una variante)
 
+    TC = df['Cited by'].sum()
     AC = TC / TP if TP > 0 else 0
+    NCP = int(point['NCP'])
+    PCP = float(point['PCP'])
+    CCP = float(point['CCP'])
 
+    # Índices h, g e i (publicaciones con al menos 10, 100, 200 citas)
+    h_index = int(point['h-index'])
+    g_index = int(point['g-index'])
+    i10 = point['i10-index']
+    i100 = point['i100-index']
+    i200 = point['i200-index']
 
-    NCP = df[df['Cited by'] > 0].shape[0]
-    PCP = (NCP / TP) * 100 if TP > 0 else 0
-    CCP = TC / NCP if NCP > 0 else 0
-    
-    # Cálculo de índices:
-    citations = df['Cited by'].sort_values(ascending=False).values
-    # h-index
-    h_index = sum(c >= i+1 for i, c in enumerate(citations))
-    # g-index
-    cumulative = np.cumsum(citations)
-    g_index = 0
-    for i, total in enumerate(cumulative):
-        if total >= (i+1) ** 2:
-            g_index = i + 1
-        else:
-            break
-    # i-index: número de publicaciones con al menos 10, 100, 200 citas
-    i10 = (citations >= 10).sum()
-    i100 = (citations >= 100).sum()
-    i200 = (citations >= 200).sum()
-    
     # Impresión de resultados separados en la terminal:
     print("\n=== Publication-related Metrics ===")
     print(f"Total Publications (TP): {TP}")
@@ -515,7 +538,7 @@ def analyze_bibliometric_metrics(scopus_file, output_folder='bibliometric_analys
     print(f"i200-index: {int(i200)}")
     
     print("\n=== Science Mapping Analysis ===")
-    print(" - Citation analysis (Relationships among publications, Most influential publications, Co-citation analysis) - Not implemented")
+    print(" - Citation analysis (Relationships among publications, Most influential publications, Co-citation analysis) - see the mainpath and centrality commands of bibliometric.py")
     print(" - Bibliographic coupling (Relationships among citing publications, Periodical/present themes, Co-word analysis) - Not implemented")
     print(" - Co-authorship analysis (Social interactions, Authors and affiliations) - Not implemented")
     
@@ -538,28 +561,20 @@ def analyze_bibliometric_metrics(scopus_file, output_folder='bibliometric_analys
         "i200-index": int(i200)
     }
     metrics_df = pd.DataFrame(list(metrics_dict.items()), columns=["Metric", "Value"])
+    if n_boot:
+        from metric_bootstrap import bootstrap_metrics
+        intervals = bootstrap_metrics(df, n_boot=n_boot, ci=ci, seed=seed)
+        metrics_df = metrics_df.merge(intervals, on='Metric', how='left')
+        print(f"\n=== Bootstrap Confidence Intervals ({ci:.0%}, {n_boot} replicates) ===")
+        for metric, lower, upper in zip(metrics_df['Metric'], metrics_df['Lower'], metrics_df['Upper']):
+            print(f"{metric}: [{lower:g}, {upper:g}]")
     metrics_df.to_csv(os.path.join(output_folder, 'bibliometric_metrics.csv'), index=False)
     
     return metrics_df
 
-import pandas as pd
-import numpy as np
-import os
-import re
-import networkx as nx
-import matplotlib.pyplot as plt
-from collections import defaultdict, Counter
-from itertools import combinations
-
-
-
-
-
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-
 def plot_publications_by_journal(scopus_file, top_n=3):
+    _, plt, sns = _plotting()
+    from matplotlib.colors import ListedColormap
     try:
         # Leer archivo con codificación automática
         encodings = ['utf-8', 'ISO-8859-1', 'latin1']
@@ -623,6 +638,7 @@ def plot_publications_by_journal(scopus_file, top_n=3):
 
 
 def plot_publications_by_subject(scopus_file, top_n=5, output_folder='journal_analysis'):
+    _, plt, sns = _plotting()
     try:
         os.makedirs(output_folder, exist_ok=True)
         
@@ -706,6 +722,10 @@ def science_mapping_analysis(scopus_file, output_folder='science_mapping'):
        - Red de co-autoría (relaciones entre autores extraídas de la columna "Authors")
        - Autores y sus afiliaciones (si existe la columna "Affiliations")
     """
+    import networkx as nx
+    from scipy import sparse
+    _, plt, _ = _plotting()
+
     os.makedirs(output_folder, exist_ok=True)
     
     # Intentar leer el archivo con distintos encodings
@@ -734,22 +754,25 @@ def science_mapping_analysis(scopus_file, output_folder='science_mapping'):
     else:
         print("La columna 'Cited by' no está disponible.")
     
-    # Construir red de co-citación (suponiendo que existe la columna "References")
+    # Referencias de cada documento, separadas por ";" una sola vez (IDs enteros por documento)
+    references = None
     if 'References' in df.columns:
-        co_citation_counts = defaultdict(int)
-        for idx, row in df.iterrows():
-            refs = str(row['References'])
-            # Se asume que las referencias están separadas por ";"
-            ref_list = [ref.strip() for ref in refs.split(";") if ref.strip() != ""]
-            # Para cada par de referencias, incrementar la cuenta
-            for ref1, ref2 in combinations(sorted(set(ref_list)), 2):
-                co_citation_counts[(ref1, ref2)] += 1
+        from ragged import RaggedField
+        references = RaggedField.from_values(df['References'], sep=';').unique()
+        ref_incidence = references.incidence()
+
+    # Construir red de co-citación (suponiendo que existe la columna "References")
+    if references is not None:
+        # Documentos que citan cada par de referencias: producto de la matriz de incidencia
+        co_citation = sparse.triu(ref_incidence.T @ ref_incidence, k=1).tocoo()
+        frequent = co_citation.data >= 2  # umbral para visualizar conexiones relevantes
         
         # Crear grafo de co-citación con los pares más frecuentes
         G_cocit = nx.Graph()
-        for (ref1, ref2), weight in co_citation_counts.items():
-            if weight >= 2:  # umbral para visualizar conexiones relevantes
-                G_cocit.add_edge(ref1, ref2, weight=weight)
+        for ref1, ref2, weight in zip(references.table[co_citation.row[frequent]],
+                                      references.table[co_citation.col[frequent]],
+                                      co_citation.data[frequent].astype(int)):
+            G_cocit.add_edge(ref1, ref2, weight=weight)
         
         plt.figure(figsize=(10, 8))
         pos = nx.spring_layout(G_cocit, k=0.5)
@@ -766,31 +789,17 @@ def science_mapping_analysis(scopus_file, output_folder='science_mapping'):
     # --- Sección 2: Relationships among cited publications ---
     print("\n=== Relationships among Cited Publications ===")
     # Bibliographic Coupling: se basa en la cantidad de referencias compartidas entre documentos.
-    if 'References' in df.columns:
-        # Crear un diccionario de paper_id -> conjunto de referencias
-        paper_refs = {}
-        for idx, row in df.iterrows():
-            refs = str(row['References'])
-            ref_list = set([ref.strip() for ref in refs.split(";") if ref.strip() != ""])
-            paper_refs[idx] = ref_list
-        
-        # Calcular acoplamiento bibliográfico (para pares de documentos)
-        bib_coupling = defaultdict(int)
-        paper_ids = list(paper_refs.keys())
-        for i in range(len(paper_ids)):
-            for j in range(i+1, len(paper_ids)):
-                pid1 = paper_ids[i]
-                pid2 = paper_ids[j]
-                shared = paper_refs[pid1].intersection(paper_refs[pid2])
-                if shared:
-                    bib_coupling[(pid1, pid2)] = len(shared)
+    if references is not None:
+        # Calcular acoplamiento bibliográfico (referencias compartidas por cada par de documentos)
+        bib_coupling = sparse.triu(ref_incidence @ ref_incidence.T, k=1).tocoo()
         
         # Extraer los 5 pares con mayor acoplamiento
-        if bib_coupling:
-            top_bib = sorted(bib_coupling.items(), key=lambda x: x[1], reverse=True)[:5]
+        if bib_coupling.nnz:
+            top_bib = np.lexsort((bib_coupling.col, bib_coupling.row, -bib_coupling.data))[:5]
             print("\nTop 5 Bibliographic Coupling (Paper IDs and shared references):")
-            for pair, count in top_bib:
-                print(f"Papers {pair[0]} & {pair[1]}: {count} references shared")
+            for i in top_bib:
+                pid1, pid2 = df.index[bib_coupling.row[i]], df.index[bib_coupling.col[i]]
+                print(f"Papers {pid1} & {pid2}: {int(bib_coupling.data[i])} references shared")
         else:
             print("No se encontró acoplamiento bibliográfico entre documentos.")
     else:
@@ -887,37 +896,32 @@ if __name__ == '__main__':
     metrica = analyze_bibliometric_metrics(file)
     science_mapping_analysis(file)
 
-
-# Run analysis
-
-
-file= 'Scopus_VR_ED_full_filters.csv'
-# Ejecutar análisis
-top_authors_result = analyze_scopus_authors(file)
-production_df, citation_df = analyze_countries(file)
-if production_df is not None and citation_df is not None:
-    # Save raw data
-    output_folder = 'country_results'
-    os.makedirs(output_folder, exist_ok=True)
-    
-    production_df.to_csv(os.path.join(output_folder, 'country_production.csv'), index=False)
-    citation_df.to_csv(os.path.join(output_folder, 'country_citations.csv'), index=False)
-    plot_publications_by_journal('Scopus_VR_ED_full_filters.csv', top_n=3)
-    plot_publications_by_subject('Scopus_VR_ED_full_filters.csv', top_n=3)
-    # Generate charts
-    plot_country_data(production_df, 'Publications', output_folder)
-    plot_country_data(citation_df, 'Citations', output_folder)
-    
-    # Show console summary
-    print("\nTop countries by production:")
-    print(production_df.head(10).to_string(index=False))
-    
-    print("\nTop countries by citations:")
-    print(citation_df.head(10).to_string(index=False))
-# Usage
-results = plot_yearly_publications(file)
-metrics_df = analyze_scopus_authors(file, output_folder='publication_related_metrics')
-
-if results is not None:
-    print("\nSummary statistics:")
-    print(results.describe())
+    # Run analysis
+    top_authors_result = analyze_scopus_authors(file)
+    production_df, citation_df = analyze_countries(file)
+    if production_df is not None and citation_df is not None:
+        # Save raw data
+        output_folder = 'country_results'
+        os.makedirs(output_folder, exist_ok=True)
+        
+        production_df.to_csv(os.path.join(output_folder, 'country_production.csv'), index=False)
+        citation_df.to_csv(os.path.join(output_folder, 'country_citations.csv'), index=False)
+        plot_publications_by_journal(file, top_n=3)
+        plot_publications_by_subject(file, top_n=3)
+        # Generate charts
+        plot_country_data(production_df, 'Publications', output_folder)
+        plot_country_data(citation_df, 'Citations', output_folder)
+        
+        # Show console summary
+        print("\nTop countries by production:")
+        print(production_df.head(10).to_string(index=False))
+        
+        print("\nTop countries by citations:")
+        print(citation_df.head(10).to_string(index=False))
+    # Usage
+    results = plot_yearly_publications(file)
+    metrics_df = analyze_scopus_authors(file, output_folder='publication_related_metrics')
+
+    if results is not None:
+        print("\nSummary statistics:")
+        print(results.describe())
@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+"""Single entry point for the bibliometric analyses
+
+    ./bibliometric.py metrics Scopus_export.csv
+    ./bibliometric.py countries Scopus_export.csv --top-n 15
+    ./bibliometric.py authors Scopus_export.csv --rank-by h-index
+
+Heavy libraries (pandas, matplotlib, networkx, pycountry, plotly) are only
+imported by the subcommand that needs them, so startup stays fast.
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _thesaurus(args):
+    """KeywordThesaurus of the --thesaurus/--remove/--normalize options (None when none is given)"""
+    path, remove = getattr(args, 'thesaurus', None), getattr(args, 'remove', None)
+    if not (path or remove or getattr(args, 'normalize', False)):
+        return None
+    from thesaurus import KeywordThesaurus
+
+    return KeywordThesaurus(path, remove)
+
+
+def _add_thesaurus_options(p):
+    p.add_argument('--normalize', action='store_true', help='Merge hyphen, plural and acronym keyword variants')
+    p.add_argument('--thesaurus', help='Thesaurus file of "variant<TAB>label" lines (implies --normalize)')
+    p.add_argument('--remove', help='File of keywords to drop, one per line (implies --normalize)')
+
+
+def _cached(args, func, *params, load=None, ignore=(), **kwargs):
+    """``func(corpus, *params, **kwargs)`` on the input export through the result cache
+
+    The key is the content hash of ``args.input`` plus the parameters, so
+    changing only a plotting option (--top-n, --no-plots) reuses the stored
+    result. ``load`` turns the path into the corpus (e.g. read_scopus_csv) and
+    is only called on a miss. --no-cache (or a namespace without cache options,
+    as in ``report``) computes directly.
+    """
+    if getattr(args, 'no_cache', True):
+        return func(load(args.input) if load is not None else args.input, *params, **kwargs)
+    from result_cache import ResultCache, DEFAULT_DIR
+
+    cache = ResultCache(args.cache_dir or DEFAULT_DIR)
+    return cache.call(func, args.input, *params, load=load, ignore=ignore, **kwargs)
+
+
+def cmd_metrics(args):
+    from bibliometri import analyze_bibliometric_metrics
+
+    analyze_bibliometric_metrics(args.input, output_folder=args.output_folder, n_boot=getattr(args, 'n_boot', 0),
+                                 ci=getattr(args, 'ci', 0.95))
+
+
+def cmd_countries(args):
+    from bibliometri import analyze_countries, plot_country_data
+
+    production_df, citation_df = _cached(args, analyze_countries, output_folder=args.output_folder,
+                                         ignore=('output_folder',))
+    if production_df is None:
+        return 1
+    os.makedirs(args.output_folder, exist_ok=True)
+    production_df.to_csv(os.path.join(args.output_folder, 'country_production.csv'), index=False)
+    citation_df.to_csv(os.path.join(args.output_folder, 'country_citations.csv'), index=False)
+    if not args.no_plots:
+        plot_country_data(production_df, 'Publications', args.output_folder, top_n=args.top_n)
+        plot_country_data(citation_df, 'Citations', args.output_folder, top_n=args.top_n)
+
+    print("\nTop countries by production:")
+    print(production_df.head(args.top_n).to_string(index=False))
+    print("\nTop countries by citations:")
+    print(citation_df.head(args.top_n).to_string(index=False))
+
+
+def cmd_scp(args):
+    from fields import read_scopus_csv
+    from country_collaboration import scp_mcp
+
+    table = _cached(args, scp_mcp, attribution=args.attribution, load=read_scopus_csv)
+    os.makedirs(args.output_folder, exist_ok=True)
+    table.to_csv(os.path.join(args.output_folder, 'scp_mcp_by_country.csv'), index=False)
+    if not args.no_plots:
+        from scp_and_mcp_by_hand import plot_scp_mcp
+        plot_scp_mcp(table, os.path.join(args.output_folder, 'scp_mcp_by_country.png'), top_n=args.top_n)
+    print(table.head(args.top_n).to_string(index=False))
+
+
+def cmd_collaboration(args):
+    from fields import read_scopus_csv
+    from country_collaboration import collaboration_network, export_collaboration
+
+    network = _cached(args, collaboration_network, args.counting, load=read_scopus_csv)
+    _, edges = export_collaboration(None, output_folder=args.output_folder, counting=args.counting,
+                                    top_n=args.top_n, plot=not args.no_plots, network=network)
+    print(edges.head(args.top_n).to_string(index=False))
+
+
+def cmd_authors(args):
+    import pandas as pd
+    from fields import read_scopus_csv
+    from index_h import process_authors
+
+    def load(path):
+        df = read_scopus_csv(path)
+        df['Cited by'] = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0).astype(int)
+        return df
+
+    authors_df = _cached(args, process_authors, load=load)
+    rank_col = {'publications': 'Total Publications', 'h-index': 'H-Index', 'citations': 'Total Citations'}
+    top = authors_df.sort_values(rank_col[args.rank_by], ascending=False).head(args.top_n)
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    output_csv = os.path.join(args.output_folder, f'top_authors_by_{args.rank_by}.csv')
+    top.to_csv(output_csv, index=False)
+    print(f"\nTop {args.top_n} Authors by {rank_col[args.rank_by]}:")
+    print(top[['Author', 'H-Index', 'Total Publications', 'Total Citations']].to_string(index=False))
+    print(f"\nResults saved to: {output_csv}")
+
+    if args.affiliations:
+        from bibliometri import analyze_scopus_authors
+        analyze_scopus_authors(args.input, output_folder=args.output_folder, top_n=args.top_n)
+
+
+def cmd_institutions(args):
+    from fields import read_scopus_csv
+    from institutions import INSTITUTION_TABLE_FILE, RESOLVER, institution_ranking
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    table_path = args.table or os.path.join(args.output_folder, INSTITUTION_TABLE_FILE)
+    known = RESOLVER.load(table_path)
+    ranking = institution_ranking(read_scopus_csv(args.input))
+    RESOLVER.save(table_path)
+    ranking = ranking.sort_values([args.rank_by, 'Articles'], ascending=False)
+    output_csv = os.path.join(args.output_folder, 'institution_ranking.csv')
+    ranking.to_csv(output_csv, index=False)
+    print(ranking.head(args.top_n).to_string(index=False))
+    print(f"\n{len(ranking)} institutions ({known} variants read from, {len(RESOLVER.variants)} saved to {table_path})")
+    print(f"Results saved to: {output_csv}")
+
+
+def cmd_production(args):
+    from fields import read_scopus_csv
+    from author_production import AuthorYearMatrix, plot_production_over_time
+
+    matrix = AuthorYearMatrix(read_scopus_csv(args.input), field=args.field, reference_year=args.reference_year)
+    os.makedirs(args.output_folder, exist_ok=True)
+    matrix.careers().to_csv(os.path.join(args.output_folder, 'author_careers.csv'), index=False)
+    table = matrix.production_over_time(k=args.top_n)
+    table.to_csv(os.path.join(args.output_folder, 'authors_production_over_time.csv'), index=False)
+    if args.window:
+        windows = matrix.top_per_window(k=args.top_n, window=args.window, by=args.rank_by)
+        windows.to_csv(os.path.join(args.output_folder, f'top_authors_per_{args.window}_years.csv'), index=False)
+        print(windows.to_string(index=False))
+    else:
+        print(matrix.top_authors(k=args.top_n, by=args.rank_by).to_string(index=False))
+    if not args.no_plots:
+        plot_production_over_time(table, os.path.join(args.output_folder, 'authors_production_over_time.png'))
+
+
+def cmd_cooccurrence(args):
+    from profiling import load_script
+
+    cooc = load_script('co-ocurrence.py')
+    thesaurus = _thesaurus(args)
+    # The thesaurus folds the original spelling (acronyms are written in capitals) and lower-cases after
+    paper_keywords = _cached(args, cooc.read_keywords_from_csv, lower=thesaurus is None)
+    if thesaurus is not None:
+        paper_keywords = thesaurus.apply(paper_keywords, lower=True)
+        paper_keywords = paper_keywords.take(paper_keywords.lengths > 0)
+    if not paper_keywords:
+        print("No keywords found in the file.")
+        return 1
+    cooccurrence_df = cooc.create_cooccurrence_matrix(paper_keywords, top_n=args.top_n)
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    cooccurrence_df.to_csv(os.path.join(args.output_folder, 'keyword_cooccurrence_matrix.csv'))
+    if not args.no_plots:
+        plt = cooc.visualize_cooccurrence_matrix(cooccurrence_df)
+        output_img = os.path.join(args.output_folder, 'keyword_cooccurrence_matrix.png')
+        plt.savefig(output_img, dpi=300, bbox_inches='tight')
+        plt.close()
+        print(f"Heatmap saved to: {output_img}")
+    print("\nCo-occurrence matrix:")
+    print(cooccurrence_df)
+
+
+def cmd_mapping(args):
+    from bibliometri import science_mapping_analysis
+
+    science_mapping_analysis(args.input, output_folder=args.output_folder)
+
+
+def cmd_evolution(args):
+    from evolution_key_wrods import load_thematic_data, build_thematic_sankey
+
+    fig = build_thematic_sankey(load_thematic_data(args.input))
+    fig.write_html(args.output)
+    print(f"Thematic evolution Sankey saved to: {args.output}")
+
+
+def cmd_threefield(args):
+    from fields import read_scopus_csv
+    from three_field import three_field_data, plot_three_field
+
+    nodes, links = _cached(args, three_field_data, fields=args.fields, k=args.top_n, load=read_scopus_csv)
+    print(nodes.to_string(index=False))
+    plot_three_field(nodes, links, output_file=args.output)
+
+
+def cmd_annual(args):
+    import datetime
+    from fields import read_scopus_csv
+    from publications_per_year import annual_citations
+
+    # The reference year is fixed before the cache lookup, so a new year gives a new entry
+    reference_year = args.reference_year or datetime.date.today().year
+    table = _cached(args, annual_citations, reference_year=reference_year, load=read_scopus_csv)
+    os.makedirs(args.output_folder, exist_ok=True)
+    table.to_csv(os.path.join(args.output_folder, 'annual_citations.csv'), index=False)
+    if not args.no_plots:
+        import matplotlib
+        matplotlib.use('Agg')
+        from profiling import load_script
+
+        plots = load_script(os.path.join('biblioshiny_outputs', 'citations_analysis.py'))
+        plots.plot_biblioshiny(table, output_file=os.path.join(args.output_folder, 'annual_citations.png'))
+    print(table.round(2).to_string(index=False))
+
+
+def cmd_normalized(args):
+    from fields import read_scopus_csv
+    from normalized_citations import normalized_citations, normalized_ranking
+
+    scores = _cached(args, normalized_citations, subject=args.subject, load=read_scopus_csv)
+    ranking = _cached(args, normalized_ranking, args.field, subject=args.subject, counting=args.counting,
+                      min_papers=args.min_papers, load=read_scopus_csv)
+    os.makedirs(args.output_folder, exist_ok=True)
+    scores.to_csv(os.path.join(args.output_folder, 'normalized_citations.csv'), index=False)
+    output_csv = os.path.join(args.output_folder, f'normalized_ranking_{args.field}.csv')
+    ranking.to_csv(output_csv, index=False)
+    print(f"MNCS of the corpus: {scores['NCS'].mean():.3f}, top 10%: {scores['Top10'].mean():.1%}, "
+          f"top 1%: {scores['Top1'].mean():.1%}")
+    print(ranking.nlargest(args.top_n, args.rank_by).to_string(index=False))
+    print(f"\nResults saved to: {output_csv}")
+
+
+def cmd_sources(args):
+    import functools
+    from fields import read_scopus_csv
+    from source_metrics import source_metrics, bradford_zones, plot_source_metric
+
+    load = functools.lru_cache(maxsize=1)(read_scopus_csv)
+    metrics, per_year = _cached(args, source_metrics, reference_year=args.reference_year, load=load)
+    zones = _cached(args, bradford_zones, load=load)
+    os.makedirs(args.output_folder, exist_ok=True)
+    metrics.to_csv(os.path.join(args.output_folder, 'source_metrics.csv'), index=False)
+    per_year.to_csv(os.path.join(args.output_folder, 'source_publications_per_year.csv'))
+    zones.to_csv(os.path.join(args.output_folder, 'bradford_zones.csv'), index=False)
+    if not args.no_plots:
+        plot_source_metric(metrics, args.rank_by, top_n=args.top_n, output_folder=args.output_folder)
+    print(f"\nTop {args.top_n} sources by {args.rank_by}:")
+    print(metrics.nlargest(args.top_n, args.rank_by).to_string(index=False))
+
+
+def cmd_centrality(args):
+    from fields import read_scopus_csv
+    from centrality import network_centrality
+
+    table = _cached(args, network_centrality, args.network, n_pivots=args.pivots, epsilon=args.epsilon,
+                    load=read_scopus_csv)
+    os.makedirs(args.output_folder, exist_ok=True)
+    output_csv = os.path.join(args.output_folder, f'{args.network}_centrality.csv')
+    table.to_csv(output_csv, index=False)
+    print(table.nlargest(args.top_n, args.rank_by).to_string(index=False))
+    print(f"\nResults saved to: {output_csv}")
+
+
+def cmd_export(args):
+    from fields import read_scopus_csv
+    from centrality import build_network
+    from network_export import export_network
+
+    adjacency, labels = _cached(args, build_network, args.network, load=read_scopus_csv)
+    export_network(adjacency, labels, args.output_folder, f'{args.network}_network', formats=args.format,
+                   directed=args.network == 'citation', min_weight=args.min_weight)
+
+
+def cmd_mainpath(args):
+    from fields import read_scopus_csv
+    from main_path import main_path_analysis, plot_main_path
+
+    links, local_path, global_path = _cached(args, main_path_analysis, method=args.weight, ties=not args.no_ties,
+                                             load=read_scopus_csv)
+    os.makedirs(args.output_folder, exist_ok=True)
+    links.to_csv(os.path.join(args.output_folder, f'citation_links_{args.weight}.csv'), index=False)
+    for name, path in (('local', local_path), ('global', global_path)):
+        path.to_csv(os.path.join(args.output_folder, f'{name}_main_path_{args.weight}.csv'), index=False)
+        print(f"\n=== {name.capitalize()} main path ({len(path)} links) ===")
+        print(path[['Cited_year', 'Cited_author', 'Citing_year', 'Citing_author', args.weight]].to_string(index=False))
+        if len(path) and not args.no_plots:
+            plot_main_path(path, os.path.join(args.output_folder, f'{name}_main_path_{args.weight}.png'),
+                           title=f'{name.capitalize()} Main Path', method=args.weight)
+
+
+def cmd_lotka(args):
+    from fields import read_scopus_csv
+    from productivity_laws import lotka_law, plot_lotka
+
+    table, summary = _cached(args, lotka_law, field=args.field, n_boot=args.n_boot, load=read_scopus_csv)
+    os.makedirs(args.output_folder, exist_ok=True)
+    table.to_csv(os.path.join(args.output_folder, 'lotka_table.csv'), index=False)
+    if not args.no_plots:
+        plot_lotka(table, summary, os.path.join(args.output_folder, 'lotka_law.png'))
+    print(table.to_string(index=False))
+    print("\n=== Lotka's Law ===")
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+def cmd_distributions(args):
+    from distributions import corpus_distributions
+
+    tables = corpus_distributions(args.input, threshold=args.threshold, max_categories=args.max_categories,
+                                  chunksize=args.chunksize)
+    os.makedirs(args.output_folder, exist_ok=True)
+    for name, table in tables.items():
+        print(f"\n=== {name} ===")
+        if table is None:
+            print("Column not found in the export")
+            continue
+        print(table.to_string(index=False))
+        table.to_csv(os.path.join(args.output_folder, name.lower().replace(' ', '_') + '_distribution.csv'), index=False)
+
+
+def cmd_topics(args):
+    from topics import fit_topics, plot_topic_prevalence
+
+    terms, prevalence = fit_topics(args.input, output_folder=args.output_folder, n_topics=args.n_topics,
+                                   method=args.method, chunksize=args.chunksize, epochs=args.epochs,
+                                   min_df=args.min_df, max_df=args.max_df)
+    if not args.no_plots:
+        plot_topic_prevalence(prevalence, terms, os.path.join(args.output_folder, 'topic_prevalence_by_year.png'))
+    print(terms.groupby('Topic')['Term'].agg(', '.join).to_string())
+
+
+def cmd_trends(args):
+    from trend_topics import KeywordYearMatrix, plot_trend_topics
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    state = args.state or os.path.join(args.output_folder, f'keyword_year_{args.field}')
+    thesaurus = _thesaurus(args)
+    if args.update and os.path.exists(state + '.npz'):
+        matrix = KeywordYearMatrix.load(state)
+        if matrix.field != args.field:
+            print(f"Saved matrix {state} is for field {matrix.field}, not {args.field}")
+            return 1
+        # The saved thesaurus keeps the labels already chosen; other options would fold the new
+        # records differently and split keywords between two labels
+        saved = matrix.thesaurus.settings() if matrix.thesaurus is not None else None
+        if saved != (thesaurus.settings() if thesaurus is not None else None):
+            print(f"Saved matrix {state} was built with other --normalize/--thesaurus/--remove options; "
+                  f"repeat them or use a new --state")
+            return 1
+    else:
+        matrix = KeywordYearMatrix(args.field, thesaurus)
+    matrix.update(args.input, chunksize=args.chunksize).save(state)
+
+    trends = matrix.trend_topics(min_freq=args.min_freq, n_items=args.n_items)
+    trends.to_csv(os.path.join(args.output_folder, f'trend_topics_{args.field}.csv'), index=False)
+    matrix.term_year_stats(args.min_freq).to_csv(
+        os.path.join(args.output_folder, f'keyword_year_stats_{args.field}.csv'), index=False)
+    if not args.no_plots:
+        plot_trend_topics(trends, os.path.join(args.output_folder, f'trend_topics_{args.field}.png'),
+                          title=f'Trend Topics ({matrix.column})')
+    print(trends.to_string(index=False))
+
+
+def cmd_merge(args):
+    from merge_exports import merge_exports
+
+    merged, links = merge_exports(args.inputs, priority=args.priority, threshold=args.threshold, near=not args.no_near)
+    merged.to_csv(args.output, index=False)
+    links.to_csv(os.path.splitext(args.output)[0] + '_duplicates.csv', index=False)
+    print(f"{len(links)} duplicate links ({', '.join(f'{k}: {v}' for k, v in links['reason'].value_counts().items())})")
+    print(f"Merged corpus: {len(merged)} records saved to {args.output}")
+
+
+def cmd_serve(args):
+    from query_service import serve
+
+    cache = None
+    if not args.no_cache:
+        from result_cache import ResultCache, DEFAULT_DIR
+        cache = ResultCache(args.cache_dir or DEFAULT_DIR)
+    serve(args.input, host=args.host, port=args.port, workers=args.workers, cache=cache)
+
+
+def cmd_batch(args):
+    from batch_analysis import run_batch
+
+    cache_dir = None
+    if not args.no_cache:
+        from result_cache import DEFAULT_DIR
+        cache_dir = args.cache_dir or DEFAULT_DIR
+    comparison = run_batch(args.input, output_folder=args.output_folder, workers=args.workers, top_n=args.top_n,
+                           cache_dir=cache_dir, plot=not args.no_plots)
+    print(comparison.to_string())
+
+
+def cmd_cache(args):
+    from result_cache import ResultCache, DEFAULT_DIR
+
+    cache = ResultCache(args.cache_dir or DEFAULT_DIR)
+    if args.action == 'stats':
+        for key, value in cache.stats().items():
+            print(f"{key}: {value}")
+    elif args.action == 'list':
+        entries = cache.entries()
+        print(entries.drop(columns='params').to_string(index=False) if len(entries) else "Cache is empty")
+    elif args.action == 'evict':
+        print(f"{cache.evict(args.max_bytes)} entries evicted")
+    elif args.action == 'clear':
+        print(f"{cache.clear()} entries removed")
+    else:
+        print(f"{cache.invalidate(function=args.function, corpus=args.corpus)} entries removed")
+
+
+def cmd_report(args):
+    """Run the main analyses on one corpus and write a run report next to the results"""
+    import bibliometri
+    from profiling import RunReport
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    report = RunReport(name=os.path.splitext(os.path.basename(args.input))[0],
+                       trace_memory=args.trace_memory, profiler=args.profiler,
+                       profile_dir=os.path.join(args.output_folder, 'profiles'))
+    sub = argparse.Namespace(input=args.input, top_n=args.top_n, no_plots=args.no_plots,
+                             rank_by='publications', affiliations=False)
+
+    steps = [('metrics', cmd_metrics), ('authors', cmd_authors), ('cooccurrence', cmd_cooccurrence)]
+    if not args.skip_countries:
+        steps.insert(1, ('countries', cmd_countries))
+    report.track_cache('resolve_country', bibliometri.resolve_country)
+    with report.instrument([(bibliometri, 'get_country'), 'pandas.read_csv']):
+        for name, func in steps:
+            sub.output_folder = os.path.join(args.output_folder, name)
+            with report.stage(name):
+                func(sub)
+
+    print('\n' + report.summary())
+    print(f"Run report saved to: {report.write_json(os.path.join(args.output_folder, 'run_report.json'))}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='bibliometric', description='Bibliometric analysis of Scopus exports')
+    parser.add_argument('--cache-dir', help='Result cache folder (default: $BIBLIOMETRIC_CACHE_DIR or .bibliometric_cache)')
+    parser.add_argument('--no-cache', action='store_true', help='Recompute instead of reusing cached results')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add(name, func, help_text, output_folder, input_help='Scopus CSV export'):
+        p = subparsers.add_parser(name, help=help_text, description=help_text)
+        p.add_argument('input', help=input_help)
+        if output_folder:
+            p.add_argument('-o', '--output-folder', default=output_folder, help='Where results are written')
+        p.set_defaults(func=func)
+        return p
+
+    p = add('metrics', cmd_metrics, 'Publication and citation metrics (TP, CI, CC, h/g/i-index...)',
+            'bibliometric_analysis')
+    p.add_argument('--n-boot', type=int, default=0, help='Bootstrap replicates for confidence intervals (0 to skip)')
+    p.add_argument('--ci', type=float, default=0.95, help='Confidence level of the bootstrap intervals')
+
+    p = add('countries', cmd_countries, 'Production and citations by country', 'country_results')
+    p.add_argument('--top-n', type=int, default=15)
+    p.add_argument('--no-plots', action='store_true')
+
+    p = add('scp', cmd_scp, 'Single- vs multiple-country publications (SCP/MCP) by country', 'country_results')
+    p.add_argument('--top-n', type=int, default=10)
+    p.add_argument('--attribution', choices=['corresponding', 'first'], default='corresponding',
+                   help='Country each paper is counted for')
+    p.add_argument('--no-plots', action='store_true')
+
+    p = add('collaboration', cmd_collaboration, 'Country collaboration matrix, edge list and network',
+            'country_collaboration')
+    p.add_argument('--counting', choices=['full', 'fractional'], default='full')
+    p.add_argument('--top-n', type=int, default=50, help='Strongest links drawn in the network')
+    p.add_argument('--no-plots', action='store_true')
+
+    p = add('authors', cmd_authors, 'Author rankings by publications, h-index or citations', 'author_analysis')
+    p.add_argument('--top-n', type=int, default=10)
+    p.add_argument('--rank-by', choices=['publications', 'h-index', 'citations'], default='publications')
+    p.add_argument('--affiliations', action='store_true', help='Also plot top authors with affiliations')
+
+    p = add('institutions', cmd_institutions, 'Institution ranking with normalised (canonical) institution names',
+            'institution_analysis')
+    p.add_argument('--table', help='Institution lookup table (JSON, default: <output>/institution_table.json)')
+    p.add_argument('--rank-by', choices=['Articles', 'Citations', 'h_index', 'g_index'], default='Articles')
+    p.add_argument('--top-n', type=int, default=10)
+
+    p = add('production', cmd_production, "Authors' production and citations over time", 'author_production')
+    p.add_argument('--field', default='AU', help='Author field: AU, AF or a column name')
+    p.add_argument('--top-n', type=int, default=10)
+    p.add_argument('--rank-by', choices=['articles', 'citations', 'tc_per_year'], default='articles')
+    p.add_argument('--window', type=int, help='Also rank authors within consecutive windows of this many years')
+    p.add_argument('--reference-year', type=int, help='Current year for TC per year (default: last year in data)')
+    p.add_argument('--no-plots', action='store_true')
+
+    p = add('cooccurrence', cmd_cooccurrence, 'Author keyword co-occurrence matrix', 'cooccurrence_analysis')
+    p.add_argument('--top-n', type=int, default=10)
+    p.add_argument('--no-plots', action='store_true')
+    _add_thesaurus_options(p)
+
+    add('mapping', cmd_mapping, 'Science mapping (co-citation, coupling, co-word, co-authorship)', 'science_mapping')
+
+    p = add('evolution', cmd_evolution, 'Thematic evolution Sankey from a bibliometrix export', None,
+            input_help='Thematic_Evolution_bibliometrix_*.xlsx file')
+    p.add_argument('-o', '--output', default='sankey_evolucion_tematica.html')
+
+    p = add('annual', cmd_annual, 'Articles, MeanTCperArt, MeanTCperYear and CitableYears per publication year',
+            'annual_citations')
+    p.add_argument('--reference-year', type=int, help='Year the citable years are counted to (default: current year)')
+    p.add_argument('--no-plots', action='store_true')
+
+    p = add('sources', cmd_sources, 'Source (journal) h/g/m-index, citations and Bradford zones', 'source_analysis')
+    p.add_argument('--top-n', type=int, default=10)
+    p.add_argument('--rank-by', choices=['h_index', 'g_index', 'm_index', 'TC', 'NP'], default='h_index')
+    p.add_argument('--reference-year', type=int, help='Current year for the m-index (default: last year in data)')
+    p.add_argument('--no-plots', action='store_true')
+
+    p = add('normalized', cmd_normalized, 'Field- and year-normalised citations (MNCS, top 10%%/1%%) and rankings',
+            'normalized_citations')
+    p.add_argument('--field', choices=['AU', 'SO', 'AU_CO', 'AU_UN'], default='AU', help='Entities to rank')
+    p.add_argument('--subject', help='Subject category column (default: first found, else the source title)')
+    p.add_argument('--counting', choices=['full', 'fractional'], default='full')
+    p.add_argument('--min-papers', type=float, default=1)
+    p.add_argument('--rank-by', choices=['TNCS', 'MNCS', 'PP_top10', 'P_top10', 'TCS'], default='TNCS')
+    p.add_argument('--top-n', type=int, default=10)
+
+    p = add('centrality', cmd_centrality, 'PageRank, degree, eigenvector, betweenness and closeness of a network',
+            'centrality')
+    p.add_argument('--network', choices=['coauthorship', 'cocitation', 'coupling', 'coword', 'citation'],
+                   default='coauthorship')
+    p.add_argument('--epsilon', type=float, default=0.1, help='Accuracy of betweenness/closeness (pivots ~ log n / eps^2)')
+    p.add_argument('--pivots', type=int, help='Number of sampled pivots (overrides --epsilon)')
+    p.add_argument('--rank-by', choices=['PageRank', 'Eigenvector', 'Betweenness', 'Closeness'], default='PageRank')
+    p.add_argument('--top-n', type=int, default=10)
+
+    p = add('export', cmd_export, 'Write a network as GEXF, GraphML, Pajek or VOSviewer files', 'network_export')
+    p.add_argument('--network', choices=['coauthorship', 'cocitation', 'coupling', 'coword', 'citation'],
+                   default='cocitation')
+    p.add_argument('--format', nargs='+', choices=['gexf', 'graphml', 'pajek', 'vosviewer'],
+                   default=['gexf', 'vosviewer'])
+    p.add_argument('--min-weight', type=float, help='Drop edges lighter than this')
+
+    p = add('mainpath', cmd_mainpath, 'Main path analysis (SPC/SPLC/SPNP) of the local citation network',
+            'main_path')
+    p.add_argument('--weight', choices=['SPC', 'SPLC', 'SPNP'], default='SPC', help='Traversal weight of the links')
+    p.add_argument('--no-ties', action='store_true', help='Follow a single link on ties in the local main path')
+    p.add_argument('--no-plots', action='store_true')
+
+    p = add('lotka', cmd_lotka, "Author productivity distribution and Lotka's law fit", 'lotka_analysis')
+    p.add_argument('--field', default='AU', help='Author field: AU, AF or a column name such as "Author(s) ID"')
+    p.add_argument('--n-boot', type=int, default=1000, help='Bootstrap replicates for the exponent CIs (0 to skip)')
+    p.add_argument('--no-plots', action='store_true')
+
+    p = add('distributions', cmd_distributions, 'Document type and subject area distributions (streamed)',
+            'distributions')
+    p.add_argument('--threshold', type=float, default=0.02, help='Share below which categories become "Others"')
+    p.add_argument('--max-categories', type=int, help='Keep at most this many categories before "Others"')
+    p.add_argument('--chunksize', type=int, default=100000)
+
+    p = add('topics', cmd_topics, 'Topic model (NMF / LDA) over titles and abstracts, streamed in chunks',
+            'topic_analysis')
+    p.add_argument('--n-topics', type=int, default=10)
+    p.add_argument('--method', choices=['nmf', 'lda'], default='nmf')
+    p.add_argument('--chunksize', type=int, default=20000, help='Documents per chunk (bounds memory)')
+    p.add_argument('--epochs', type=int, default=2)
+    p.add_argument('--min-df', type=int, default=5, help='Minimum documents per term')
+    p.add_argument('--max-df', type=float, default=0.5, help='Maximum share of documents per term')
+    p.add_argument('--no-plots', action='store_true')
+
+    p = add('trends', cmd_trends, 'Keyword x year matrix and trend topics (streamed, incremental)', 'trend_topics')
+    p.add_argument('--field', choices=['DE', 'ID'], default='DE', help='Author Keywords (DE) or Index Keywords (ID)')
+    p.add_argument('--min-freq', type=int, default=5)
+    p.add_argument('--n-items', type=int, default=5, help='Keywords per year')
+    p.add_argument('--update', action='store_true', help='Add the input to the saved matrix instead of starting over')
+    p.add_argument('--state', help='Saved matrix path without extension (default: in the output folder)')
+    p.add_argument('--chunksize', type=int, default=100000)
+    p.add_argument('--no-plots', action='store_true')
+    _add_thesaurus_options(p)
+
+    p = add('threefield', cmd_threefield, 'Three-field (Sankey) plot, e.g. countries -> keywords -> affiliations', None)
+    p.add_argument('--fields', nargs=3, default=['AU_CO', 'DE', 'AU_UN'], metavar='FIELD',
+                   help='bibliometrix tags (AU, DE, ID, SO, AU_CO, AU_UN, CR) or column names')
+    p.add_argument('--top-n', type=int, default=10, help='Items kept per field')
+    p.add_argument('-o', '--output', default='three_field_plot.html')
+
+    p = subparsers.add_parser('merge', help='Merge Scopus / WoS exports and remove duplicates',
+                              description='Merge Scopus / WoS exports and remove duplicates')
+    p.add_argument('inputs', nargs='+', help='Scopus CSV or WoS tab-delimited exports')
+    p.add_argument('-o', '--output', default='datos_combinados.csv')
+    p.add_argument('--priority', nargs='+', default=['Scopus', 'WoS'], help='Database whose fields win on conflicts')
+    p.add_argument('--threshold', type=float, default=0.7, help='Minimum estimated title Jaccard similarity')
+    p.add_argument('--no-near', action='store_true', help='Only exact DOI / EID duplicates')
+    p.set_defaults(func=cmd_merge)
+
+    p = add('batch', cmd_batch, 'Metric suite on every corpus of a manifest, in parallel, with a comparison table',
+            'batch_analysis', input_help='Manifest: CSV with path (and name) columns, JSON, or one path per line')
+    p.add_argument('--workers', type=int, help='Worker processes (default: one per corpus, up to the CPU count)')
+    p.add_argument('--top-n', type=int, default=10, help='Countries, authors and sources kept per corpus')
+    p.add_argument('--no-plots', action='store_true')
+
+    p = add('serve', cmd_serve, 'Local HTTP/JSON service answering metric queries on one corpus', None)
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--workers', type=int, default=2, help='Worker processes for full analyses (0 to disable)')
+
+    p = subparsers.add_parser('cache', help='Inspect, evict or invalidate cached results',
+                              description='Inspect, evict or invalidate cached results')
+    p.add_argument('action', choices=['stats', 'list', 'evict', 'clear', 'invalidate'])
+    p.add_argument('--max-bytes', type=int, help='Size budget for evict (default: $BIBLIOMETRIC_CACHE_BYTES or 2 GiB)')
+    p.add_argument('--function', help='Only entries of this function, e.g. source_metrics (invalidate)')
+    p.add_argument('--corpus', help='Only entries of this export file or corpus hash (invalidate)')
+    p.set_defaults(func=cmd_cache)
+
+    p = add('report', cmd_report, 'Run the main analyses and write a per-stage run report', 'bibliometric_report')
+    p.add_argument('--top-n', type=int, default=10)
+    p.add_argument('--no-plots', action='store_true')
+    p.add_argument('--skip-countries', action='store_true', help='Skip the (slow) country analysis')
+    p.add_argument('--trace-memory', action='store_true')
+    p.add_argument('--profiler', choices=['cprofile', 'pyinstrument'])
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,23 @@
-import pandas as pd
+import os
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
 
+
+def load_annual_citations(path, reference_year=None):
+    """Year, N, MeanTCperArt, MeanTCperYear and CitableYears computed from a Scopus CSV export
+    (as biblioshiny's Annual Total Citation per Year table; reference year: current year)"""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from fields import read_scopus_csv
+    from publications_per_year import annual_citations
+    return annual_citations(read_scopus_csv(path), reference_year=reference_year)
+
+
 def plot_biblioshiny(df,
                      tick_fontsize=16,
                      label_fontsize=18,
-                     title_fontsize=20):
+                     title_fontsize=20,
+                     output_file=None):
     # Datos
     x = np.arange(len(df))
     years          = df['Year'].to_numpy()
@@ -15,7 +27,7 @@ def plot_biblioshiny(df,
     citable_years  = df['CitableYears'].to_numpy()
 
     # Estilo
-    plt.style.use('seaborn-white')
+    plt.style.use('seaborn-v0_8-white')
     fig, ax1 = plt.subplots(figsize=(14, 7))
     fig.patch.set_facecolor('white')
 
@@ -60,21 +72,15 @@ def plot_biblioshiny(df,
                fontsize=tick_fontsize)
     plt.title('Biblioshiny: Publicaciones y Métricas de Citación', fontsize=title_fontsize)
     plt.tight_layout()
-    plt.show()
+    if output_file:
+        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        plt.close(fig)
+        print(f"Annual citation plot saved to: {output_file}")
+    else:
+        plt.show()
 
 
 if __name__ == '__main__':
-    df = pd.read_excel(
-        'Annual_Total_Citation_per_Year_bibliometrix_2025-05-12.xlsx',
-        engine='openpyxl', header=1
-    )
-    df.columns = ['Year','MeanTCperArt','N','MeanTCperYear','CitableYears']
-    df = df.dropna(subset=['Year'])
-    df['Year'] = df['Year'].astype(int)
-    for c in ['MeanTCperArt','N','MeanTCperYear','CitableYears']:
-        df[c] = pd.to_numeric(df[c], errors='coerce')
-    df = df.sort_values('Year').reset_index(drop=True)
-
-    plot_biblioshiny(df)
-
-~                                                               
+    file_path = sys.argv[1] if len(sys.argv) > 1 else 'Scopus_VR_ED_full_filters.csv'
+    reference_year = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    plot_biblioshiny(load_annual_citations(file_path, reference_year))
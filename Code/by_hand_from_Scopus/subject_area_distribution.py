@@ -1,17 +1,37 @@
+import os
+import sys
 import matplotlib.pyplot as plt
 
-# Datos
-labels = ['Physics & Astronomy', 'Computer Science', 'Engineering', 'Mathematics',
-          'Material Science', 'Chemistry', 'Decision Sciences', 'Others']
-sizes = [30.3, 24.5, 15.1, 12.7, 9.7, 1.9, 1.4, 4.4]
 colors = ['#ff9999','#66b3ff','#99ff99','#ffcc99','#c2c2f0','#ffb3e6','#c2f0c2','#f0e68c']
-explode = (0.1, 0.05, 0, 0, 0, 0, 0, 0)  # Resalta las dos áreas principales
 
-# Crear gráfico de pastel
-plt.figure(figsize=(8, 8))
-plt.pie(sizes, labels=labels, autopct='%1.1f%%', colors=colors,
-        startangle=140, explode=explode, shadow=True)
-plt.title('Document Distribution by Subject Area')
-plt.axis('equal')  # Asegura que el gráfico sea circular
-plt.tight_layout()
-plt.show()
+
+def plot_subject_areas(table, output_file=None):
+    """Pie chart of a distribution table with Category and Percent columns
+    (as returned by distributions.corpus_distributions)"""
+    labels = table['Category'].tolist()
+    sizes = table['Percent'].tolist()
+    explode = ([0.1, 0.05] + [0] * len(labels))[:len(labels)]  # Resalta las dos áreas principales
+
+    # Crear gráfico de pastel
+    plt.figure(figsize=(8, 8))
+    plt.pie(sizes, labels=labels, autopct='%1.1f%%', colors=[colors[i % len(colors)] for i in range(len(labels))],
+            startangle=140, explode=explode, shadow=True)
+    plt.title('Document Distribution by Subject Area')
+    plt.axis('equal')  # Asegura que el gráfico sea circular
+    plt.tight_layout()
+    if output_file:
+        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        plt.close()
+    else:
+        plt.show()
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from distributions import corpus_distributions
+
+    file = sys.argv[1] if len(sys.argv) > 1 else 'Scopus_VR_ED_full_filters.csv'
+    table = corpus_distributions(file)['Subject Area']
+    if table is None:
+        sys.exit("No subject area / ASJC column in the export")
+    plot_subject_areas(table, output_file='subject_areas.png')
@@ -1,38 +1,56 @@
+import os
+import sys
 import matplotlib.pyplot as plt
 
-# Datos
-labels = ['Article', 'Conference Paper', 'Review', 'Book Chapter',
-          'Book']
-sizes = [63.2, 31.6, 2.5, 2.0, 0.7]#, 1.9, 1.4, 4.4]
 colors = ['#ff9999','#66b3ff','#99ff99','#ffcc99','#c2c2f0','#ffb3e6','#c2f0c2','#f0e68c']
 
-explode = (0.1, 0.05, 0, 0, 0)#, 0, 0, 0)
-# Crear gráfico tipo donut
-plt.figure(figsize=(9, 9))
-wedges, texts, autotexts = plt.pie(
-    sizes,
-    labels=labels,
-    autopct='%1.1f%%',
-    startangle=140,
-    colors=colors,
-    explode=explode,
-    wedgeprops=dict(width=0.4),  # Anillo sin sombra
-    textprops=dict(color="black", fontsize=14)  # Estilo para etiquetas
-)
-
-# Ajustar estilos de porcentajes
-for autotext in autotexts:
-    autotext.set_color('black')
-    autotext.set_fontsize(13)
-    #autotext.set_weight('bold')
-
-# Añadir círculo blanco al centro
-centre_circle = plt.Circle((0, 0), 0.70, fc='white')
-fig = plt.gcf()
-fig.gca().add_artist(centre_circle)
-
-# Título y presentación
-plt.title('Document Distribution by Subject Area (Donut Chart)', fontsize=14, weight='bold')
-plt.axis('equal')
-plt.tight_layout()
-plt.show()
+
+def plot_document_types(table, output_file=None, title='Document Distribution by Type (Donut Chart)'):
+    """Donut chart of a distribution table with Category and Percent columns
+    (as returned by distributions.corpus_distributions)"""
+    labels = table['Category'].tolist()
+    sizes = table['Percent'].tolist()
+    # Resalta las dos categorías principales
+    explode = [0.1, 0.05] + [0] * max(len(labels) - 2, 0)
+
+    # Crear gráfico tipo donut
+    plt.figure(figsize=(9, 9))
+    wedges, texts, autotexts = plt.pie(
+        sizes,
+        labels=labels,
+        autopct='%1.1f%%',
+        startangle=140,
+        colors=[colors[i % len(colors)] for i in range(len(labels))],
+        explode=explode[:len(labels)],
+        wedgeprops=dict(width=0.4),  # Anillo sin sombra
+        textprops=dict(color="black", fontsize=14)  # Estilo para etiquetas
+    )
+
+    # Ajustar estilos de porcentajes
+    for autotext in autotexts:
+        autotext.set_color('black')
+        autotext.set_fontsize(13)
+        #autotext.set_weight('bold')
+
+    # Añadir círculo blanco al centro
+    centre_circle = plt.Circle((0, 0), 0.70, fc='white')
+    fig = plt.gcf()
+    fig.gca().add_artist(centre_circle)
+
+    # Título y presentación
+    plt.title(title, fontsize=14, weight='bold')
+    plt.axis('equal')
+    plt.tight_layout()
+    if output_file:
+        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        plt.close()
+    else:
+        plt.show()
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from distributions import corpus_distributions
+
+    file = sys.argv[1] if len(sys.argv) > 1 else 'Scopus_VR_ED_full_filters.csv'
+    plot_document_types(corpus_distributions(file)['Document Type'], output_file='document_types.png')
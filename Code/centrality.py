@@ -0,0 +1,277 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from fields import read_scopus_csv
+from ragged import field_ragged
+
+NETWORKS = ('coauthorship', 'cocitation', 'coupling', 'coword', 'citation')
+# Dense (nodes x pivots) cells held at once by the pivot BFS
+BATCH_CELLS = 2 ** 23
+
+
+def _gram(incidence):
+    """Co-occurrence counts of the columns of an incidence matrix, without the diagonal"""
+    adjacency = (incidence.T @ incidence).tocsr()
+    adjacency.setdiag(0)
+    adjacency.eliminate_zeros()
+    return adjacency
+
+
+def coauthorship_network(df, field='AU'):
+    """Undirected co-authorship adjacency (weight = co-authored papers) and author labels"""
+    authors = field_ragged(df, field)
+    return _gram(authors.incidence()), pd.Index(authors.table)
+
+
+def cocitation_network(df, min_citations=2):
+    """Undirected co-citation adjacency of the references cited at least ``min_citations`` times
+    (weight = papers citing both) and the reference labels"""
+    references = field_ragged(df, 'CR')
+    kept = references.counts() >= min_citations
+    return _gram(references.incidence()[:, kept]), pd.Index(references.table[kept])
+
+
+def _record_labels(df):
+    year = pd.to_numeric(df['Year'], errors='coerce').astype('Int64').astype(str)
+    first_author = df['Authors'].fillna('').astype(str).str.split(r'[;,]', regex=True).str[0].str.strip()
+    return pd.Index(first_author + ' (' + year + ') ' + df['Title'].fillna('').astype(str))
+
+
+def coupling_network(df, min_shared=1):
+    """Undirected bibliographic coupling adjacency of the records (weight = shared references,
+    pairs sharing fewer than ``min_shared`` dropped) and record labels"""
+    references = field_ragged(df, 'CR')
+    adjacency = _gram(references.incidence().T.tocsr())
+    if min_shared > 1:
+        adjacency.data[adjacency.data < min_shared] = 0
+        adjacency.eliminate_zeros()
+    return adjacency, _record_labels(df)
+
+
+def coword_network(df, field='DE', min_occurrences=2, thesaurus=None):
+    """Undirected co-word adjacency of the keywords used at least ``min_occurrences`` times
+    (weight = papers using both) and the keyword labels; a KeywordThesaurus merges variants first"""
+    if thesaurus is not None:
+        # Acronyms are only recognised in their original spelling; labels are lower-cased after folding
+        keywords = thesaurus.apply(field_ragged(df, field, lower=False), lower=True)
+    else:
+        keywords = field_ragged(df, field)
+    kept = keywords.counts() >= min_occurrences
+    return _gram(keywords.incidence()[:, kept]), pd.Index(keywords.table[kept])
+
+
+def citation_network(df):
+    """Directed local citation adjacency (citing -> cited) and record labels"""
+    from local_citations import citation_matrix
+
+    return citation_matrix(df), _record_labels(df)
+
+
+def build_network(df, network='coauthorship'):
+    """Adjacency and labels of one of NETWORKS built with the default thresholds"""
+    builders = {'coauthorship': coauthorship_network, 'cocitation': cocitation_network,
+                'coupling': coupling_network, 'coword': coword_network, 'citation': citation_network}
+    if network not in builders:
+        raise ValueError(f"network must be one of {', '.join(NETWORKS)}")
+    return builders[network](df)
+
+
+def degree_strength(adjacency):
+    """Degree (neighbours) and strength (sum of edge weights) of every node
+
+    For a directed adjacency (row -> column) these are the out-degree and
+    out-strength; pass ``adjacency.T`` for the in-values.
+    """
+    adjacency = sparse.csr_matrix(adjacency)
+    return np.diff(adjacency.indptr), np.asarray(adjacency.sum(axis=1)).ravel()
+
+
+def pagerank(adjacency, damping=0.85, tol=1e-10, max_iter=200, weighted=True):
+    """PageRank by sparse power iteration (row -> column links, weights as transition shares)
+
+    Dangling nodes (no out-links) spread their rank uniformly, as networkx.
+    Every iteration is one sparse matrix-vector product.
+    """
+    adjacency = sparse.csr_matrix(adjacency, dtype=np.float64)
+    if not weighted:
+        adjacency.data[:] = 1
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.empty(0)
+    out = np.asarray(adjacency.sum(axis=1)).ravel()
+    dangling = out == 0
+    transition = (sparse.diags(np.divide(1, out, out=np.zeros(n), where=~dangling)) @ adjacency).T.tocsr()
+    rank = np.full(n, 1 / n)
+    for _ in range(max_iter):
+        new = damping * (transition @ rank + rank[dangling].sum() / n) + (1 - damping) / n
+        converged = np.abs(new - rank).sum() < n * tol
+        rank = new
+        if converged:
+            break
+    return rank / rank.sum()
+
+
+def eigenvector_centrality(adjacency, tol=1e-8, max_iter=1000, weighted=True):
+    """Eigenvector centrality by power iteration on A + I (as networkx), L2-normalised
+
+    For a directed adjacency the score flows along links, so cited records
+    score high (networkx in-edge convention).
+    """
+    adjacency = sparse.csr_matrix(adjacency, dtype=np.float64)
+    if not weighted:
+        adjacency.data[:] = 1
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.empty(0)
+    flow = adjacency.T.tocsr()
+    x = np.full(n, 1 / n)
+    for _ in range(max_iter):
+        new = x + flow @ x
+        norm = np.linalg.norm(new)
+        new = new / norm if norm > 0 else new
+        converged = np.abs(new - x).sum() < n * tol
+        x = new
+        if converged:
+            break
+    return x
+
+
+def pivot_count(n, epsilon=0.1):
+    """Pivots for an additive error of about ``epsilon`` (x diameter for closeness), log(n) / epsilon^2"""
+    return int(min(n, np.ceil(np.log(max(n, 2)) / epsilon ** 2)))
+
+
+def _pivot_bfs(adjacency, pivots):
+    """Batched level-synchronous BFS from the pivots: hop distances (-1 unreachable) and
+    shortest-path counts, one sparse x dense product per level for the whole batch"""
+    n, b = adjacency.shape[0], len(pivots)
+    forward = adjacency.T.tocsr()
+    dist = np.full((n, b), -1, dtype=np.int32)
+    sigma = np.zeros((n, b))
+    dist[pivots, np.arange(b)] = 0
+    sigma[pivots, np.arange(b)] = 1
+    frontier = np.zeros((n, b), dtype=bool)
+    frontier[pivots, np.arange(b)] = True
+    level = 0
+    while frontier.any():
+        paths = forward @ np.where(frontier, sigma, 0)
+        frontier = (paths > 0) & (dist < 0)
+        level += 1
+        dist[frontier] = level
+        sigma[frontier] = paths[frontier]
+    return dist, sigma, level
+
+
+def approximate_betweenness(adjacency, n_pivots=None, epsilon=0.1, seed=0, directed=False, normalized=True):
+    """Betweenness centrality estimated from shortest paths (in hops) out of sampled pivots
+
+    Brandes' dependency accumulation is run from ``n_pivots`` random sources
+    (default: pivot_count(n, epsilon)) and scaled by n / n_pivots, as
+    networkx betweenness_centrality(k=...); with n_pivots >= n it is exact.
+    Pivots are processed in batches: each BFS level and each dependency
+    level is one sparse x dense product over all the batch's sources.
+    Edge weights are ignored (unweighted shortest paths).
+    """
+    adjacency = sparse.csr_matrix(adjacency)
+    adjacency.data[:] = 1
+    n = adjacency.shape[0]
+    k = min(n, n_pivots if n_pivots is not None else pivot_count(n, epsilon))
+    pivots = np.arange(n) if k >= n else np.random.default_rng(seed).choice(n, size=k, replace=False)
+    adjacency = adjacency.astype(np.float64)
+
+    scores = np.zeros(n)
+    batch = max(1, BATCH_CELLS // max(n, 1))
+    for start in range(0, len(pivots), batch):
+        block = pivots[start:start + batch]
+        dist, sigma, depth = _pivot_bfs(adjacency, block)
+        delta = np.zeros_like(sigma)
+        for level in range(depth, 0, -1):
+            coefficient = np.where(dist == level, (1 + delta) / np.where(sigma > 0, sigma, 1), 0)
+            delta += np.where(dist == level - 1, sigma * (adjacency @ coefficient), 0)
+        delta[block, np.arange(len(block))] = 0
+        scores += delta.sum(axis=1)
+
+    if normalized:
+        scale = 1 / ((n - 1) * (n - 2)) if n > 2 else None
+    else:
+        scale = None if directed else 0.5
+    if scale is not None:
+        scores *= scale
+    if k < n:
+        scores *= n / k
+    return scores
+
+
+def approximate_closeness(adjacency, n_pivots=None, epsilon=0.1, seed=0):
+    """Closeness centrality estimated from hop distances to sampled pivots (Eppstein-Wang)
+
+    The mean distance of a node to the pivots that reach it estimates its
+    mean distance to all nodes; scaled by the share of pivots reached, as
+    networkx closeness_centrality with wf_improved (for disconnected graphs).
+    For a directed adjacency the distances are those from the pivots to the
+    node (incoming), as networkx. Exact when n_pivots >= n.
+    """
+    adjacency = sparse.csr_matrix(adjacency)
+    adjacency.data[:] = 1
+    n = adjacency.shape[0]
+    k = min(n, n_pivots if n_pivots is not None else pivot_count(n, epsilon))
+    pivots = np.arange(n) if k >= n else np.random.default_rng(seed).choice(n, size=k, replace=False)
+    adjacency = adjacency.astype(np.float64)
+
+    total = np.zeros(n)
+    reached = np.zeros(n)
+    batch = max(1, BATCH_CELLS // max(n, 1))
+    for start in range(0, len(pivots), batch):
+        block = pivots[start:start + batch]
+        dist, _, _ = _pivot_bfs(adjacency, block)
+        dist[block, np.arange(len(block))] = -1  # a node is not its own pivot
+        reachable = dist > 0
+        total += np.where(reachable, dist, 0).sum(axis=1)
+        reached += reachable.sum(axis=1)
+
+    is_pivot = np.zeros(n, dtype=bool)
+    is_pivot[pivots] = True
+    others = len(pivots) - is_pivot  # pivots other than the node itself
+    with np.errstate(divide='ignore', invalid='ignore'):
+        closeness = np.where(total > 0, reached / total, 0) * np.where(others > 0, reached / others, 0)
+    return closeness
+
+
+def centrality_table(adjacency, labels, directed=False, n_pivots=None, epsilon=0.1, seed=0, damping=0.85):
+    """All centralities of a network, one row per node, sorted by PageRank"""
+    adjacency = sparse.csr_matrix(adjacency)
+    degree, strength = degree_strength(adjacency)
+    table = pd.DataFrame({'Node': labels})
+    if directed:
+        in_degree, in_strength = degree_strength(adjacency.T)
+        table['In_degree'], table['Out_degree'] = in_degree, degree
+        table['In_strength'], table['Out_strength'] = in_strength, strength
+    else:
+        table['Degree'], table['Strength'] = degree, strength
+    # Citation flow: PageRank and eigenvector scores accumulate on cited records
+    table['PageRank'] = pagerank(adjacency, damping=damping)
+    table['Eigenvector'] = eigenvector_centrality(adjacency)
+    table['Betweenness'] = approximate_betweenness(adjacency, n_pivots, epsilon, seed, directed=directed)
+    table['Closeness'] = approximate_closeness(adjacency, n_pivots, epsilon, seed)
+    return table.sort_values('PageRank', ascending=False).reset_index(drop=True)
+
+
+def network_centrality(df, network='coauthorship', **kwargs):
+    """Centrality table of one of NETWORKS (co-authorship, co-citation, coupling, co-word or
+    local citation network) of a corpus"""
+    adjacency, labels = build_network(df, network)
+    return centrality_table(adjacency, labels, directed=network == 'citation', **kwargs)
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    output_folder = 'centrality'
+    os.makedirs(output_folder, exist_ok=True)
+    df = read_scopus_csv(file)
+    for network in NETWORKS:
+        table = network_centrality(df, network)
+        table.to_csv(os.path.join(output_folder, f'{network}_centrality.csv'), index=False)
+        print(f"\n=== {network} ===")
+        print(table.head(10).to_string(index=False))
@@ -71,11 +71,16 @@ for _, row in df.iterrows():
     for i, author in enumerate(authors):
         if author not in autor_afiliaciones:
             if i < len(affiliations):
-                base_affil = affiliations[i].split(',')[0].strip()
-                autor_afiliaciones[author] = base_affil
+                autor_afiliaciones[author] = affiliations[i]
 else:
     autor_afiliaciones[author] = "Affiliation not found"
 
+# Institución canónica de cada afiliación (resueltas en bloque, sin departamentos)
+from fields import canonical_institutions
+instituciones = canonical_institutions(list(autor_afiliaciones.values()), author_name=False)
+autor_afiliaciones = {a: (v if v == "Affiliation not found" else inst)
+                      for (a, v), inst in zip(autor_afiliaciones.items(), instituciones)}
+
 # --- GRÁFICO 1: Publicaciones ---
 authors_pub, counts_pub = zip(*top_authors_by_publications)
 labels_pub = [f"{a}\n({autor_afiliaciones.get(a, 'No affiliation')})" for a in authors_pub]
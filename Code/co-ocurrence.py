@@ -1,12 +1,14 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import Counter
-import itertools
 
-def read_keywords_from_csv(file_path):
-    """Read a CSV file and extract keywords from the Author Keywords column"""
+from ragged import RaggedField
+
+def read_keywords_from_csv(file_path, lower=True):
+    """Read a CSV file and extract keywords from the Author Keywords column
+
+    Keywords are lower-cased unless ``lower`` is false (a keyword thesaurus
+    needs the original spelling to recognise acronyms).
+    """
     try:
         # First try with comma as delimiter
         df = pd.read_csv(file_path, dtype=str)
@@ -60,59 +62,39 @@ def read_keywords_from_csv(file_path):
     
     print(f"\nUsing column: {keyword_column}")
     
-    # Extract keywords from each paper
-    all_paper_keywords = []
-    
-    # Count papers with and without keywords
-    papers_with_keywords = 0
-    papers_without_keywords = 0
-    
-    for _, row in df.iterrows():
-        if pd.notna(row[keyword_column]) and str(row[keyword_column]).strip():
-            # Split by semicolons (as you mentioned)
-            keywords = [k.strip().lower() for k in str(row[keyword_column]).split(';')]
-            keywords = [k for k in keywords if k]  # Remove empty strings
-            
-            if keywords:
-                all_paper_keywords.append(keywords)
-                papers_with_keywords += 1
-            else:
-                papers_without_keywords += 1
-        else:
-            papers_without_keywords += 1
+    # Split by semicolons once for the whole column: keywords become integer IDs per paper
+    keywords = RaggedField.from_values(df[keyword_column], sep=';', lower=lower)
+    has_keywords = keywords.lengths > 0
+    papers_with_keywords = int(has_keywords.sum())
+    papers_without_keywords = len(keywords) - papers_with_keywords
     
     print(f"Papers with keywords: {papers_with_keywords}")
     print(f"Papers without keywords: {papers_without_keywords}")
     
-    return all_paper_keywords
+    # Only the papers with keywords, as one list per paper would be
+    return keywords.take(has_keywords)
 
 def create_cooccurrence_matrix(keywords_lists, top_n=10):
-    """Create a co-occurrence matrix from lists of keywords"""
-    # Flatten the list and count occurrences
-    all_keywords = list(itertools.chain(*keywords_lists))
-    keyword_counts = Counter(all_keywords)
+    """Create a co-occurrence matrix from the keywords of every paper (a RaggedField or lists of keywords)"""
+    if not isinstance(keywords_lists, RaggedField):
+        keywords_lists = RaggedField.from_lists(keywords_lists)
+    # Occurrences per keyword ID; ties keep the order of first appearance (as Counter.most_common)
+    keyword_counts = keywords_lists.counts()
+    ranking = np.argsort(-keyword_counts, kind='stable')
     
     # Print the most common keywords
     print("\nMost common keywords:")
-    for keyword, count in keyword_counts.most_common(15):
+    for keyword, count in zip(keywords_lists.table[ranking[:15]], keyword_counts[ranking[:15]]):
         print(f"{keyword}: {count}")
     
     # Get the top N keywords
-    top_keywords = [k for k, _ in keyword_counts.most_common(top_n)]
-    
-    # Initialize co-occurrence matrix
-    cooccurrence_matrix = np.zeros((len(top_keywords), len(top_keywords)))
-    
-    # Fill the co-occurrence matrix
-    for keywords in keywords_lists:
-        # Only consider the top keywords
-        present_top_keywords = [k for k in keywords if k in top_keywords]
-        # For each pair of keywords in this document
-        for i, keyword1 in enumerate(present_top_keywords):
-            idx1 = top_keywords.index(keyword1)
-            for keyword2 in present_top_keywords:
-                idx2 = top_keywords.index(keyword2)
-                cooccurrence_matrix[idx1, idx2] += 1
+    top = ranking[:top_n]
+    top_keywords = keywords_lists.table[top].tolist()
+    
+    # Paper x keyword counts restricted to the top keywords; repeated keywords in a
+    # paper multiply, as in the pairwise loop over each document
+    incidence = keywords_lists.incidence()[:, top]
+    cooccurrence_matrix = (incidence.T @ incidence).toarray()
     
     # Create a DataFrame for better visualization
     cooccurrence_df = pd.DataFrame(cooccurrence_matrix, index=top_keywords, columns=top_keywords)
@@ -120,6 +102,9 @@ def create_cooccurrence_matrix(keywords_lists, top_n=10):
 
 def visualize_cooccurrence_matrix(cooccurrence_df):
     """Visualize the co-occurrence matrix as a heatmap"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     plt.figure(figsize=(12, 10))
     
     # Create a mask for the diagonal (self-occurrences)
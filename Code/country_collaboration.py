@@ -0,0 +1,186 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from fields import FIELD_COLUMNS, affiliation_countries, field_pairs, read_scopus_csv
+
+CORRESPONDENCE_COLUMN = 'Correspondence Address'
+
+
+def paper_countries(df):
+    """Distinct (paper, country) pairs from "Authors with affiliations", in author order
+
+    Same extraction as analyze_countries (one country per author entry with an
+    affiliation, 'Unknown' dropped), done in bulk for the whole corpus.
+    """
+    if FIELD_COLUMNS['C1'] not in df.columns:
+        raise ValueError(f"Column '{FIELD_COLUMNS['C1']}' not found")
+    return field_pairs(df, 'AU_CO')
+
+
+def corresponding_countries(df):
+    """Country of the corresponding author of every paper (NaN when unavailable)
+
+    Scopus writes the address as "Name; Affiliation, City, Country; email: ...".
+    """
+    countries = pd.Series(np.nan, index=np.arange(len(df)), dtype=object)
+    if CORRESPONDENCE_COLUMN not in df.columns:
+        return countries
+    address = df[CORRESPONDENCE_COLUMN].reset_index(drop=True)
+    address = address.str.replace(r';\s*email:.*$', '', regex=True).str.split(';', n=1).str[1].str.strip()
+    has_address = address.notna() & (address != '')
+    countries[has_address] = affiliation_countries(address[has_address]).to_numpy()
+    return countries.replace('Unknown', np.nan)
+
+
+def scp_mcp(df, attribution='corresponding'):
+    """Single- (SCP) and multiple-country publications per country
+
+    A paper is MCP when its authors come from more than one country. Each paper
+    is attributed to one country, as bibliometrix does: the corresponding
+    author's country (``attribution='corresponding'``, falling back to the first
+    author with a known country) or always the first author (``'first'``).
+    Returns Country, Articles, SCP, MCP, Freq and MCP_Ratio sorted by Articles.
+    """
+    pairs = paper_countries(df)
+    n_papers = len(df)
+    n_countries = np.bincount(pairs['paper'], minlength=n_papers)
+
+    # First country in author order = first pair of each paper
+    first = pairs.drop_duplicates('paper')
+    country = pd.Series(np.nan, index=np.arange(n_papers), dtype=object)
+    country[first['paper'].to_numpy()] = first['value'].to_numpy()
+    if attribution == 'corresponding':
+        country = corresponding_countries(df).fillna(country)
+    elif attribution != 'first':
+        raise ValueError("attribution must be 'corresponding' or 'first'")
+
+    known = country.notna().to_numpy()
+    codes, names = pd.factorize(country[known])
+    is_mcp = (n_countries[known] > 1).astype(np.int64)
+    articles = np.bincount(codes, minlength=len(names))
+    mcp = np.bincount(codes, weights=is_mcp, minlength=len(names)).astype(np.int64)
+
+    table = pd.DataFrame({
+        'Country': np.asarray(names),
+        'Articles': articles,
+        'SCP': articles - mcp,
+        'MCP': mcp,
+    })
+    table['Freq'] = table['Articles'] / max(int(known.sum()), 1)
+    table['MCP_Ratio'] = table['MCP'] / table['Articles']
+    return table.sort_values(['Articles', 'Country'], ascending=[False, True]).reset_index(drop=True)
+
+
+def country_incidence(df):
+    """Sparse paper x country incidence matrix (CSR, 1 where a paper has an author from the country)
+
+    Returns the matrix and the country labels of its columns.
+    """
+    from ragged import RaggedField
+
+    countries = RaggedField.from_pairs(paper_countries(df), len(df))
+    return countries.incidence(dtype=np.int64), countries.table
+
+
+def collaboration_matrix(incidence, counting='full'):
+    """Country x country collaboration as one sparse product
+
+    ``counting='full'``: every co-authored paper adds 1 to each pair of its
+    countries; the diagonal holds the papers of each country.
+    ``counting='fractional'``: a link between two of the n countries of a paper
+    weighs 1 / (n - 1) (Perianes-Rodriguez et al., 2016), so the links each
+    country gets from one paper add up to 1; the diagonal is zero.
+    """
+    incidence = sparse.csr_matrix(incidence)
+    if counting == 'full':
+        return (incidence.T @ incidence).tocsr()
+    if counting != 'fractional':
+        raise ValueError("counting must be 'full' or 'fractional'")
+    n = np.asarray(incidence.sum(axis=1), dtype=np.float64).ravel()
+    weights = np.divide(1.0, n - 1, out=np.zeros_like(n), where=n > 1)
+    matrix = (incidence.T @ sparse.diags(weights) @ incidence).tocsr()
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def collaboration_edges(matrix, countries):
+    """Edge list (Country1, Country2, Weight) from the upper triangle of a collaboration matrix"""
+    upper = sparse.triu(matrix, k=1).tocoo()
+    countries = np.asarray(countries)
+    edges = pd.DataFrame({'Country1': countries[upper.row], 'Country2': countries[upper.col], 'Weight': upper.data})
+    return edges[edges['Weight'] > 0].sort_values('Weight', ascending=False).reset_index(drop=True)
+
+
+def collaboration_network(df, counting='full'):
+    """Incidence matrix, collaboration matrix (as a labelled DataFrame) and edge list of a corpus"""
+    incidence, countries = country_incidence(df)
+    matrix = collaboration_matrix(incidence, counting)
+    matrix_df = pd.DataFrame(matrix.toarray(), index=countries, columns=countries)
+    return incidence, matrix_df, collaboration_edges(matrix, countries)
+
+
+def plot_collaboration_network(edges, production=None, top_n=50, output_file='country_collaboration_network.png'):
+    """Country collaboration network of the ``top_n`` strongest links
+
+    ``production`` (optional) maps country -> papers and sets the node sizes.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    top = edges.nlargest(top_n, 'Weight')
+    G = nx.Graph()
+    G.add_weighted_edges_from(top[['Country1', 'Country2', 'Weight']].itertuples(index=False))
+    if G.number_of_nodes() == 0:
+        print("No collaboration links to plot")
+        return None
+
+    sizes = [300 + 2000 * production.get(n, 0) / max(production.values()) if production else 600 for n in G.nodes()]
+    widths = np.asarray([d['weight'] for _, _, d in G.edges(data=True)], dtype=float)
+    widths = 0.5 + 6 * widths / widths.max()
+
+    plt.figure(figsize=(14, 12))
+    pos = nx.spring_layout(G, k=0.8, seed=42, weight='weight')
+    nx.draw_networkx_edges(G, pos, width=widths, alpha=0.4, edge_color='#7f8c8d')
+    nx.draw_networkx_nodes(G, pos, node_size=sizes, node_color='#3498DB', alpha=0.85)
+    nx.draw_networkx_labels(G, pos, font_size=10, font_weight='bold')
+    plt.title('Country Collaboration Network', fontsize=16)
+    plt.axis('off')
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close()
+    print(f"Collaboration network saved to: {output_file}")
+    return output_file
+
+
+def export_collaboration(df, output_folder='country_collaboration', counting='full', top_n=50, plot=True,
+                         network=None):
+    """Write the collaboration matrix, the edge list and the network plot
+
+    ``network`` is an already computed ``collaboration_network(df, counting)``
+    (e.g. read back from the result cache); ``df`` is then not used.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    incidence, matrix_df, edges = network if network is not None else collaboration_network(df, counting)
+    matrix_df.to_csv(os.path.join(output_folder, f'country_collaboration_matrix_{counting}.csv'))
+    edges.to_csv(os.path.join(output_folder, f'country_collaboration_edges_{counting}.csv'), index=False)
+    if plot:
+        papers = np.asarray(incidence.sum(axis=0)).ravel()
+        production = dict(zip(matrix_df.index, papers))
+        plot_collaboration_network(edges, production, top_n=top_n,
+                                   output_file=os.path.join(output_folder, f'country_collaboration_network_{counting}.png'))
+    return matrix_df, edges
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    df = read_scopus_csv(file)
+    table = scp_mcp(df)
+    table.to_csv('scp_mcp_by_country.csv', index=False)
+    print(table.head(20).to_string(index=False))
+    for counting in ('full', 'fractional'):
+        export_collaboration(df, counting=counting)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from fields import csv_encoding, iter_scopus_csv
+
+DOCUMENT_TYPE_COLUMNS = ['Document Type', 'DT']
+# Subject classification columns: Scopus subject areas / ASJC codes, WoS research areas
+SUBJECT_COLUMNS = ['Subject Area', 'Subject Areas', 'ASJC', 'ASJC codes', 'Research Areas', 'WoS Categories', 'SC']
+SEPARATOR = ';'
+
+# Scopus ASJC subject areas by the first two digits of the code
+ASJC_AREAS = {
+    10: 'Multidisciplinary', 11: 'Agricultural and Biological Sciences', 12: 'Arts and Humanities',
+    13: 'Biochemistry, Genetics and Molecular Biology', 14: 'Business, Management and Accounting',
+    15: 'Chemical Engineering', 16: 'Chemistry', 17: 'Computer Science', 18: 'Decision Sciences',
+    19: 'Earth and Planetary Sciences', 20: 'Economics, Econometrics and Finance', 21: 'Energy',
+    22: 'Engineering', 23: 'Environmental Science', 24: 'Immunology and Microbiology',
+    25: 'Materials Science', 26: 'Mathematics', 27: 'Medicine', 28: 'Neuroscience', 29: 'Nursing',
+    30: 'Pharmacology, Toxicology and Pharmaceutics', 31: 'Physics and Astronomy', 32: 'Psychology',
+    33: 'Social Sciences', 34: 'Veterinary', 35: 'Dentistry', 36: 'Health Professions',
+}
+
+
+def _asjc_to_area(values):
+    """Replace numeric ASJC codes (e.g. 1702) by their subject area, leave names untouched"""
+    codes = pd.to_numeric(values, errors='coerce')
+    areas = (codes // 100).map(ASJC_AREAS)
+    return areas.where(codes.notna(), values)
+
+
+def count_categories(values, sep=None):
+    """Counts of the categories of one column chunk (multi-valued when ``sep`` is given)"""
+    values = pd.Series(values).dropna().astype(str)
+    if sep:
+        values = values.str.split(sep, regex=False).explode()
+    values = values.str.strip()
+    values = _asjc_to_area(values[values != ''])
+    return values.value_counts()
+
+
+def stream_distributions(path, chunksize=100000):
+    """Document type and subject area counts of a CSV export in one chunked pass
+
+    Only the two columns are read, ``chunksize`` rows at a time, and each chunk
+    is folded into running counts, so memory does not grow with the corpus.
+    Returns {'Document Type': counts, 'Subject Area': counts} (a column missing
+    from the export gives None).
+    """
+    header, _ = csv_encoding(path)
+    columns = {
+        'Document Type': next((c for c in DOCUMENT_TYPE_COLUMNS if c in header), None),
+        'Subject Area': next((c for c in SUBJECT_COLUMNS if c in header), None),
+    }
+    totals = {name: pd.Series(dtype=np.int64) for name, column in columns.items() if column}
+    for chunk in iter_scopus_csv(path, [c for c in columns.values() if c], chunksize=chunksize):
+        for name, column in columns.items():
+            if column:
+                # Document types are single-valued, subject areas multi-valued
+                counts = count_categories(chunk[column], sep=SEPARATOR if name == 'Subject Area' else None)
+                totals[name] = totals[name].add(counts, fill_value=0)
+    return {name: totals[name].astype(np.int64) if name in totals else None for name in columns}
+
+
+def collapse_categories(counts, threshold=0.02, max_categories=None, other_label='Others'):
+    """Distribution table (Category, Count, Percent) with small categories merged into 'Others'
+
+    Categories below ``threshold`` (share of the total) or beyond the
+    ``max_categories`` largest are collapsed; 'Others' is always last.
+    """
+    counts = pd.Series(counts, dtype=np.float64).sort_values(ascending=False)
+    total = counts.sum()
+    share = counts / total if total else counts
+    small = (share < threshold).to_numpy().copy()
+    if max_categories is not None:
+        small[max_categories:] = True
+    table = pd.DataFrame({'Category': counts.index[~small], 'Count': counts.to_numpy()[~small]})
+    if small.any():
+        table.loc[len(table)] = [other_label, counts.to_numpy()[small].sum()]
+    table['Count'] = table['Count'].astype(np.int64)
+    table['Percent'] = 100 * table['Count'] / total if total else 0.0
+    return table
+
+
+def corpus_distributions(path, threshold=0.02, max_categories=None, chunksize=100000):
+    """Collapsed document type and subject area tables of a CSV export (None when a column is missing)"""
+    counts = stream_distributions(path, chunksize=chunksize)
+    return {name: None if c is None else collapse_categories(c, threshold, max_categories)
+            for name, c in counts.items()}
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    for name, table in corpus_distributions(file).items():
+        print(f"\n=== {name} ===")
+        print("Column not found in the export" if table is None else table.to_string(index=False))
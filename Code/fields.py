@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+# bibliometrix field tags -> Scopus CSV columns
+FIELD_COLUMNS = {
+    'AU': 'Authors',
+    'AF': 'Author full names',
+    'DE': 'Author Keywords',
+    'ID': 'Index Keywords',
+    'SO': 'Source title',
+    'CR': 'References',
+    'DT': 'Document Type',
+    'PY': 'Year',
+    'TI': 'Title',
+    'C1': 'Authors with affiliations',
+}
+# Fields derived from "Authors with affiliations"
+DERIVED_FIELDS = ('AU_CO', 'AU_UN')
+# Multi-valued columns and their separator
+FIELD_SEPARATORS = {'Author Keywords': ';', 'Index Keywords': ';', 'References': ';',
+                    'Author full names': ';', 'Author(s) ID': ';', 'Affiliations': ';'}
+
+# Same split as analyze_countries: a new author starts after ';' followed by a capital letter
+AUTHOR_AFFILIATION_SPLIT = r';\s*(?=[A-ZÀ-ÿ])'
+# Affiliation parts that name an institution, most specific first
+INSTITUTION_PATTERNS = [
+    r'(?i)univ|polytechn|college',
+    r'(?i)institut|hospital|cent(?:re|er)|academy|council|laborator|school',
+]
+# Affiliation parts naming a unit inside an institution, skipped when choosing the institution
+DEPARTMENT_PATTERN = (r'(?i)^(?:dep(?:t\b|artment|artamento|artement|artament)|dipartimento|'
+                      r'fac(?:ulty|ultad|uldade|ult[eé]|olt[aà])|school of|escuela de|[eé]cole de|division|unit\b|'
+                      r'section|group\b|chair\b|research group|lab(?:oratory)? (?:of|for)|graduate school|college of)')
+
+
+def read_scopus_csv(path, **kwargs):
+    """Read a Scopus export trying the usual encodings"""
+    kwargs.setdefault('low_memory', False)
+    for enc in ['utf-8', 'ISO-8859-1', 'latin1', 'windows-1252']:
+        try:
+            return pd.read_csv(path, encoding=enc, **kwargs)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("Failed to read the file with tested encodings")
+
+
+def csv_encoding(path):
+    """First of the usual encodings that can read the header; returns (columns, encoding)"""
+    for enc in ['utf-8', 'ISO-8859-1', 'latin1', 'windows-1252']:
+        try:
+            return list(pd.read_csv(path, encoding=enc, nrows=0).columns), enc
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("Failed to read the file with tested encodings")
+
+
+def iter_scopus_csv(path, columns, chunksize=100000):
+    """Stream the available ``columns`` of a CSV export in chunks of ``chunksize`` rows"""
+    header, encoding = csv_encoding(path)
+    usecols = [c for c in columns if c in header]
+    if not usecols:
+        return
+    yield from pd.read_csv(path, usecols=usecols, chunksize=chunksize, encoding=encoding, dtype=str)
+
+
+def split_field(values, sep=';', regex=False, lower=False):
+    """Explode a multi-valued column into (paper, value) rows
+
+    ``paper`` is the positional row number of ``values``; empty items are dropped.
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    exploded = values.str.split(sep, regex=regex).explode()
+    items = exploded.str.strip()
+    if lower:
+        items = items.str.lower()
+    keep = items.notna() & (items != '')
+    return pd.DataFrame({'paper': exploded.index.to_numpy()[keep.to_numpy()],
+                         'value': items[keep].to_numpy()})
+
+
+def authors_separator(values):
+    """Newer Scopus exports separate authors with ';', older ones with ','"""
+    return ';' if pd.Series(values).astype(str).str.contains(';', regex=False).any() else ','
+
+
+def author_affiliation_entries(values):
+    """One row per author entry of "Authors with affiliations" (only entries with an affiliation)"""
+    entries = split_field(values, sep=AUTHOR_AFFILIATION_SPLIT, regex=True)
+    return entries[entries['value'].str.contains(',', regex=False)].reset_index(drop=True)
+
+
+def affiliation_countries(texts):
+    """Vectorised get_country: pattern extraction in bulk, pycountry lookup once per distinct candidate"""
+    from bibliometri import COUNTRY_PATTERNS, resolve_country
+
+    texts = pd.Series(texts).reset_index(drop=True)
+    candidates = pd.Series(np.nan, index=texts.index, dtype=object)
+    for pattern in COUNTRY_PATTERNS:
+        missing = candidates.isna()
+        if not missing.any():
+            break
+        candidates[missing] = texts[missing].str.extract(pattern, expand=False).str.strip()
+    codes, uniques = pd.factorize(candidates)
+    resolved = np.array([resolve_country(c) for c in uniques] + ['Unknown'], dtype=object)
+    return pd.Series(resolved[codes], index=texts.index)
+
+
+def affiliation_institutions(texts, author_name=True):
+    """Institution of each affiliation: first comma part that looks like a university,
+    then like any institution, then the first part after the author name (as in
+    analyze_scopus_authors). Department-like parts (DEPARTMENT_PATTERN) are never
+    taken as the university or institution. ``author_name=False`` for affiliations that
+    do not start with the author (the "Affiliations" column).
+    """
+    texts = pd.Series(texts).reset_index(drop=True)
+    parts = split_field(texts, sep=',')
+    if author_name:
+        parts = parts[parts.groupby('paper').cumcount() > 0]  # drop the author name
+    parts['value'] = parts['value'].str.replace(r'\[.*?\]', '', regex=True).str.split('(').str[0].str.strip()
+    departments = parts['value'].str.contains(DEPARTMENT_PATTERN, regex=True)
+    candidates = parts[~departments]
+    institution = pd.Series(np.nan, index=texts.index, dtype=object)
+    for pattern in INSTITUTION_PATTERNS:
+        matches = candidates[candidates['value'].str.contains(pattern, regex=True)].drop_duplicates('paper')
+        institution = institution.fillna(matches.set_index('paper')['value'].reindex(texts.index))
+    first_part = parts.drop_duplicates('paper').set_index('paper')['value']
+    return institution.fillna(first_part.reindex(texts.index)).fillna('Unknown')
+
+
+def canonical_institutions(texts, author_name=True):
+    """affiliation_institutions mapped to canonical names by the shared institution resolver"""
+    from institutions import RESOLVER
+    return RESOLVER.canonical(affiliation_institutions(texts, author_name=author_name))
+
+
+def field_pairs(df, field, lower=None):
+    """Distinct (paper, value) pairs of a field given as bibliometrix tag or column name"""
+    if field in DERIVED_FIELDS:
+        entries = author_affiliation_entries(df[FIELD_COLUMNS['C1']])
+        extract = affiliation_countries if field == 'AU_CO' else canonical_institutions
+        pairs = pd.DataFrame({'paper': entries['paper'], 'value': extract(entries['value']).to_numpy()})
+        pairs = pairs[pairs['value'] != 'Unknown']
+    else:
+        column = FIELD_COLUMNS.get(field, field)
+        if column not in df.columns:
+            raise ValueError(f"Column '{column}' not found for field '{field}'")
+        values = df[column]
+        if column == 'Authors':
+            pairs = split_field(values, sep=authors_separator(values))
+        elif column in FIELD_SEPARATORS:
+            # Keywords are compared case-insensitively, as in read_keywords_from_csv
+            keywords = column in ('Author Keywords', 'Index Keywords')
+            pairs = split_field(values, sep=FIELD_SEPARATORS[column], lower=keywords if lower is None else lower)
+        else:
+            values = pd.Series(values).reset_index(drop=True)
+            pairs = pd.DataFrame({'paper': values.index.to_numpy(), 'value': values.to_numpy()}).dropna()
+            pairs['value'] = pairs['value'].astype(str)
+    return pairs.drop_duplicates().reset_index(drop=True)
@@ -0,0 +1,80 @@
+import numpy as np
+
+
+def grouped_hg_index(groups, citations, n_groups=None):
+    """h-index and g-index of every group in one pass
+
+    ``groups`` holds an integer group code (0..n_groups-1) per paper and
+    ``citations`` its citation count. Papers are sorted once by (group,
+    citations desc) so each group becomes a contiguous ragged segment, and the
+    per-group ranks, running sums and maxima are computed with segment-wise
+    numpy reductions instead of a loop over groups.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    citations = np.asarray(citations, dtype=np.float64)
+    if n_groups is None:
+        n_groups = int(groups.max()) + 1 if len(groups) else 0
+    h = np.zeros(n_groups, dtype=np.int64)
+    g = np.zeros(n_groups, dtype=np.int64)
+    if len(groups) == 0:
+        return h, g
+
+    order = np.lexsort((-citations, groups))
+    grp, cites = groups[order], citations[order]
+    starts = np.flatnonzero(np.r_[True, grp[1:] != grp[:-1]])
+    sizes = np.diff(np.r_[starts, len(grp)])
+    rank = np.arange(1, len(grp) + 1) - np.repeat(starts, sizes)
+
+    # h: number of papers with citations >= their rank (a prefix of each segment)
+    h[grp[starts]] = np.add.reduceat((cites >= rank).astype(np.int64), starts)
+
+    # g: largest rank whose top-rank papers gather at least rank^2 citations
+    cumulative = np.cumsum(cites)
+    cumulative -= np.repeat(cumulative[starts] - cites[starts], sizes)
+    g[grp[starts]] = np.maximum.reduceat(np.where(cumulative >= rank.astype(np.float64) ** 2, rank, 0), starts)
+    return h, g
+
+
+def h_index(citations):
+    """h-index of a single set of papers"""
+    h, _ = grouped_hg_index(np.zeros(len(citations), dtype=np.int64), citations, n_groups=1)
+    return int(h[0])
+
+
+def g_index(citations):
+    """g-index of a single set of papers"""
+    _, g = grouped_hg_index(np.zeros(len(citations), dtype=np.int64), citations, n_groups=1)
+    return int(g[0])
+
+
+def rowwise_hg_index(citations):
+    """h-index and g-index of every row of a (sets x papers) citation matrix
+
+    Each row is one set of papers (e.g. a bootstrap replicate of the corpus):
+    rows are sorted once with numpy and h/g follow from comparing the sorted
+    citations and their running sums with the ranks, for all rows at once.
+    """
+    citations = np.atleast_2d(np.asarray(citations, dtype=np.float64))
+    ordered = -np.sort(-citations, axis=1)
+    rank = np.arange(1, ordered.shape[1] + 1, dtype=np.float64)
+    h = (ordered >= rank).sum(axis=1)
+    g = np.where(np.cumsum(ordered, axis=1) >= rank ** 2, rank, 0).max(axis=1, initial=0).astype(np.int64)
+    return h, g
+
+
+def top_k(score, k, *ties):
+    """Positions of the ``k`` highest scores, ordered by score desc and then by ``ties``
+    (lexsort keys, the last one most significant)
+
+    The candidates are an argpartition of ``score`` extended with every entry
+    tied at the k-th score, so which entries make the cut depends only on the
+    tie-break keys, not on the partition internals.
+    """
+    score = np.asarray(score)
+    k = min(int(k), len(score))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    kth = score[np.argpartition(-score, k - 1)[k - 1]]
+    candidates = np.flatnonzero(score >= kth)
+    order = np.lexsort(tuple(np.asarray(t)[candidates] for t in ties) + (-score[candidates],))
+    return candidates[order][:k]
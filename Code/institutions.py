@@ -0,0 +1,234 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from fields import FIELD_COLUMNS, affiliation_institutions, author_affiliation_entries, read_scopus_csv
+from result_cache import register_state
+
+# Abbreviations and non-English forms -> one English token
+ABBREVIATIONS = {
+    'univ': 'university', 'uni': 'university', 'universidade': 'university', 'universidad': 'university',
+    'universita': 'university', 'universitat': 'university', 'universitaet': 'university',
+    'universite': 'university', 'universiteit': 'university', 'universitet': 'university',
+    'uniwersytet': 'university', 'universitatea': 'university', 'universiti': 'university',
+    'inst': 'institute', 'instituto': 'institute', 'institut': 'institute', 'istituto': 'institute',
+    'instytut': 'institute',
+    'polytech': 'polytechnic', 'politecnico': 'polytechnic', 'politecnica': 'polytechnic',
+    'polytechnique': 'polytechnic', 'politechnika': 'polytechnic',
+    'tech': 'technology', 'technol': 'technology', 'tecnologia': 'technology', 'technologie': 'technology',
+    'technologique': 'technology', 'technological': 'technology', 'technical': 'technology',
+    'technische': 'technology', 'tecnica': 'technology', 'tecnico': 'technology', 'technion': 'technology',
+    'natl': 'national', 'nat': 'national', 'nacional': 'national', 'nazionale': 'national',
+    'nationale': 'national',
+    'int': 'international', 'intl': 'international', 'internacional': 'international',
+    'sci': 'science', 'sciences': 'science', 'ciencias': 'science', 'ciencia': 'science', 'scienze': 'science',
+    'res': 'research', 'investigacion': 'research', 'ricerca': 'research', 'recherche': 'research',
+    'ctr': 'center', 'cntr': 'center', 'centre': 'center', 'centro': 'center', 'zentrum': 'center',
+    'hosp': 'hospital', 'hopital': 'hospital', 'ospedale': 'hospital',
+    'acad': 'academy', 'academia': 'academy', 'akademie': 'academy', 'academie': 'academy',
+    'coll': 'college', 'colegio': 'college',
+    'lab': 'laboratory', 'labs': 'laboratory', 'laboratorio': 'laboratory', 'laboratoire': 'laboratory',
+    'fac': 'faculty', 'facultad': 'faculty', 'faculdade': 'faculty', 'faculte': 'faculty', 'facolta': 'faculty',
+    'sch': 'school', 'escuela': 'school', 'ecole': 'school', 'scuola': 'school', 'escola': 'school',
+    'dept': 'department', 'dep': 'department', 'departamento': 'department', 'departement': 'department',
+    'dipartimento': 'department', 'departament': 'department',
+    'educ': 'education', 'educacion': 'education', 'educacao': 'education',
+    'eng': 'engineering', 'engn': 'engineering', 'ingenieria': 'engineering',
+    'med': 'medical', 'assoc': 'association', 'fdn': 'foundation', 'fundacion': 'foundation',
+    'st': 'saint', 'san': 'saint', 'santa': 'saint',
+}
+# Linking words dropped from the key ("University of X" = "Universidade de X" = "X University")
+STOPWORDS = frozenset(['of', 'the', 'and', 'for', 'at', 'in', 'de', 'del', 'della', 'degli', 'di', 'do', 'da',
+                       'dos', 'das', 'des', 'du', 'la', 'le', 'les', 'el', 'los', 'las', 'der', 'die', 'und',
+                       'fur', 'et', 'y', 'e'])
+UNKNOWN = 'Unknown'
+INSTITUTION_TABLE_FILE = 'institution_table.json'
+
+
+def institution_keys(names):
+    """Normalised matching key of every institution name
+
+    Bracketed and parenthesised parts are removed, accents folded, the text
+    lower-cased and split into words; abbreviations and foreign forms are
+    expanded (ABBREVIATIONS), linking words dropped (STOPWORDS) and the
+    remaining words sorted, so word order does not matter. Each distinct
+    name is processed once, as whole-column string operations.
+    """
+    names = pd.Series(names, dtype=object).reset_index(drop=True)
+    codes, uniques = pd.factorize(names)
+    text = pd.Series(uniques, dtype=object).astype(str)
+    text = text.str.replace(r'\[.*?\]|\(.*?\)', ' ', regex=True)
+    text = text.str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+    text = text.str.lower().str.replace('&', ' and ', regex=False).str.replace(r'[^a-z0-9]+', ' ', regex=True)
+
+    words = text.str.split().explode().dropna()
+    words = words.map(ABBREVIATIONS).fillna(words)
+    words = words[~words.isin(STOPWORDS)]
+    keys = words.groupby(level=0).agg(lambda w: ' '.join(sorted(set(w))))
+    keys = keys.reindex(range(len(uniques)), fill_value='').to_numpy(dtype=object)
+    return pd.Series(np.where(codes >= 0, keys[np.maximum(codes, 0)], ''), index=names.index, dtype=object)
+
+
+class InstitutionResolver:
+    """Maps institution name variants to canonical institution IDs
+
+    Variants with the same institution_keys() key get the same ID; the
+    canonical name of an ID is its most frequent variant when first seen.
+    Every resolved variant is remembered (memoization), so a batch only
+    normalises the strings not seen before, and the whole table can be
+    saved to / loaded from JSON. Editing the "variants" of that file merges
+    institutions the key does not catch (e.g. acronyms); those manual merges
+    (variant -> key of its institution) are kept apart in ``merged``.
+    """
+
+    def __init__(self, path=None):
+        self.names = []
+        self.keys = []
+        self.variants = {}
+        self.merged = {}
+        self._by_key = {}
+        if path:
+            self.load(path)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _add(self, key, name):
+        self._by_key[key] = len(self.names)
+        self.keys.append(key)
+        self.names.append(name)
+        return len(self.names) - 1
+
+    def resolve(self, institutions):
+        """Institution ID of every name (-1 for missing or 'Unknown')"""
+        values = pd.Series(institutions, dtype=object).reset_index(drop=True)
+        codes, uniques = pd.factorize(values)
+        uniques = pd.Index(uniques).astype(str)
+        ids = pd.Series(uniques, dtype=object).map(self.variants)
+
+        new = ids.isna().to_numpy() & (uniques != UNKNOWN) & (uniques.str.strip() != '')
+        if new.any():
+            variants = uniques[new]
+            keys = institution_keys(variants).to_numpy()
+            # Canonical name of a new key: its most frequent variant in this batch, on ties the
+            # one with fewest abbreviations (dots) and then the longest
+            frequency = np.bincount(codes[codes >= 0], minlength=len(uniques))[new]
+            order = np.lexsort((-variants.str.len().to_numpy(), variants.str.count(r'\.').to_numpy(), -frequency))
+            for variant, key in zip(variants[order], keys[order]):
+                if not key:
+                    continue
+                code = self._by_key.get(key)
+                if code is None:
+                    code = self._add(key, variant)
+                self.variants[variant] = code
+            ids = pd.Series(uniques, dtype=object).map(self.variants)
+
+        ids = ids.fillna(-1).to_numpy(dtype=np.int64)
+        return np.where(codes >= 0, ids[np.maximum(codes, 0)], -1)
+
+    def canonical(self, institutions):
+        """Canonical name of every institution name ('Unknown' when unresolved)"""
+        ids = self.resolve(institutions)
+        names = np.array(self.names + [UNKNOWN], dtype=object)
+        return pd.Series(names[ids], dtype=object)
+
+    def merge(self, variant, canonical):
+        """Map a variant (e.g. an acronym) to the institution of another name"""
+        target = self.resolve([canonical])[0]
+        if target < 0:
+            raise ValueError(f"Cannot resolve '{canonical}'")
+        self.variants[str(variant)] = int(target)
+        self.merged[str(variant)] = self.keys[target]
+        return int(target)
+
+    def load(self, path):
+        """Add the institutions and variants stored in a JSON file; returns how many variants were new"""
+        try:
+            with open(path, encoding='utf-8') as fh:
+                table = json.load(fh)
+        except (OSError, ValueError):
+            return 0
+        remap = {}
+        for code, (name, key) in enumerate(table.get('institutions', [])):
+            remap[code] = self._by_key[key] if key in self._by_key else self._add(key, name)
+        variants = {v: remap[int(c)] for v, c in table.get('variants', {}).items()
+                    if v not in self.variants and int(c) in remap}
+        self.variants.update(variants)
+        # Variants whose own key is not their institution's were merged by hand
+        keys = institution_keys(list(variants)).to_numpy()
+        self.merged.update((v, self.keys[c]) for (v, c), key in zip(variants.items(), keys)
+                           if key != self.keys[c])
+        return len(variants)
+
+    def save(self, path):
+        """Write the table merged with the file's current content, atomically"""
+        self.load(path)
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump({'institutions': [[n, k] for n, k in zip(self.names, self.keys)],
+                       'variants': dict(sorted(self.variants.items()))}, fh, ensure_ascii=False, indent=0)
+        os.replace(tmp, path)
+
+
+# Shared resolver (AU_UN field, rankings); fill it from disk with RESOLVER.load(path)
+RESOLVER = InstitutionResolver()
+# Only the manual merges change results; the memoized resolutions do not
+register_state('institutions.RESOLVER', lambda: dict(sorted(RESOLVER.merged.items())))
+
+
+def institution_pairs(df, resolver=None):
+    """Distinct (paper, institution ID) pairs from "Authors with affiliations" and the
+    number of author entries of every pair"""
+    resolver = resolver or RESOLVER
+    entries = author_affiliation_entries(df[FIELD_COLUMNS['C1']])
+    ids = resolver.resolve(affiliation_institutions(entries['value']))
+    pairs = pd.DataFrame({'paper': entries['paper'].to_numpy(), 'value': ids})
+    pairs = pairs[pairs['value'] >= 0]
+    pairs = pairs.groupby(['paper', 'value'], sort=False).size().rename('authors').reset_index()
+    return pairs.sort_values('paper', kind='stable').reset_index(drop=True)
+
+
+def institution_ranking(df, resolver=None):
+    """Articles, author entries, citations and h/g-index of every canonical institution
+
+    Computed like the author rankings: the papers of every institution are a
+    ragged field of integer IDs and the indices come from grouped_hg_index.
+    """
+    from indices import grouped_hg_index
+    from ragged import RaggedField
+
+    resolver = resolver or RESOLVER
+    pairs = institution_pairs(df, resolver)
+    field = RaggedField.from_pairs(pairs, len(df))
+    cites = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0).to_numpy(dtype=np.float64) \
+        if 'Cited by' in df.columns else np.zeros(len(df))
+    paper_cites = cites[field.rows]
+    h, g = grouped_hg_index(field.ids, paper_cites, field.n_values)
+    table = pd.DataFrame({
+        'Institution': np.array(resolver.names, dtype=object)[field.table.astype(np.int64)],
+        'Articles': field.counts(),
+        'Author_entries': np.bincount(field.ids, weights=pairs['authors'].to_numpy(),
+                                      minlength=field.n_values).astype(np.int64),
+        'Citations': np.bincount(field.ids, weights=paper_cites, minlength=field.n_values).astype(np.int64),
+        'h_index': h,
+        'g_index': g,
+    })
+    variants = np.bincount(np.fromiter(resolver.variants.values(), dtype=np.int64, count=len(resolver.variants)),
+                           minlength=len(resolver))
+    table['Variants'] = variants[field.table.astype(np.int64)]
+    return table.sort_values(['Articles', 'Citations'], ascending=False).reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    output_folder = 'institution_analysis'
+    os.makedirs(output_folder, exist_ok=True)
+    table_path = os.path.join(output_folder, INSTITUTION_TABLE_FILE)
+    RESOLVER.load(table_path)
+    ranking = institution_ranking(read_scopus_csv(file))
+    RESOLVER.save(table_path)
+    ranking.to_csv(os.path.join(output_folder, 'institution_ranking.csv'), index=False)
+    print(ranking.head(20).to_string(index=False))
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from fields import split_field
+
+TITLE_COLUMN = 'Title'
+YEAR_COLUMN = 'Year'
+AUTHORS_COLUMN = 'Authors'
+REFERENCES_COLUMN = 'References'
+# Shorter title segments ("Education", "Editorial") match too many references
+MIN_TITLE_LENGTH = 12
+# Citing records whose references are exploded at once (bounds the memory on large corpora)
+CHUNK_RECORDS = 20000
+
+
+def _normalize(values):
+    """Lower case, letters and digits only, single spaces"""
+    return (pd.Series(values, dtype=object).fillna('').astype(str).str.lower()
+            .str.replace(r'[^0-9a-z]+', ' ', regex=True).str.strip())
+
+
+def _surname(values):
+    """First word of the first author ('Smith J.' -> 'smith')"""
+    first = pd.Series(values, dtype=object).fillna('').astype(str).str.split(r'[;,]', regex=True).str[0]
+    return _normalize(first).str.split(' ').str[0]
+
+
+def local_citation_edges(df):
+    """(citing, cited) row positions of the citations between records of the corpus
+
+    A reference points to a record when one of its comma-separated segments
+    is the record's title and the reference has the record's year and first
+    author surname (as bibliometrix histNetwork matches the local citations
+    of Scopus exports). Segments of the references are exploded
+    CHUNK_RECORDS citing records at a time and hash-joined with the (title,
+    year, surname) keys of the corpus, so no reference is compared with
+    every record. Titles that contain commas are
+    not matched.
+    """
+    keys = pd.DataFrame({'title': _normalize(df[TITLE_COLUMN]).to_numpy(),
+                         'year': pd.to_numeric(df[YEAR_COLUMN], errors='coerce').to_numpy(),
+                         'surname': _surname(df[AUTHORS_COLUMN]).to_numpy(),
+                         'cited': np.arange(len(df))})
+    keys = keys[(keys['title'].str.len() >= MIN_TITLE_LENGTH) & keys['year'].notna()]
+
+    years, surnames, titles = set(keys['year']), set(keys['surname']), set(keys['title'])
+    edges = [_chunk_edges(df[REFERENCES_COLUMN].iloc[start:start + CHUNK_RECORDS], start,
+                          keys, years, surnames, titles)
+             for start in range(0, len(df), CHUNK_RECORDS)]
+    edges = pd.concat(edges, ignore_index=True) if edges else pd.DataFrame(columns=['citing', 'cited'])
+    edges = edges[edges['citing'] != edges['cited']].drop_duplicates()
+    return edges.sort_values(['citing', 'cited']).reset_index(drop=True)
+
+
+def _chunk_edges(references, offset, keys, years, surnames, titles):
+    """Local citations made by one slice of records (``offset`` = position of its first record)"""
+    refs = split_field(references.reset_index(drop=True), sep=';')
+    refs = pd.DataFrame({'citing': refs['paper'].to_numpy() + offset,
+                         'year': pd.to_numeric(refs['value'].str.extract(r'\((\d{4})\)', expand=False)).to_numpy(),
+                         'surname': _surname(refs['value']).to_numpy(),
+                         'text': refs['value'].to_numpy()})
+    refs = refs[refs['year'].isin(years) & refs['surname'].isin(surnames)]
+    segments = refs.assign(title=refs['text'].str.split(',')).explode('title')
+    segments['title'] = _normalize(segments['title']).to_numpy()
+    segments = segments[segments['title'].isin(titles)]
+    return segments.merge(keys, on=['title', 'year', 'surname'])[['citing', 'cited']]
+
+
+def citation_matrix(df, edges=None):
+    """Sparse (citing x cited) adjacency of the local citations, one row and column per record"""
+    if edges is None:
+        edges = local_citation_edges(df)
+    n = len(df)
+    return sparse.csr_matrix((np.ones(len(edges), dtype=np.float64),
+                              (edges['citing'].to_numpy(), edges['cited'].to_numpy())), shape=(n, n))
@@ -0,0 +1,278 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from fields import read_scopus_csv
+
+METHODS = ('SPC', 'SPLC', 'SPNP')
+
+
+def flow_dag(citations, year=None):
+    """Knowledge-flow DAG (cited -> citing) of a (citing x cited) local citation matrix
+
+    Citations to later papers and the links of citation cycles (e.g. papers of
+    the same year citing each other) are dropped: inside the cyclic part only
+    links from an earlier (year, row) to a later one are kept. Returns the
+    DAG and the number of dropped links.
+    """
+    flow = sparse.csr_matrix(citations, dtype=np.float64).T.tocsr()
+    flow.data[:] = 1
+    n = flow.shape[0]
+    year = np.zeros(n) if year is None else np.nan_to_num(np.asarray(year, dtype=np.float64), nan=-np.inf)
+    coo = flow.tocoo()
+    keep = year[coo.row] <= year[coo.col]
+    keep &= coo.row != coo.col
+    _, remaining = topological_layers(_matrix(coo.row[keep], coo.col[keep], n))
+    if remaining.any():
+        # Order the cyclic part by (year, row) so that it becomes acyclic
+        inside = remaining[coo.row] & remaining[coo.col]
+        forward = (year[coo.row] < year[coo.col]) | ((year[coo.row] == year[coo.col]) & (coo.row < coo.col))
+        keep &= ~inside | forward
+    return _matrix(coo.row[keep], coo.col[keep], n), int((~keep).sum())
+
+
+def _matrix(rows, cols, n):
+    return sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+
+
+def topological_layers(dag):
+    """Kahn's algorithm by layers: every layer holds the nodes whose predecessors are all in
+    earlier layers, so each step only touches the links out of the current layer (linear time).
+    Returns the layers and a mask of the nodes left on cycles (none for a DAG).
+    """
+    dag = sparse.csr_matrix(dag)
+    n = dag.shape[0]
+    indegree = np.bincount(dag.indices, minlength=n)
+    layers = []
+    frontier = np.flatnonzero(indegree == 0)
+    while len(frontier):
+        layers.append(frontier)
+        starts, ends = dag.indptr[frontier], dag.indptr[frontier + 1]
+        targets = dag.indices[_ranges(starts, ends)]
+        np.subtract.at(indegree, targets, 1)
+        targets = np.unique(targets)
+        frontier = targets[indegree[targets] == 0]
+    remaining = np.ones(n, dtype=bool)
+    if layers:
+        remaining[np.concatenate(layers)] = False
+    return layers, remaining
+
+
+def _ranges(starts, ends):
+    """Concatenated np.arange(start, end) for every pair, without a Python loop"""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+    return np.arange(total) + offsets
+
+
+def traversal_weights(dag, method='SPC', layers=None):
+    """Traversal counts of every link of a DAG (same sparsity as ``dag``)
+
+    SPC   paths from sources (no predecessors) to sinks (no successors) through the link
+    SPLC  paths from any node (each node also starts a path) to sinks through the link
+    SPNP  paths between any pair of connected nodes through the link
+    With N-(u) the paths ending at u and N+(v) the paths starting at v, the
+    weight of u -> v is N-(u) * N+(v). Both counts are accumulated layer by
+    layer, forwards and backwards over the topological order, so the cost is
+    linear in the number of links. Counts are floats (they grow
+    exponentially with depth); weights are divided by the total number of
+    paths for SPC.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+    dag = sparse.csr_matrix(dag)
+    incoming = dag.T.tocsr()
+    n = dag.shape[0]
+    if layers is None:
+        layers, remaining = topological_layers(dag)
+        if remaining.any():
+            raise ValueError(f"The network has cycles ({int(remaining.sum())} nodes); use flow_dag first")
+
+    indegree = np.diff(incoming.indptr)
+    outdegree = np.diff(dag.indptr)
+    # N-: paths reaching each node. Every node starts a path in SPLC/SPNP, only sources in SPC
+    backward = np.where(indegree == 0, 1.0, 0.0) if method == 'SPC' else np.ones(n)
+    for layer in layers[1:]:
+        links = _ranges(incoming.indptr[layer], incoming.indptr[layer + 1])
+        owner = np.repeat(np.arange(len(layer)), np.diff(incoming.indptr)[layer])
+        backward[layer] += np.bincount(owner, weights=backward[incoming.indices[links]], minlength=len(layer))
+    # N+: paths leaving each node. Every node ends a path in SPNP, only sinks in SPC/SPLC
+    forward = np.ones(n) if method == 'SPNP' else np.where(outdegree == 0, 1.0, 0.0)
+    for layer in layers[::-1]:
+        links = _ranges(dag.indptr[layer], dag.indptr[layer + 1])
+        owner = np.repeat(np.arange(len(layer)), outdegree[layer])
+        forward[layer] += np.bincount(owner, weights=forward[dag.indices[links]], minlength=len(layer))
+
+    rows = np.repeat(np.arange(n), outdegree)
+    weights = backward[rows] * forward[dag.indices]
+    if method == 'SPC':
+        total = backward[(outdegree == 0) & (indegree > 0)].sum()
+        weights = weights / total if total > 0 else weights
+    return sparse.csr_matrix((weights, dag.indices.copy(), dag.indptr.copy()), shape=dag.shape)
+
+
+def local_main_path(weights, ties=True):
+    """Forward local main path: start from the heaviest links out of the sources and repeatedly
+    follow the heaviest link out of the reached nodes until sinks are reached (all tied links
+    are followed when ``ties``). Returns the path links as (source, target) rows."""
+    weights = sparse.csr_matrix(weights)
+    indegree = np.bincount(weights.indices, minlength=weights.shape[0])
+    outdegree = np.diff(weights.indptr)
+    sources = np.flatnonzero((indegree == 0) & (outdegree > 0))
+    if not len(sources):
+        return np.empty((0, 2), dtype=np.int64)
+    # Heaviest link out of every node (max over each CSR row)
+    has_links = outdegree > 0
+    best = np.full(weights.shape[0], -np.inf)
+    best[has_links] = np.maximum.reduceat(weights.data, weights.indptr[:-1][has_links])
+
+    start = sources[np.isclose(best[sources], best[sources].max(), rtol=1e-12, atol=0)]
+    if not ties:
+        start = start[:1]
+    path, frontier, seen = [], start, np.zeros(weights.shape[0], dtype=bool)
+    seen[frontier] = True
+    while len(frontier):
+        frontier = frontier[outdegree[frontier] > 0]
+        links = _ranges(weights.indptr[frontier], weights.indptr[frontier + 1])
+        owner = np.repeat(frontier, outdegree[frontier])
+        chosen = np.isclose(weights.data[links], best[owner], rtol=1e-12, atol=0)
+        if not ties:
+            # only the first heaviest link of each node
+            candidates = np.flatnonzero(chosen)
+            _, first = np.unique(owner[candidates], return_index=True)
+            chosen = np.zeros(len(links), dtype=bool)
+            chosen[candidates[first]] = True
+        pairs = np.column_stack([owner[chosen], weights.indices[links[chosen]]])
+        path.append(pairs)
+        frontier = np.unique(pairs[:, 1])
+        frontier = frontier[~seen[frontier]]
+        seen[frontier] = True
+    return np.unique(np.concatenate(path), axis=0) if path else np.empty((0, 2), dtype=np.int64)
+
+
+def global_main_path(weights, layers=None):
+    """Source-to-sink path with the largest total traversal weight (longest path on the DAG,
+    dynamic programming over the topological layers). Returns its links as (source, target) rows."""
+    weights = sparse.csr_matrix(weights)
+    incoming = weights.T.tocsr()
+    n = weights.shape[0]
+    if layers is None:
+        layers, _ = topological_layers(weights)
+    best = np.zeros(n)
+    previous = np.full(n, -1)
+    indegree = np.diff(incoming.indptr)
+    for layer in layers[1:]:
+        layer = layer[indegree[layer] > 0]
+        if not len(layer):
+            continue
+        links = _ranges(incoming.indptr[layer], incoming.indptr[layer + 1])
+        candidate = best[incoming.indices[links]] + incoming.data[links]
+        starts = np.r_[0, np.cumsum(indegree[layer])[:-1]]
+        best[layer] = np.maximum.reduceat(candidate, starts)
+        # predecessor giving the maximum (first one on ties)
+        is_best = candidate == np.repeat(best[layer], indegree[layer])
+        first = np.maximum.reduceat(np.where(is_best, -np.arange(len(links)), -len(links)), starts)
+        previous[layer] = incoming.indices[links[-first]]
+
+    outdegree = np.diff(weights.indptr)
+    sinks = np.flatnonzero((outdegree == 0) & (indegree > 0))
+    if not len(sinks):
+        return np.empty((0, 2), dtype=np.int64)
+    node = sinks[np.argmax(best[sinks])]
+    path = []
+    while previous[node] >= 0:
+        path.append((previous[node], node))
+        node = previous[node]
+    return np.array(path[::-1], dtype=np.int64).reshape(-1, 2)
+
+
+def main_path_analysis(df, method='SPC', ties=True):
+    """Main path analysis of the local citation network of a corpus
+
+    Returns (links, local_path, global_path): every DAG link with its
+    traversal weight, and the links of the local and global main paths with
+    the year, first author and title of both ends.
+    """
+    from local_citations import citation_matrix
+
+    year = pd.to_numeric(df['Year'], errors='coerce').to_numpy(dtype=np.float64)
+    dag, dropped = flow_dag(citation_matrix(df), year)
+    if dropped:
+        print(f"{dropped} citation links dropped to make the network acyclic")
+    layers, _ = topological_layers(dag)
+    weights = traversal_weights(dag, method, layers=layers)
+
+    labels = pd.DataFrame({
+        'year': pd.array(year, dtype='Float64').astype('Int64'),
+        'author': df['Authors'].fillna('').astype(str).str.split(r'[;,]', regex=True).str[0].str.strip().to_numpy(),
+        'title': df['Title'].fillna('').astype(str).to_numpy(),
+    })
+
+    def describe(pairs):
+        source, target = pairs[:, 0], pairs[:, 1]
+        table = pd.DataFrame({'Cited': source, 'Citing': target,
+                              method: np.asarray(weights[source, target]).ravel() if len(pairs) else []})
+        for end, nodes in (('Cited', source), ('Citing', target)):
+            for column in ('year', 'author', 'title'):
+                table[f'{end}_{column}'] = labels[column].to_numpy()[nodes]
+        return table.sort_values(['Cited_year', 'Citing_year']).reset_index(drop=True)
+
+    coo = weights.tocoo()
+    links = describe(np.column_stack([coo.row, coo.col])).sort_values(method, ascending=False, ignore_index=True)
+    return links, describe(local_main_path(weights, ties=ties)), describe(global_main_path(weights, layers=layers))
+
+
+def plot_main_path(path, output_file='main_path.png', title='Main Path', method='SPC'):
+    """Main path drawn by publication year (x axis), link width by traversal weight"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    nodes = pd.concat([
+        path[['Cited', 'Cited_year', 'Cited_author']].set_axis(['node', 'year', 'author'], axis=1),
+        path[['Citing', 'Citing_year', 'Citing_author']].set_axis(['node', 'year', 'author'], axis=1),
+    ]).drop_duplicates('node').sort_values(['year', 'node']).reset_index(drop=True)
+    # Papers of the same year are stacked vertically
+    nodes['y'] = nodes.groupby('year').cumcount() - nodes.groupby('year')['node'].transform('size').sub(1) / 2
+    position = nodes.set_index('node')[['year', 'y']].astype(float)
+
+    fig, ax = plt.subplots(figsize=(14, max(4, 1.2 * nodes['y'].abs().max() + 4)))
+    widths = 1 + 4 * path[method] / max(path[method].max(), 1e-300)
+    for (_, link), width in zip(path.iterrows(), widths):
+        start, end = position.loc[link['Cited']], position.loc[link['Citing']]
+        ax.annotate('', xy=(end['year'], end['y']), xytext=(start['year'], start['y']),
+                    arrowprops=dict(arrowstyle='->', color='#2C3E50', lw=width, alpha=0.7,
+                                    shrinkA=8, shrinkB=8))
+    ax.scatter(position['year'], position['y'], s=120, color='#E74C3C', zorder=3)
+    for node in nodes.itertuples():
+        ax.annotate(f'{node.author} ({node.year})', (node.year, node.y), textcoords='offset points',
+                    xytext=(0, 10), ha='center', fontsize=9)
+    ax.set_yticks([])
+    ax.set_xlabel('Year', fontsize=14)
+    ax.set_title(f'{title} ({method})', fontsize=16)
+    ax.grid(axis='x', alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close()
+    print(f"Main path plot saved to: {output_file}")
+    return output_file
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    output_folder = 'main_path'
+    os.makedirs(output_folder, exist_ok=True)
+
+    links, local_path, global_path = main_path_analysis(read_scopus_csv(file), method='SPC')
+    links.to_csv(os.path.join(output_folder, 'citation_links_SPC.csv'), index=False)
+    for name, path in (('local', local_path), ('global', global_path)):
+        path.to_csv(os.path.join(output_folder, f'{name}_main_path_SPC.csv'), index=False)
+        print(f"\n=== {name.capitalize()} main path ===")
+        print(path[['Cited_year', 'Cited_author', 'Citing_year', 'Citing_author', 'SPC']].to_string(index=False))
+        if len(path):
+            plot_main_path(path, os.path.join(output_folder, f'{name}_main_path_SPC.png'),
+                           title=f'{name.capitalize()} Main Path')
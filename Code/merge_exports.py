@@ -0,0 +1,309 @@
+import os
+import csv
+import argparse
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from fields import read_scopus_csv, split_field
+
+# Web of Science tab-delimited tags -> Scopus column names
+WOS_COLUMNS = {
+    'AU': 'Authors', 'AF': 'Author full names', 'TI': 'Title', 'SO': 'Source title', 'PY': 'Year',
+    'VL': 'Volume', 'IS': 'Issue', 'BP': 'Page start', 'EP': 'Page end', 'DI': 'DOI', 'TC': 'Cited by',
+    'AB': 'Abstract', 'DE': 'Author Keywords', 'ID': 'Index Keywords', 'C1': 'Authors with affiliations',
+    'RP': 'Correspondence Address', 'CR': 'References', 'DT': 'Document Type', 'LA': 'Language of Original Document',
+    'SN': 'ISSN', 'UT': 'UT',
+}
+DATABASE_COLUMN = 'Database'
+
+# How each column is combined across the records of one duplicate cluster:
+# 'first' = first non-empty value in priority order, 'max' = largest value,
+# 'union' = distinct items of a ';' list, in priority order
+MERGE_POLICY = {
+    'Cited by': 'max',
+    'Author Keywords': 'union',
+    'Index Keywords': 'union',
+    DATABASE_COLUMN: 'union',
+}
+DEFAULT_PRIORITY = ('Scopus', 'WoS')
+
+# MinHash / LSH settings: 32 bands of 4 rows catch nearly all pairs above
+# Jaccard 0.6 (a one-letter typo in a short title is about 0.7); candidates
+# are then verified on the whole signature
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 32
+THRESHOLD = 0.7
+
+
+def read_export(path):
+    """Read a Scopus CSV or a Web of Science tab-delimited export with Scopus column names"""
+    with open(path, 'rb') as fh:
+        first_line = fh.readline().lstrip(b'\xef\xbb\xbf')
+    if first_line.startswith(b'FN '):
+        raise ValueError(f"{path} is a Web of Science plain-text (tagged) export; export the records as "
+                         f"'Tab-delimited file' instead")
+    if first_line.startswith(b'PT\t'):
+        df = pd.read_csv(path, sep='\t', quoting=csv.QUOTE_NONE, dtype=str, index_col=False, encoding='utf-8-sig')
+        df = df.rename(columns=WOS_COLUMNS)
+        df[DATABASE_COLUMN] = 'WoS'
+    else:
+        df = read_scopus_csv(path)
+        df[DATABASE_COLUMN] = 'Scopus'
+    return df
+
+
+def normalize_doi(values):
+    """Lowercase DOIs without resolver prefixes; empty string when missing"""
+    values = pd.Series(values).fillna('').astype(str).str.strip().str.lower()
+    return values.str.replace(r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)', '', regex=True)
+
+
+def normalize_titles(values):
+    """Accent-folded, lowercase titles with punctuation collapsed to single spaces (pure ASCII)"""
+    values = pd.Series(values).fillna('').astype(str)
+    values = values.str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii').str.lower()
+    return values.str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+
+
+def _key_edges(keys):
+    """Edges linking every record with a non-empty key to the first record with the same key hash"""
+    keys = pd.Series(keys).reset_index(drop=True)
+    present = np.flatnonzero((keys != '').to_numpy())
+    if len(present) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    hashes = pd.util.hash_array(keys.to_numpy()[present].astype(object))
+    codes, uniques = pd.factorize(hashes)
+    first = np.full(len(uniques), len(keys), dtype=np.int64)
+    np.minimum.at(first, codes, present)
+    edges = np.column_stack([present, first[codes]])
+    return edges[edges[:, 0] != edges[:, 1]]
+
+
+def _mix64(x):
+    """splitmix64 finaliser, spreads the exact shingle codes over 64 bits"""
+    with np.errstate(over='ignore'):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def title_minhash(titles, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=0, max_shingles=1000000):
+    """MinHash signatures (n x num_perm, uint32) of character shingles of normalized titles
+
+    All titles are laid out in one byte buffer; the k-gram starting at every
+    position is read as an exact integer code with k shifted views of the
+    buffer, and the per-title minima of every hash function are ragged
+    segment reductions. Titles are processed in chunks of about
+    ``max_shingles`` shingles. Empty titles get an all-max signature.
+    """
+    titles = pd.Series(titles).fillna('').astype(str).reset_index(drop=True)
+    lengths = titles.str.len().to_numpy(dtype=np.int64)
+    buffer = np.frombuffer(''.join(titles).encode('ascii', 'ignore'), dtype=np.uint8).astype(np.uint64)
+    buffer = np.concatenate([buffer, np.zeros(shingle_size, dtype=np.uint64)])
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    n_shingles = np.where(lengths > 0, np.maximum(lengths - shingle_size + 1, 1), 0)
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    signatures = np.full((len(titles), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+
+    cumulative = np.cumsum(n_shingles)
+    start = 0
+    while start < len(titles):
+        stop = max(int(np.searchsorted(cumulative, (cumulative[start - 1] if start else 0) + max_shingles)), start + 1)
+        stop = min(stop, len(titles))
+        counts = n_shingles[start:stop]
+        rows = np.flatnonzero(counts) + start
+        if len(rows):
+            counts = n_shingles[rows]
+            local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            position = np.repeat(offsets[rows], counts) + local
+            remaining = np.repeat(lengths[rows], counts) - local
+            codes = np.zeros(len(position), dtype=np.uint64)
+            for j in range(shingle_size):
+                # Bytes past the end of a short title are masked out
+                byte = np.where(remaining > j, buffer[position + j], np.uint64(0))
+                codes |= byte << np.uint64(8 * j)
+            hashed = _mix64(codes)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            with np.errstate(over='ignore'):
+                for p in range(num_perm):
+                    values = ((a[p] * hashed + b[p]) >> np.uint64(32)).astype(np.uint32)
+                    signatures[rows, p] = np.minimum.reduceat(values, starts)
+        start = stop
+    return signatures
+
+
+def lsh_candidate_pairs(signatures, bands=BANDS, valid=None):
+    """Candidate pairs of records whose signatures agree on a whole band
+
+    Records are sorted by band hash and consecutive records of the same bucket
+    are paired, which links every bucket as a chain in linear time.
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    index = np.arange(n) if valid is None else np.flatnonzero(valid)
+    pairs = []
+    with np.errstate(over='ignore'):
+        for band in range(bands):
+            block = signatures[index, band * rows:(band + 1) * rows].astype(np.uint64)
+            bucket = np.zeros(len(index), dtype=np.uint64)
+            for j in range(rows):
+                bucket = bucket * np.uint64(0x100000001B3) + block[:, j]
+            bucket = _mix64(bucket ^ np.uint64(band))
+            order = np.argsort(bucket, kind='stable')
+            same = bucket[order[1:]] == bucket[order[:-1]]
+            pairs.append(np.column_stack([index[order[:-1][same]], index[order[1:][same]]]))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.concatenate(pairs)
+    pairs.sort(axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def near_duplicate_edges(df, threshold=THRESHOLD, max_year_gap=1, num_perm=NUM_PERM, bands=BANDS, seed=0):
+    """Verified near-duplicate title pairs with their estimated Jaccard similarity
+
+    A candidate pair is kept when its signatures agree on at least
+    ``threshold`` of the hash functions, the publication years differ by at
+    most ``max_year_gap`` and the records do not carry two different DOIs.
+    """
+    titles = normalize_titles(df['Title'] if 'Title' in df.columns else pd.Series('', index=df.index))
+    signatures = title_minhash(titles, num_perm=num_perm, seed=seed)
+    pairs = lsh_candidate_pairs(signatures, bands=bands, valid=(titles != '').to_numpy())
+    if len(pairs) == 0:
+        return pairs, np.empty(0)
+    i, j = pairs[:, 0], pairs[:, 1]
+    similarity = (signatures[i] == signatures[j]).mean(axis=1)
+    keep = similarity >= threshold
+    if 'Year' in df.columns:
+        year = pd.to_numeric(df['Year'], errors='coerce').to_numpy(dtype=np.float64)
+        gap = np.abs(year[i] - year[j])
+        keep &= np.isnan(gap) | (gap <= max_year_gap)
+    if 'DOI' in df.columns:
+        doi = normalize_doi(df['DOI']).to_numpy()
+        keep &= (doi[i] == '') | (doi[j] == '') | (doi[i] == doi[j])
+    return pairs[keep], similarity[keep]
+
+
+def find_duplicates(df, threshold=THRESHOLD, max_year_gap=1, near=True, seed=0):
+    """Duplicate clusters of a combined export
+
+    Returns one cluster label per record (numbered in order of first
+    appearance) and the duplicate links found: exact DOI / EID hash matches and
+    MinHash title near-duplicates.
+    """
+    n = len(df)
+    links = []
+    for column, reason in (('DOI', 'doi'), ('EID', 'eid'), ('UT', 'ut')):
+        if column in df.columns:
+            keys = normalize_doi(df[column]) if column == 'DOI' else df[column].fillna('').astype(str).str.strip()
+            edges = _key_edges(keys)
+            links.append(pd.DataFrame({'record_a': edges[:, 1], 'record_b': edges[:, 0],
+                                       'reason': reason, 'similarity': 1.0}))
+    if near:
+        edges, similarity = near_duplicate_edges(df, threshold=threshold, max_year_gap=max_year_gap, seed=seed)
+        links.append(pd.DataFrame({'record_a': edges[:, 0], 'record_b': edges[:, 1],
+                                   'reason': 'title', 'similarity': similarity}))
+    links = pd.concat(links, ignore_index=True) if links else pd.DataFrame(
+        columns=['record_a', 'record_b', 'reason', 'similarity'])
+    links = links.drop_duplicates(['record_a', 'record_b']).reset_index(drop=True)
+
+    graph = sparse.coo_matrix((np.ones(len(links)), (links['record_a'].astype(np.int64),
+                                                      links['record_b'].astype(np.int64))), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    clusters, _ = pd.factorize(labels)
+    return clusters, links
+
+
+def _union_lists(values, clusters, sep=';'):
+    """Distinct ';'-separated items per cluster, case-insensitive, first spelling kept"""
+    items = split_field(values, sep=sep)
+    items['cluster'] = clusters[items['paper'].to_numpy()]
+    items['key'] = items['value'].str.lower()
+    items = items.drop_duplicates(['cluster', 'key'])
+    return items.groupby('cluster', sort=False)['value'].agg('; '.join)
+
+
+def merge_records(df, clusters, priority=DEFAULT_PRIORITY, policy=None):
+    """Collapse every duplicate cluster into one record with a deterministic field-level policy
+
+    Records of a cluster are ranked by database ``priority``, then by the
+    number of filled fields, then by their position in the input; each column
+    is then combined with its MERGE_POLICY rule ('first' by default).
+    """
+    policy = {**MERGE_POLICY, **(policy or {})}
+    df = df.reset_index(drop=True).replace('', np.nan)
+    clusters = np.asarray(clusters)
+    sizes = np.bincount(clusters)
+    duplicated = sizes[clusters] > 1
+    if not duplicated.any():
+        return df
+
+    dup = df[duplicated]
+    rank = {name: i for i, name in enumerate(priority)}
+    order_keys = pd.DataFrame({
+        'cluster': clusters[duplicated],
+        'database': dup[DATABASE_COLUMN].map(rank).fillna(len(rank)).to_numpy() if DATABASE_COLUMN in dup else 0,
+        'filled': -dup.notna().sum(axis=1).to_numpy(),
+        'row': np.flatnonzero(duplicated),
+    })
+    order = np.lexsort((order_keys['row'], order_keys['filled'], order_keys['database'], order_keys['cluster']))
+    dup = dup.iloc[order]
+    dup_clusters = order_keys['cluster'].to_numpy()[order]
+
+    merged = dup.groupby(dup_clusters, sort=False).first()
+    for column, rule in policy.items():
+        if column not in dup.columns:
+            continue
+        if rule == 'max':
+            merged[column] = pd.to_numeric(dup[column], errors='coerce').groupby(dup_clusters, sort=False).max()
+        elif rule == 'union':
+            merged[column] = _union_lists(dup[column].reset_index(drop=True), dup_clusters).reindex(merged.index)
+
+    # Keep the position of the first record of each cluster
+    singles = df[~duplicated].assign(_cluster=clusters[~duplicated])
+    merged = merged.assign(_cluster=merged.index.to_numpy())
+    combined = pd.concat([singles, merged], ignore_index=True).sort_values('_cluster', kind='stable')
+    return combined.drop(columns='_cluster').reset_index(drop=True)
+
+
+def merge_exports(sources, priority=DEFAULT_PRIORITY, threshold=THRESHOLD, max_year_gap=1, near=True, policy=None):
+    """Combine several Scopus / WoS exports (paths or DataFrames) and remove duplicates
+
+    Returns the merged corpus and the table of duplicate links (record
+    positions refer to the concatenated input, with its export number).
+    """
+    frames = []
+    for number, source in enumerate(sources):
+        frame = read_export(source) if isinstance(source, str) else source.copy()
+        if DATABASE_COLUMN not in frame.columns:
+            frame[DATABASE_COLUMN] = 'Scopus'
+        frame['_export'] = number
+        frames.append(frame)
+    combined = pd.concat(frames, ignore_index=True)
+    clusters, links = find_duplicates(combined, threshold=threshold, max_year_gap=max_year_gap, near=near)
+    export = combined['_export'].to_numpy()
+    links['export_a'] = export[links['record_a'].astype(np.int64)]
+    links['export_b'] = export[links['record_b'].astype(np.int64)]
+    merged = merge_records(combined, clusters, priority=priority, policy=policy).drop(columns='_export')
+    return merged, links
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Merge Scopus / WoS exports and remove duplicates')
+    parser.add_argument('inputs', nargs='+', help='Scopus CSV or WoS tab-delimited exports')
+    parser.add_argument('-o', '--output', default='datos_combinados.csv')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='Minimum estimated title Jaccard similarity')
+    parser.add_argument('--no-near', action='store_true', help='Only exact DOI / EID duplicates')
+    args = parser.parse_args()
+
+    merged, links = merge_exports(args.inputs, threshold=args.threshold, near=not args.no_near)
+    merged.to_csv(args.output, index=False)
+    links.to_csv(os.path.splitext(args.output)[0] + '_duplicates.csv', index=False)
+    print(f"{len(links)} duplicate links ({', '.join(f'{k}: {v}' for k, v in links['reason'].value_counts().items())})")
+    print(f"Merged corpus: {len(merged)} records saved to {args.output}")
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from indices import rowwise_hg_index
+
+# Metrics of analyze_bibliometric_metrics, in its order, and their rounding there
+METRICS = ['TP', 'NCA', 'SA', 'CA', 'CI', 'CC', 'TC', 'NCP', 'PCP', 'CCP',
+           'h-index', 'g-index', 'i10-index', 'i100-index', 'i200-index']
+ROUNDED = {'CI': 2, 'CC': 2, 'PCP': 2, 'CCP': 2}
+# Matrix cells (replicates x papers, or replicates x authors) computed per batch
+BATCH_CELLS = 2 ** 24
+
+
+def paper_arrays(df):
+    """Citations and number of authors of every paper, and the author x paper incidence
+
+    Authors are split on ', ' as in analyze_bibliometric_metrics (a missing
+    value counts as one author, 'nan').
+    """
+    cites = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    names = df['Authors'].fillna('nan').astype(str)
+    codes, _ = pd.factorize(names.str.split(', ').explode().to_numpy())
+    paper = np.repeat(np.arange(len(df)), names.str.count(', ').to_numpy(dtype=np.int64) + 1)
+    n_authors = np.bincount(paper, minlength=len(df))
+    incidence = sparse.csr_matrix((np.ones(len(codes), dtype=np.float32), (codes, paper)),
+                                  shape=(codes.max() + 1 if len(codes) else 0, len(df)))
+    return cites, n_authors, incidence
+
+
+def corpus_metrics(cites, n_authors, incidence, indices):
+    """All the metrics of analyze_bibliometric_metrics for every row of ``indices``
+
+    ``indices`` is a (replicates x papers) matrix of paper positions (a paper
+    may repeat); the result maps each metric to one value per row. Sums are
+    row reductions of gathered arrays, h/g come from rowwise_hg_index and the
+    contributing authors from one sparse product with the paper multiplicities.
+    """
+    indices = np.atleast_2d(indices)
+    n_rows, n = indices.shape
+    c = cites[indices]
+    authors = n_authors[indices]
+
+    sole = (authors == 1).sum(axis=1)
+    multi = n - sole
+    in_multi = np.where(authors > 1, authors, 0).sum(axis=1)
+    tc = c.sum(axis=1)
+    ncp = (c > 0).sum(axis=1)
+    h, g = rowwise_hg_index(c)
+
+    # Papers drawn in each row -> authors with at least one drawn paper
+    drawn = sparse.csr_matrix((np.ones(indices.size, dtype=np.float32),
+                               (indices.ravel(), np.repeat(np.arange(n_rows), n))),
+                              shape=(len(cites), n_rows))
+    nca = ((incidence @ drawn) > 0).sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'TP': np.full(n_rows, n),
+            'NCA': np.asarray(nca).ravel(),
+            'SA': sole,
+            'CA': multi,
+            'CI': np.where(multi > 0, in_multi / multi, 0),
+            'CC': 1 - sole / n,
+            'TC': tc,
+            'NCP': ncp,
+            'PCP': ncp / n * 100,
+            'CCP': np.where(ncp > 0, tc / ncp, 0),
+            'h-index': h,
+            'g-index': g,
+            'i10-index': (c >= 10).sum(axis=1),
+            'i100-index': (c >= 100).sum(axis=1),
+            'i200-index': (c >= 200).sum(axis=1),
+        }
+
+
+def bootstrap_metrics(df, n_boot=1000, ci=0.95, seed=0):
+    """Percentile bootstrap confidence intervals of the corpus metrics
+
+    Papers are resampled with replacement: every batch of replicates is a
+    numpy index matrix and corpus_metrics evaluates all of its rows at once,
+    so the cost is a few matrix operations per batch rather than ``n_boot``
+    calls of the metric code. Returns Metric, Lower, Upper and SE (bootstrap
+    standard error). Counts of distinct items (NCA) are biased downwards by
+    resampling, since repeated papers add no new authors.
+    """
+    cites, n_authors, incidence = paper_arrays(df)
+    n = len(cites)
+    rng = np.random.default_rng(seed)
+    batch = int(max(1, min(n_boot, BATCH_CELLS // max(n, incidence.shape[0], 1))))
+
+    replicates = {name: [] for name in METRICS}
+    for start in range(0, n_boot, batch):
+        indices = rng.integers(0, n, size=(min(batch, n_boot - start), n))
+        for name, values in corpus_metrics(cites, n_authors, incidence, indices).items():
+            replicates[name].append(values)
+
+    alpha = (1 - ci) / 2
+    rows = []
+    for name in METRICS:
+        values = np.concatenate(replicates[name]).astype(np.float64)
+        low, high = np.quantile(values, [alpha, 1 - alpha])
+        digits = ROUNDED.get(name)
+        rows.append({'Metric': name,
+                     'Lower': round(low, digits) if digits else low,
+                     'Upper': round(high, digits) if digits else high,
+                     'SE': values.std(ddof=1) if len(values) > 1 else 0.0})
+    return pd.DataFrame(rows)
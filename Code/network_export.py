@@ -0,0 +1,237 @@
+"""Streaming exporters of sparse networks to Gephi and VOSviewer formats
+
+    adjacency, labels = cocitation_network(df)
+    write_gexf(adjacency, labels, 'cocitation.gexf')
+    write_vosviewer(adjacency, labels, 'cocitation_map.txt', 'cocitation_network.txt')
+
+Nodes and edges are written straight from the CSR arrays in blocks of at most
+CHUNK_EDGES stored entries: every block is formatted with one bulk string
+operation and written out, so memory stays bounded by the block size whatever
+the size of the network (no networkx graph, no XML tree). Undirected networks
+(symmetric adjacency) are written once per pair, from the upper triangle.
+"""
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from fields import read_scopus_csv
+
+FORMATS = ('gexf', 'graphml', 'pajek', 'vosviewer')
+EXTENSIONS = {'gexf': '.gexf', 'graphml': '.graphml', 'pajek': '.net'}
+# Stored adjacency entries (and node labels) formatted per block
+CHUNK_EDGES = 2 ** 18
+
+
+def _blocks(n_items, chunk=CHUNK_EDGES):
+    for start in range(0, n_items, chunk):
+        yield start, min(start + chunk, n_items)
+
+
+def _row_blocks(adjacency, chunk=CHUNK_EDGES):
+    """Row ranges of a CSR matrix holding about ``chunk`` stored entries each"""
+    indptr = adjacency.indptr
+    n = adjacency.shape[0]
+    start = 0
+    while start < n:
+        stop = int(np.searchsorted(indptr, indptr[start] + chunk, side='right')) - 1
+        stop = min(max(stop, start + 1), n)
+        yield start, stop
+        start = stop
+
+
+def iter_edges(adjacency, directed=False, min_weight=None, chunk=CHUNK_EDGES):
+    """(source, target, weight) arrays of the edges, one block of rows at a time
+
+    Undirected networks yield every pair once (source < target); self-loops
+    are skipped. Only the current block of rows is ever copied.
+    """
+    adjacency = sparse.csr_matrix(adjacency)
+    for start, stop in _row_blocks(adjacency, chunk):
+        lo, hi = adjacency.indptr[start], adjacency.indptr[stop]
+        target = adjacency.indices[lo:hi]
+        source = np.repeat(np.arange(start, stop), np.diff(adjacency.indptr[start:stop + 1]))
+        weight = adjacency.data[lo:hi]
+        keep = source != target if directed else source < target
+        if min_weight is not None:
+            keep &= weight >= min_weight
+        if keep.any():
+            yield source[keep], target[keep], weight[keep]
+
+
+def _format(template, *columns):
+    """One string with ``template`` applied to every row of the columns (a single % operation)"""
+    values = np.column_stack(columns).astype(object).ravel().tolist() if len(columns) > 1 \
+        else list(columns[0])
+    return (template * (len(values) // max(template.count('%'), 1))) % tuple(values)
+
+
+def _xml_escape(labels):
+    return (pd.Series(labels, dtype=object).astype(str)
+            .str.replace('&', '&amp;', regex=False).str.replace('<', '&lt;', regex=False)
+            .str.replace('>', '&gt;', regex=False).str.replace('"', '&quot;', regex=False)
+            .str.replace(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', regex=True).to_numpy())
+
+
+def _plain_label(labels, quote=None):
+    text = pd.Series(labels, dtype=object).astype(str).str.replace(r'[\t\r\n]+', ' ', regex=True)
+    if quote:
+        text = text.str.replace(quote, "'", regex=False)
+    return text.to_numpy()
+
+
+def _node_attributes(adjacency, node_attributes):
+    """Links (degree) and total link strength of every node, plus the given attributes"""
+    from centrality import degree_strength
+
+    degree, strength = degree_strength(adjacency)
+    attributes = {'Links': degree, 'Total link strength': strength}
+    attributes.update(node_attributes or {})
+    attributes = {name: np.asarray(values) for name, values in attributes.items()}
+    for name, values in attributes.items():
+        if np.issubdtype(values.dtype, np.floating) and np.isfinite(values).all() and (values % 1 == 0).all():
+            attributes[name] = values.astype(np.int64)
+    return attributes
+
+
+def _xml_type(values):
+    return 'integer' if np.issubdtype(values.dtype, np.integer) else \
+        'double' if np.issubdtype(values.dtype, np.number) else 'string'
+
+
+def write_gexf(adjacency, labels, path, directed=False, node_attributes=None, min_weight=None):
+    """GEXF 1.3 file (Gephi) with the node attributes and the edge weights"""
+    adjacency = sparse.csr_matrix(adjacency)
+    attributes = _node_attributes(adjacency, node_attributes)
+    names = list(attributes)
+    n_edges = 0
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<gexf xmlns="http://gexf.net/1.3" version="1.3">\n'
+                 f'  <graph mode="static" defaultedgetype="{"directed" if directed else "undirected"}">\n'
+                 '    <attributes class="node">\n')
+        for i, name in enumerate(names):
+            fh.write(f'      <attribute id="{i}" title="{_xml_escape([name])[0]}" '
+                     f'type="{_xml_type(attributes[name]).replace("double", "float")}"/>\n')
+        fh.write('    </attributes>\n    <nodes>\n')
+        template = ('      <node id="%d" label="%s"><attvalues>'
+                    + ''.join(f'<attvalue for="{i}" value="%s"/>' for i in range(len(names)))
+                    + '</attvalues></node>\n')
+        for start, stop in _blocks(len(labels)):
+            values = [_xml_escape(attributes[name][start:stop]) if _xml_type(attributes[name]) == 'string'
+                      else attributes[name][start:stop] for name in names]
+            fh.write(_format(template, np.arange(start, stop), _xml_escape(labels[start:stop]), *values))
+        fh.write('    </nodes>\n    <edges>\n')
+        for source, target, weight in iter_edges(adjacency, directed, min_weight):
+            ids = np.arange(n_edges, n_edges + len(source))
+            fh.write(_format('      <edge id="%d" source="%d" target="%d" weight="%.10g"/>\n',
+                             ids, source, target, weight))
+            n_edges += len(source)
+        fh.write('    </edges>\n  </graph>\n</gexf>\n')
+    return n_edges
+
+
+def write_graphml(adjacency, labels, path, directed=False, node_attributes=None, min_weight=None):
+    """GraphML file with a label and the node attributes as node data and the weight as edge data"""
+    adjacency = sparse.csr_matrix(adjacency)
+    attributes = _node_attributes(adjacency, node_attributes)
+    names = list(attributes)
+    n_edges = 0
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                 '  <key id="label" for="node" attr.name="label" attr.type="string"/>\n')
+        for i, name in enumerate(names):
+            fh.write(f'  <key id="a{i}" for="node" attr.name="{_xml_escape([name])[0]}" '
+                     f'attr.type="{_xml_type(attributes[name]).replace("integer", "long")}"/>\n')
+        fh.write('  <key id="weight" for="edge" attr.name="weight" attr.type="double"/>\n'
+                 f'  <graph id="G" edgedefault="{"directed" if directed else "undirected"}">\n')
+        template = ('    <node id="n%d"><data key="label">%s</data>'
+                    + ''.join(f'<data key="a{i}">%s</data>' for i in range(len(names))) + '</node>\n')
+        for start, stop in _blocks(len(labels)):
+            values = [_xml_escape(attributes[name][start:stop]) if _xml_type(attributes[name]) == 'string'
+                      else attributes[name][start:stop] for name in names]
+            fh.write(_format(template, np.arange(start, stop), _xml_escape(labels[start:stop]), *values))
+        for source, target, weight in iter_edges(adjacency, directed, min_weight):
+            fh.write(_format('    <edge source="n%d" target="n%d"><data key="weight">%.10g</data></edge>\n',
+                             source, target, weight))
+            n_edges += len(source)
+        fh.write('  </graph>\n</graphml>\n')
+    return n_edges
+
+
+def write_pajek(adjacency, labels, path, directed=False, min_weight=None):
+    """Pajek .net file (1-based vertices, *Edges or *Arcs with weights)"""
+    adjacency = sparse.csr_matrix(adjacency)
+    n_edges = 0
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(f'*Vertices {len(labels)}\n')
+        for start, stop in _blocks(len(labels)):
+            fh.write(_format('%d "%s"\n', np.arange(start + 1, stop + 1), _plain_label(labels[start:stop], '"')))
+        fh.write('*Arcs\n' if directed else '*Edges\n')
+        for source, target, weight in iter_edges(adjacency, directed, min_weight):
+            fh.write(_format('%d %d %.10g\n', source + 1, target + 1, weight))
+            n_edges += len(source)
+    return n_edges
+
+
+def write_vosviewer(adjacency, labels, map_path, network_path, directed=False, node_attributes=None,
+                    min_weight=None):
+    """VOSviewer map file (id, label and weight<...> columns, tab-separated) and network file
+    (id1, id2, strength); VOSviewer networks are undirected, so a directed adjacency is
+    symmetrised first (the only step that copies the whole matrix)"""
+    adjacency = sparse.csr_matrix(adjacency)
+    if directed:
+        adjacency = (adjacency + adjacency.T).tocsr()
+    attributes = _node_attributes(adjacency, node_attributes)
+    numeric = [name for name in attributes if _xml_type(attributes[name]) != 'string']
+    with open(map_path, 'w', encoding='utf-8') as fh:
+        # An integer "cluster" attribute is VOSviewer's cluster column, the others are weights
+        fh.write('\t'.join(['id', 'label'] + ['cluster' if name.lower() == 'cluster' else f'weight<{name}>'
+                                             for name in numeric]) + '\n')
+        template = '%d\t%s' + '\t%s' * len(numeric) + '\n'
+        for start, stop in _blocks(len(labels)):
+            fh.write(_format(template, np.arange(start + 1, stop + 1), _plain_label(labels[start:stop]),
+                             *[attributes[name][start:stop] for name in numeric]))
+    n_edges = 0
+    with open(network_path, 'w', encoding='utf-8') as fh:
+        for source, target, weight in iter_edges(adjacency, False, min_weight):
+            fh.write(_format('%d\t%d\t%.10g\n', source + 1, target + 1, weight))
+            n_edges += len(source)
+    return n_edges
+
+
+def export_network(adjacency, labels, output_folder, name, formats=FORMATS, directed=False,
+                   node_attributes=None, min_weight=None):
+    """Write a network in every requested format; returns {format: [files]}"""
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown formats: {', '.join(sorted(unknown))} (available: {', '.join(FORMATS)})")
+    os.makedirs(output_folder, exist_ok=True)
+    labels = np.asarray(labels, dtype=object)
+    written = {}
+    for fmt in formats:
+        if fmt == 'vosviewer':
+            files = [os.path.join(output_folder, f'{name}_vosviewer_map.txt'),
+                     os.path.join(output_folder, f'{name}_vosviewer_network.txt')]
+            n_edges = write_vosviewer(adjacency, labels, *files, directed=directed,
+                                      node_attributes=node_attributes, min_weight=min_weight)
+        else:
+            files = [os.path.join(output_folder, f'{name}{EXTENSIONS[fmt]}')]
+            writer = {'gexf': write_gexf, 'graphml': write_graphml, 'pajek': write_pajek}[fmt]
+            kwargs = {} if fmt == 'pajek' else {'node_attributes': node_attributes}
+            n_edges = writer(adjacency, labels, files[0], directed=directed, min_weight=min_weight, **kwargs)
+        print(f"{fmt}: {len(labels)} nodes, {n_edges} edges saved to: {', '.join(files)}")
+        written[fmt] = files
+    return written
+
+
+if __name__ == '__main__':
+    from centrality import NETWORKS, build_network
+
+    file = 'Scopus_VR_ED_full_filters.csv'
+    output_folder = 'network_export'
+    df = read_scopus_csv(file)
+    for network in NETWORKS:
+        adjacency, labels = build_network(df, network)
+        export_network(adjacency, labels, output_folder, f'{network}_network', directed=network == 'citation')
@@ -0,0 +1,144 @@
+import os
+import numpy as np
+import pandas as pd
+
+from fields import FIELD_COLUMNS, read_scopus_csv, split_field
+
+# Subject classification columns tried in order; Scopus CSV exports have none, so the
+# source title (journal-normalised scores) is the fallback
+SUBJECT_COLUMNS = ['Subject Area', 'Subject Areas', 'Research Areas', 'WoS Categories', 'SC', 'WC']
+# Share of the most cited papers of a cell flagged by every Top column
+TOP_SHARES = {'Top10': 0.10, 'Top1': 0.01}
+COUNTING = ('full', 'fractional')
+ENTITY_NAMES = {'AU': 'Author', 'AF': 'Author', 'SO': 'Source', 'AU_CO': 'Country', 'AU_UN': 'Institution'}
+UNKNOWN = 'Unknown'
+
+
+def subject_column(df, subject=None):
+    """Column holding the subject categories of the papers"""
+    column = subject or next((c for c in SUBJECT_COLUMNS if c in df.columns), FIELD_COLUMNS['SO'])
+    if column not in df.columns:
+        raise ValueError(f"Subject column '{column}' not found")
+    return column
+
+
+def normalized_citations(df, subject=None):
+    """Field- and year-normalised citation scores of every paper
+
+    The expected citation rate of a paper is the mean citations of the papers
+    of its (year, subject, document type) cell, one grouped transform over
+    all cells. A paper in several subjects (a ';'-separated column) counts
+    1/k in each of its k cells and its scores average over them, as in the
+    CWTS indicators. Columns: Expected_citations, NCS (citations / expected,
+    whose mean is the MNCS), Percentile (within the cell) and Top10 / Top1
+    (share of the paper among the 10% / 1% most cited of its cell: a cell of
+    n papers assigns exactly 0.1 n / 0.01 n top places, split fractionally
+    among papers tied at the threshold and over the cells of papers with
+    several subjects). Papers without a year have no scores.
+    """
+    n = len(df)
+    year = pd.to_numeric(df['Year'], errors='coerce').to_numpy(dtype=np.float64)
+    cites = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0).to_numpy(dtype=np.float64) \
+        if 'Cited by' in df.columns else np.zeros(n)
+    column = FIELD_COLUMNS['DT']
+    doctype = df[column].fillna(UNKNOWN).astype(str).to_numpy(dtype=object) if column in df.columns \
+        else np.full(n, UNKNOWN, dtype=object)
+
+    # (paper, subject) cells; papers without subject form an 'Unknown' subject
+    pairs = split_field(df[subject_column(df, subject)], sep=';')
+    missing = np.setdiff1d(np.arange(n), pairs['paper'].to_numpy())
+    paper = np.concatenate([pairs['paper'].to_numpy(dtype=np.int64), missing])
+    values = np.concatenate([pairs['value'].to_numpy(dtype=object), np.full(len(missing), UNKNOWN, dtype=object)])
+    weight = 1.0 / np.bincount(paper, minlength=n)[paper]
+    dated = ~np.isnan(year[paper])
+    paper, values, weight = paper[dated], values[dated], weight[dated]
+
+    cells = pd.DataFrame({'Year': year[paper], 'Subject': values, 'Document Type': doctype[paper],
+                          'c': cites[paper], 'w': weight, 'wc': weight * cites[paper]})
+    grouped = cells.groupby(['Year', 'Subject', 'Document Type'], sort=False)
+    expected = (grouped['wc'].transform('sum') / grouped['w'].transform('sum')).to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(expected > 0, cells['c'].to_numpy() / expected, np.nan)
+    # Positions [above, through) of this paper's citation tie within its cell, most cited first
+    size = grouped['c'].transform('size').to_numpy()
+    above = grouped['c'].rank(method='min', ascending=False).to_numpy() - 1
+    through = grouped['c'].rank(method='max', ascending=False).to_numpy()
+    percentile = 100 * grouped['c'].rank(method='average', pct=True).to_numpy()
+
+    def per_paper(item_values):
+        valid = ~np.isnan(item_values)
+        total = np.bincount(paper, weights=np.where(valid, weight * item_values, 0), minlength=n)
+        norm = np.bincount(paper, weights=weight * valid, minlength=n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(norm > 0, total / np.where(norm > 0, norm, 1), np.nan)
+
+    scores = pd.DataFrame({'Title': df['Title'].to_numpy() if 'Title' in df.columns else np.full(n, ''),
+                           'Year': year, 'Document Type': doctype, 'Cited by': cites,
+                           'Expected_citations': per_paper(expected), 'NCS': per_paper(ratio),
+                           'Percentile': per_paper(percentile)})
+    # Every cell holds exactly share x size top papers; papers tied at the threshold share
+    # the remaining places (CWTS fractional assignment)
+    for name, share in TOP_SHARES.items():
+        scores[name] = per_paper(np.clip((share * size - above) / (through - above), 0, 1))
+    return scores
+
+
+def aggregate_normalized(scores, df, field='AU', counting='full'):
+    """Papers, citations, TNCS, MNCS and top 10% / 1% papers of every value of a field
+
+    With 'fractional' counting a paper with k values (authors, countries...)
+    counts 1/k for each. Papers without NCS (no year, uncited cell) count in
+    P and TCS but not in MNCS, the mean percentile or the top papers.
+    """
+    from ragged import field_ragged
+
+    if counting not in COUNTING:
+        raise ValueError(f"counting must be one of {', '.join(COUNTING)}")
+    entity = field_ragged(df, field)
+    rows, ids = entity.rows, entity.ids
+    weight = np.ones(len(ids)) if counting == 'full' else 1.0 / entity.lengths[rows]
+    ncs = scores['NCS'].to_numpy(dtype=np.float64)[rows]
+    valid = ~np.isnan(ncs)
+
+    def total(values):
+        return np.bincount(ids, weights=weight * values, minlength=entity.n_values)
+
+    table = pd.DataFrame({ENTITY_NAMES.get(field, field): entity.table,
+                          'P': total(np.ones(len(ids))),
+                          'TCS': total(scores['Cited by'].to_numpy(dtype=np.float64)[rows]),
+                          'TNCS': total(np.where(valid, ncs, 0))})
+    scored = total(valid.astype(np.float64))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['MNCS'] = np.where(scored > 0, table['TNCS'] / np.where(scored > 0, scored, 1), np.nan)
+        percentile = scores['Percentile'].to_numpy(dtype=np.float64)[rows]
+        table['Mean_percentile'] = total(np.where(valid, np.nan_to_num(percentile), 0)) / np.where(
+            scored > 0, scored, np.nan)
+        for name in TOP_SHARES:
+            top = scores[name].to_numpy(dtype=np.float64)[rows]
+            table[f'P_{name.lower()}'] = total(np.where(valid, np.nan_to_num(top), 0))
+            table[f'PP_{name.lower()}'] = table[f'P_{name.lower()}'] / np.where(scored > 0, scored, np.nan)
+    return table
+
+
+def normalized_ranking(df, field='AU', subject=None, counting='full', min_papers=1):
+    """aggregate_normalized of the scores of a corpus, sorted by TNCS"""
+    if field == 'SO' and subject_column(df, subject) == FIELD_COLUMNS['SO']:
+        print("Note: without a subject column every source is its own field, so source MNCS is 1 by "
+              "construction; pass a subject column to compare sources")
+    table = aggregate_normalized(normalized_citations(df, subject), df, field, counting)
+    table = table[table['P'] >= min_papers]
+    return table.sort_values(['TNCS', 'MNCS'], ascending=False).reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    output_folder = 'normalized_citations'
+    os.makedirs(output_folder, exist_ok=True)
+    df = read_scopus_csv(file)
+    scores = normalized_citations(df)
+    scores.to_csv(os.path.join(output_folder, 'normalized_citations.csv'), index=False)
+    for field in ('AU', 'AU_CO', 'AU_UN'):
+        ranking = aggregate_normalized(scores, df, field).sort_values('TNCS', ascending=False)
+        ranking.to_csv(os.path.join(output_folder, f'normalized_ranking_{field}.csv'), index=False)
+        print(f"\n=== {ENTITY_NAMES[field]} ===")
+        print(ranking.head(10).to_string(index=False))
@@ -0,0 +1,319 @@
+import os
+import sys
+import csv
+import json
+import time
+import functools
+import importlib
+import importlib.util
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def load_script(filename):
+    """Import a script from Code/ by file name (works for names like 'co-ocurrence.py')"""
+    name = os.path.splitext(filename)[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(CODE_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss_mb():
+    """High-water mark of the resident set size of this process in MB"""
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 1024
+
+
+def describe_result(result):
+    """Row/edge counts for the kinds of objects the analyses return"""
+    if result is None:
+        return {}
+    if isinstance(result, tuple):
+        counts = {}
+        for i, item in enumerate(result):
+            counts.update({f'{k}_{i}': v for k, v in describe_result(item).items()})
+        return counts
+    if hasattr(result, 'number_of_edges'):  # networkx graph
+        return {'nodes': result.number_of_nodes(), 'edges': result.number_of_edges()}
+    if hasattr(result, 'nnz'):  # scipy sparse matrix
+        return {'rows': result.shape[0], 'nonzeros': int(result.nnz)}
+    if hasattr(result, 'shape'):  # DataFrame / Series / ndarray
+        return {'rows': int(result.shape[0])}
+    if isinstance(result, (list, dict, set)):
+        return {'rows': len(result)}
+    return {}
+
+
+class RunReport:
+    """Per-stage timings, memory use, counts and cache statistics for one analysis run
+
+    Stages are timed with the ``stage`` context manager; functions of existing
+    scripts can be timed without editing them through ``instrument``.
+    """
+
+    def __init__(self, name='run', trace_memory=False, profiler=None, profile_dir='profiles'):
+        if profiler not in (None, 'cprofile', 'pyinstrument'):
+            raise ValueError("profiler must be None, 'cprofile' or 'pyinstrument'")
+        self.name = name
+        self.trace_memory = trace_memory
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.started = datetime.now(timezone.utc).isoformat()
+        self.stages = []
+        self.calls = {}
+        self.caches = {}
+        self._tracked_caches = {}
+        self._stack = []
+        self._t0 = time.perf_counter()
+
+    # --- Stages ---------------------------------------------------------------
+
+    @contextmanager
+    def stage(self, name, **counts):
+        """Time a block of work; the yielded dict takes extra counts (rows=..., edges=...)"""
+        record = {'stage': name, 'parent': self._stack[-1]['stage'] if self._stack else None}
+        record.update(counts)
+        frame = {'stage': name, 'record': record, 'peak': 0}
+
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if self._stack:
+                # Keep the parent's peak before resetting it for this stage
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            frame['traced_start'] = tracemalloc.get_traced_memory()[0]
+
+        profiler = self._start_profiler() if not self._stack else None
+        self._stack.append(frame)
+        rss_start = current_rss_mb()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - wall
+            record['cpu_seconds'] = time.process_time() - cpu
+            rss_end = current_rss_mb()
+            record['rss_mb'] = rss_end
+            record['rss_delta_mb'] = None if rss_end is None or rss_start is None else rss_end - rss_start
+            record['max_rss_mb'] = max_rss_mb()
+            self._stack.pop()
+            if self.trace_memory:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                record['peak_traced_mb'] = (peak - frame['traced_start']) / 2**20
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            if profiler is not None:
+                record['profile'] = self._stop_profiler(profiler, name)
+            self.stages.append(record)
+
+    def add_counts(self, **counts):
+        """Attach counts to the innermost open stage"""
+        if not self._stack:
+            raise RuntimeError("add_counts() called outside of a stage")
+        self._stack[-1]['record'].update(counts)
+
+    def _start_profiler(self):
+        if self.profiler == 'cprofile':
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        if self.profiler == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise ImportError("profiler='pyinstrument' requires the pyinstrument package")
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+        return None
+
+    def _stop_profiler(self, profiler, stage):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        safe = ''.join(c if c.isalnum() or c in '-_' else '_' for c in stage)
+        if self.profiler == 'cprofile':
+            profiler.disable()
+            path = os.path.join(self.profile_dir, f'{self.name}_{safe}.prof')
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = os.path.join(self.profile_dir, f'{self.name}_{safe}.html')
+            with open(path, 'w') as f:
+                f.write(profiler.output_html())
+        return path
+
+    # --- Instrumentation of existing functions -----------------------------------
+
+    def _timed(self, label, func, as_stage):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if as_stage:
+                with self.stage(label) as record:
+                    result = func(*args, **kwargs)
+                    record.update(describe_result(result))
+                    return result
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats = self.calls.setdefault(label, {'calls': 0, 'seconds': 0.0, 'by_stage': {}})
+                elapsed = time.perf_counter() - t0
+                stats['calls'] += 1
+                stats['seconds'] += elapsed
+                owner = self._stack[-1]['stage'] if self._stack else None
+                stats['by_stage'][owner] = stats['by_stage'].get(owner, 0.0) + elapsed
+        return wrapper
+
+    @contextmanager
+    def instrument(self, targets, as_stages=()):
+        """Temporarily wrap functions so calls to them are timed
+
+        ``targets`` are ``(module, attribute)`` pairs or dotted names such as
+        ``'pandas.read_csv'``. Cheap per-call statistics are aggregated in
+        ``calls``; names listed in ``as_stages`` become full stages instead.
+        """
+        patched = []
+        try:
+            for target in targets:
+                module, attr = _resolve_target(target)
+                original = getattr(module, attr)
+                label = f'{module.__name__}.{attr}'
+                as_stage = attr in as_stages or label in as_stages
+                setattr(module, attr, self._timed(label, original, as_stage))
+                patched.append((module, attr, original))
+            yield self
+        finally:
+            for module, attr, original in reversed(patched):
+                setattr(module, attr, original)
+
+    # --- Caches -------------------------------------------------------------------
+
+    def track_cache(self, name, cached_function):
+        """Report hit rates of an ``functools.lru_cache``-style function (anything with cache_info())"""
+        info = cached_function.cache_info()
+        self._tracked_caches[name] = (cached_function, info.hits, info.misses)
+
+    def record_cache(self, name, hits=0, misses=0):
+        """Add hits/misses for caches that do not expose cache_info()"""
+        stats = self.caches.setdefault(name, {'hits': 0, 'misses': 0})
+        stats['hits'] += hits
+        stats['misses'] += misses
+
+    def _cache_stats(self):
+        stats = {name: dict(v) for name, v in self.caches.items()}
+        for name, (func, hits0, misses0) in self._tracked_caches.items():
+            info = func.cache_info()
+            entry = stats.setdefault(name, {'hits': 0, 'misses': 0})
+            entry['hits'] += info.hits - hits0
+            entry['misses'] += info.misses - misses0
+        for entry in stats.values():
+            total = entry['hits'] + entry['misses']
+            entry['hit_rate'] = entry['hits'] / total if total else None
+        return stats
+
+    # --- Output -------------------------------------------------------------------
+
+    def to_dict(self):
+        return {
+            'run': self.name,
+            'started': self.started,
+            'total_seconds': time.perf_counter() - self._t0,
+            'max_rss_mb': max_rss_mb(),
+            'stages': self.stages,
+            'calls': [{'function': k, **v} for k, v in self.calls.items()],
+            'caches': self._cache_stats(),
+        }
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        return path
+
+    def write_csv(self, path):
+        """One row per stage, instrumented function and cache"""
+        report = self.to_dict()
+        rows = [{'kind': 'stage', 'name': s['stage'], **{k: v for k, v in s.items() if k != 'stage'}}
+                for s in report['stages']]
+        rows += [{'kind': 'call', 'name': c['function'], 'calls': c['calls'], 'seconds': c['seconds']}
+                 for c in report['calls']]
+        rows += [{'kind': 'cache', 'name': k, **v} for k, v in report['caches'].items()]
+        fields = []
+        for row in rows:
+            fields.extend(k for k in row if k not in fields)
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def summary(self):
+        """Human-readable table of stages and the slowest instrumented functions"""
+        lines = [f"=== Run report: {self.name} ==="]
+        for s in self.stages:
+            indent = '  ' if s['parent'] else ''
+            mem = f", peak {s['peak_traced_mb']:.1f} MB traced" if 'peak_traced_mb' in s else ''
+            lines.append(f"{indent}{s['stage']}: {s['seconds']:.3f} s{mem}")
+        for name, stats in sorted(self.calls.items(), key=lambda x: -x[1]['seconds']):
+            lines.append(f"{name}: {stats['calls']} calls, {stats['seconds']:.3f} s")
+        for name, stats in self._cache_stats().items():
+            rate = 'n/a' if stats['hit_rate'] is None else f"{stats['hit_rate']:.1%}"
+            lines.append(f"cache {name}: {stats['hits']} hits, {stats['misses']} misses ({rate})")
+        return '\n'.join(lines)
+
+
+def _resolve_target(target):
+    if isinstance(target, tuple):
+        return target
+    module_name, _, attr = target.rpartition('.')
+    return importlib.import_module(module_name), attr
+
+
+def profile_script_function(script, function, args, watch=(), report=None, **kwargs):
+    """Run ``function(*args)`` from a script in Code/ with its helpers and pandas.read_csv timed"""
+    report = report or RunReport(name=f'{os.path.splitext(script)[0]}.{function}', **kwargs)
+    module = load_script(script)
+    targets = [(module, name) for name in watch] + ['pandas.read_csv']
+    with report.instrument(targets):
+        with report.stage(function) as record:
+            result = getattr(module, function)(*args)
+            record.update(describe_result(result))
+    return report, result
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run an analysis function and write a per-stage run report')
+    parser.add_argument('script', help="Script in Code/, e.g. 'bibliometri.py'")
+    parser.add_argument('function', help="Function to run, e.g. 'analyze_countries'")
+    parser.add_argument('args', nargs='*', help='Positional arguments passed to the function')
+    parser.add_argument('--watch', nargs='*', default=[], help="Helper functions to time, e.g. 'get_country'")
+    parser.add_argument('--report', default='run_report.json', help='JSON report path')
+    parser.add_argument('--csv', help='Optional CSV report path')
+    parser.add_argument('--trace-memory', action='store_true', help='Record tracemalloc peaks per stage')
+    parser.add_argument('--profiler', choices=['cprofile', 'pyinstrument'], help='Profile the top-level stage')
+    args = parser.parse_args()
+
+    report, _ = profile_script_function(args.script, args.function, args.args, watch=args.watch,
+                                        trace_memory=args.trace_memory, profiler=args.profiler)
+    print(report.summary())
+    print(f"Run report saved to: {report.write_json(args.report)}")
+    if args.csv:
+        print(f"CSV report saved to: {report.write_csv(args.csv)}")
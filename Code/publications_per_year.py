@@ -1,22 +1,51 @@
+import datetime
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-def calculate_annual_citation_metrics(df):
-    # Filter and calculate metrics
-    cited_articles = df[df['Cited by'] > 0].copy()
-
-    annual_metrics = cited_articles.groupby('Year').agg(
-        Total_Citations=('Cited by', 'sum'),
-        Cited_Articles=('Cited by', 'count')
+def annual_citations(df, reference_year=None):
+    """Articles, citations and biblioshiny's annual citation metrics per publication year
+
+    One grouped aggregation over the records with a year: N (articles),
+    Total_Citations, Cited_Articles, MeanTCperArt, CitableYears (reference
+    year - publication year + 1: the publication year counts, as in the
+    TC / (current year - PY + 1) of bibliometrix biblioAnalysis) and
+    MeanTCperYear = MeanTCperArt / CitableYears (NaN after the reference
+    year). The reference year defaults to the current year.
+    """
+    if reference_year is None:
+        reference_year = datetime.date.today().year
+    year = pd.to_numeric(df['Year'], errors='coerce')
+    cites = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0).astype(np.int64)
+    records = pd.DataFrame({'Year': year, 'TC': cites, 'Cited': cites > 0}).dropna(subset=['Year'])
+    records['Year'] = records['Year'].astype(np.int64)
+
+    annual_metrics = records.groupby('Year').agg(
+        N=('TC', 'size'),
+        Total_Citations=('TC', 'sum'),
+        Cited_Articles=('Cited', 'sum'),
+        MeanTCperArt=('TC', 'mean')
     ).reset_index()
 
+    annual_metrics['CitableYears'] = reference_year - annual_metrics['Year'] + 1
+    annual_metrics['MeanTCperYear'] = annual_metrics['MeanTCperArt'] / annual_metrics['CitableYears'].where(
+        annual_metrics['CitableYears'] > 0)
+    return annual_metrics
+
+def calculate_annual_citation_metrics(df):
+    # Total citations and cited articles of every year with at least one cited article
+    annual_metrics = annual_citations(df)
+    annual_metrics = annual_metrics[annual_metrics['Cited_Articles'] > 0].reset_index(drop=True)
+    annual_metrics = annual_metrics[['Year', 'Total_Citations', 'Cited_Articles']]
+
     annual_metrics['Citations_Per_Article'] = annual_metrics['Total_Citations'] / annual_metrics['Cited_Articles']
     annual_metrics['Year'] = annual_metrics['Year'].astype(str)  # Convert to category
 
     return annual_metrics
 
 def visualize_metrics(metrics):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     # Create figure and primary axis
     fig, ax1 = plt.subplots(figsize=(14, 7))
 
@@ -81,31 +110,16 @@ def visualize_metrics(metrics):
     # Show the chart
     plt.show()
 
-# Main execution
-df = pd.read_csv("Scopus_VR_ED_only_2024.csv")
-df['Cited by'] = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0).astype(int)
-annual_metrics = calculate_annual_citation_metrics(df)
-
-print("📊 Detailed Metrics:")
-print(annual_metrics.round(2))
-print("\n🔍 Statistical Summary:")
-print(annual_metrics.describe().round(2))
-
-# Visualize with improved axes
-visualize_metrics(annual_metrics)
-                                                                                                                                                                        
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                                                                                
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                              
-~                                                                                                                                                                                                                              
-~                                 
+
+if __name__ == '__main__':
+    df = pd.read_csv("Scopus_VR_ED_only_2024.csv")
+    df['Cited by'] = pd.to_numeric(df['Cited by'], errors='coerce').fillna(0).astype(int)
+    annual_metrics = calculate_annual_citation_metrics(df)
+
+    print("📊 Detailed Metrics:")
+    print(annual_metrics.round(2))
+    print("\n🔍 Statistical Summary:")
+    print(annual_metrics.describe().round(2))
+
+    # Visualize with improved axes
+    visualize_metrics(annual_metrics)
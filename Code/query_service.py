@@ -0,0 +1,373 @@
+"""Local HTTP/JSON service answering metric queries on one corpus
+
+    ./query_service.py Scopus_export.csv --port 8765
+    curl 'http://127.0.0.1:8765/production?start=2015&end=2024'
+    curl 'http://127.0.0.1:8765/ranking/country?by=citations&top=5&start=2020'
+    curl 'http://127.0.0.1:8765/entity/author?name=Smith J.'
+    curl 'http://127.0.0.1:8765/neighbours/keyword?name=virtual reality&top=10'
+    curl 'http://127.0.0.1:8765/sources?by=h_index&top=10'
+
+The export is read once; the authors, sources, countries and keywords of
+every paper are kept as ragged integer IDs into in-memory indexes, with the
+all-years rankings and the co-occurrence (Gram) matrices precomputed, so the
+queries above are numpy reductions answered in milliseconds on the event
+loop. Full analyses (source metrics, Lotka's law, three-field data) run in a
+pool of worker processes holding their own copy of the corpus. Everything is
+served on localhost by asyncio streams: no network access is needed.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import functools
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from fields import read_scopus_csv
+from indices import grouped_hg_index, top_k
+from ragged import corpus_fields, field_ragged
+
+YEAR_COLUMN = 'Year'
+CITATION_COLUMN = 'Cited by'
+# Entity kind in the URL -> bibliometrix field
+ENTITY_FIELDS = {'author': 'AU', 'source': 'SO', 'country': 'AU_CO', 'keyword': 'DE'}
+# Kinds with co-occurrence neighbours (co-authors, collaborating countries, co-word)
+NEIGHBOUR_KINDS = ('author', 'country', 'keyword')
+RANK_BY = ('articles', 'citations', 'h_index', 'g_index')
+HEAVY_RESULTS_KEPT = 128
+# Query parameters read as integers (every other parameter stays a string, so name=007 is kept);
+# the counts among them must not be negative
+INT_PARAMS = ('top', 'start', 'end', 'k', 'n_boot', 'reference_year')
+COUNT_PARAMS = ('top', 'k', 'n_boot')
+
+
+class EntityIndex:
+    """Entities of one field (a RaggedField) as integer codes, with the all-years totals precomputed"""
+
+    def __init__(self, field, cites, n_papers, neighbours=False):
+        names = field.table
+        self.names = pd.Index(names)
+        self.paper = field.rows
+        self.code = field.ids.astype(np.int64)
+        self._lookup = pd.Series(np.arange(len(names)), index=self.names.str.lower())
+        self._lookup = self._lookup[~self._lookup.index.duplicated()]
+        self.totals = self._totals(np.ones(len(self.code), dtype=bool), cites)
+        # Paper x entity incidence, CSC so the papers of an entity are one column slice
+        self.incidence = sparse.csc_matrix((np.ones(len(self.code), dtype=np.int32), (self.paper, self.code)),
+                                           shape=(n_papers, len(names)))
+        self.incidence.sort_indices()
+        self.gram = None
+        if neighbours:
+            gram = (self.incidence.T @ self.incidence).tocsr()
+            gram.setdiag(0)
+            gram.eliminate_zeros()
+            self.gram = gram
+
+    def _totals(self, mask, cites):
+        code = self.code[mask]
+        paper_cites = cites[self.paper[mask]]
+        n = len(self.names)
+        h, g = grouped_hg_index(code, paper_cites, n)
+        return pd.DataFrame({'articles': np.bincount(code, minlength=n),
+                             'citations': np.bincount(code, weights=paper_cites, minlength=n).astype(np.int64),
+                             'h_index': h, 'g_index': g})
+
+    def find(self, name):
+        """Code of an entity (case-insensitive exact name); KeyError with close matches otherwise"""
+        code = self._lookup.get(str(name).strip().lower())
+        if code is not None:
+            return int(code)
+        candidates = np.flatnonzero(self.names.str.contains(str(name).strip(), case=False, regex=False))
+        best = candidates[np.argsort(-self.totals['articles'].to_numpy()[candidates], kind='stable')[:5]]
+        raise KeyError(f"'{name}' not found" + (f"; did you mean: {'; '.join(self.names[best])}" if len(best) else ''))
+
+
+class CorpusIndex:
+    """In-memory indexes of one corpus for the query service"""
+
+    def __init__(self, df, kinds=None, fields=None):
+        self.n_papers = len(df)
+        self.year = pd.to_numeric(df[YEAR_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+        self.cites = pd.to_numeric(df[CITATION_COLUMN], errors='coerce').fillna(0).to_numpy(dtype=np.float64) \
+            if CITATION_COLUMN in df.columns else np.zeros(self.n_papers)
+        fields = fields or {}
+        self.entities = {}
+        for kind in kinds or ENTITY_FIELDS:
+            field = fields[kind] if kind in fields else field_ragged(df, ENTITY_FIELDS[kind])
+            self.entities[kind] = EntityIndex(field, self.cites, self.n_papers,
+                                              neighbours=kind in NEIGHBOUR_KINDS)
+
+        known = ~np.isnan(self.year)
+        year = self.year[known].astype(np.int64)
+        self.first_year = int(year.min()) if len(year) else 0
+        n_years = int(year.max()) - self.first_year + 1 if len(year) else 0
+        self.years = np.arange(self.first_year, self.first_year + n_years)
+        self.articles_per_year = np.bincount(year - self.first_year, minlength=n_years)
+        self.citations_per_year = np.bincount(year - self.first_year, weights=self.cites[known], minlength=n_years)
+
+    @classmethod
+    def from_export(cls, path, kinds=None, cache=None):
+        """Build the indexes of a CSV export; with a ResultCache the ragged fields are reused across runs"""
+        load = functools.lru_cache(maxsize=1)(read_scopus_csv)
+        kinds = list(kinds or ENTITY_FIELDS)
+        fields = {}
+        if cache is not None:
+            ragged = corpus_fields(path, [ENTITY_FIELDS[kind] for kind in kinds], cache=cache, load=load)
+            fields = {kind: ragged[ENTITY_FIELDS[kind]] for kind in kinds}
+        return cls(load(path), kinds=kinds, fields=fields)
+
+    def _entity(self, kind):
+        if kind not in self.entities:
+            raise KeyError(f"Unknown entity kind '{kind}' (available: {', '.join(self.entities)})")
+        return self.entities[kind]
+
+    def _in_years(self, start=None, end=None):
+        """Mask of the papers published in [start, end] (None when no bound is given)"""
+        if start is None and end is None:
+            return None
+        lo = -np.inf if start is None else start
+        hi = np.inf if end is None else end
+        return (self.year >= lo) & (self.year <= hi)
+
+    def production(self, start=None, end=None):
+        """Articles and citations per year"""
+        keep = (self.years >= (start if start is not None else -np.inf)) & \
+               (self.years <= (end if end is not None else np.inf))
+        return pd.DataFrame({'Year': self.years[keep], 'Articles': self.articles_per_year[keep],
+                             'Citations': self.citations_per_year[keep].astype(np.int64)})
+
+    def ranking(self, kind, by='articles', top=10, start=None, end=None):
+        """Top entities by articles, citations, h- or g-index, over all years or within [start, end]"""
+        if by not in RANK_BY:
+            raise ValueError(f"by must be one of {', '.join(RANK_BY)}")
+        entity = self._entity(kind)
+        papers = self._in_years(start, end)
+        totals = entity.totals if papers is None else entity._totals(papers[entity.paper], self.cites)
+        articles = totals['articles'].to_numpy()
+        # Entities without papers in the window never fill the ranking, even on ties at 0
+        score = np.where(articles > 0, totals[by].to_numpy(), -1)
+        k = min(int(top), int((articles > 0).sum()))
+        best = top_k(score, k, entity.names, -articles)
+        table = totals.iloc[best].reset_index(drop=True)
+        table.insert(0, kind.capitalize(), entity.names[best])
+        return table
+
+    def entity(self, kind, name, start=None, end=None):
+        """Articles, citations, h/g-index, active years and yearly production of one entity"""
+        entity = self._entity(kind)
+        code = entity.find(name)
+        indptr = entity.incidence.indptr
+        papers = entity.incidence.indices[indptr[code]:indptr[code + 1]]
+        in_range = self._in_years(start, end)
+        if in_range is not None:
+            papers = papers[in_range[papers]]
+        cites = self.cites[papers]
+        h, g = grouped_hg_index(np.zeros(len(papers), dtype=np.int64), cites, 1)
+        years = self.year[papers]
+        years = years[~np.isnan(years)].astype(np.int64)
+        per_year = pd.Series(years).value_counts().sort_index()
+        return {'name': entity.names[code], 'articles': int(len(papers)), 'citations': int(cites.sum()),
+                'h_index': int(h[0]), 'g_index': int(g[0]),
+                'first_year': int(years.min()) if len(years) else None,
+                'last_year': int(years.max()) if len(years) else None,
+                'production': {int(y): int(n) for y, n in per_year.items()}}
+
+    def neighbours(self, kind, name, top=10):
+        """Entities co-occurring most often with one entity (shared papers)"""
+        entity = self._entity(kind)
+        if entity.gram is None:
+            raise KeyError(f"No co-occurrence index for '{kind}' (available: {', '.join(NEIGHBOUR_KINDS)})")
+        code = entity.find(name)
+        row = entity.gram[code]
+        order = np.lexsort((-entity.totals['articles'].to_numpy()[row.indices], -row.data))[:int(top)]
+        return pd.DataFrame({kind.capitalize(): entity.names[row.indices[order]], 'Shared': row.data[order]})
+
+
+# -- worker processes (full analyses on the corpus) -------------------------
+
+_CORPUS = None
+
+
+def _init_worker(path):
+    global _CORPUS
+    if _CORPUS is None:
+        _CORPUS = read_scopus_csv(path)
+
+
+def _heavy_query(name, params):
+    """Run one of the full analyses on the worker's copy of the corpus"""
+    if name == 'sources':
+        from source_metrics import source_metrics
+        metrics, _ = source_metrics(_CORPUS, reference_year=params.get('reference_year'))
+        by = params.get('by', 'h_index')
+        if by not in metrics.columns:
+            raise ValueError(f"Unknown source metric '{by}'")
+        return metrics.sort_values([by, 'TC'], ascending=False).head(params.get('top', 10)).reset_index(drop=True)
+    if name == 'lotka':
+        from productivity_laws import lotka_law
+        table, summary = lotka_law(_CORPUS, field=params.get('field', 'AU'), n_boot=params.get('n_boot', 200))
+        return {'table': table, 'summary': summary}
+    if name == 'threefield':
+        from three_field import three_field_data
+        fields = params.get('fields', 'AU_CO,DE,AU_UN').split(',')
+        nodes, links = three_field_data(_CORPUS, fields=fields, k=params.get('k', 10))
+        return {'nodes': nodes, 'links': links}
+    raise KeyError(f"Unknown analysis '{name}'")
+
+
+def _json_default(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return json.loads(value.to_json(orient='records'))
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _query_params(query):
+    """Query string -> dict, INT_PARAMS converted (ValueError when not a valid number)"""
+    params = {}
+    for key, values in parse_qs(query, keep_blank_values=False).items():
+        value = values[-1]
+        if key in INT_PARAMS:
+            try:
+                value = int(value)
+            except ValueError:
+                raise ValueError(f"'{key}' must be an integer, not '{value}'") from None
+            if key in COUNT_PARAMS and value < 0:
+                raise ValueError(f"'{key}' must not be negative")
+        params[key] = value
+    return params
+
+
+class QueryService:
+    """asyncio HTTP server over a CorpusIndex, with a process pool for the full analyses"""
+
+    HEAVY = ('sources', 'lotka', 'threefield')
+
+    def __init__(self, index, path, workers=2):
+        self.index = index
+        self.path = path
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(path,)) if workers else None
+        self._results = OrderedDict()
+
+    def _light(self, parts, params):
+        start, end = params.get('start'), params.get('end')
+        if parts == ['health']:
+            return {'papers': self.index.n_papers, 'entities': {k: len(e.names) for k, e in self.index.entities.items()}}
+        if parts == ['production']:
+            return self.index.production(start, end)
+        if len(parts) == 2 and parts[0] == 'ranking':
+            return self.index.ranking(parts[1], by=params.get('by', 'articles'), top=params.get('top', 10),
+                                      start=start, end=end)
+        if len(parts) == 2 and parts[0] in ('entity', 'neighbours'):
+            if 'name' not in params:
+                raise ValueError("Missing 'name' parameter")
+            name = str(params['name'])
+            if parts[0] == 'entity':
+                return self.index.entity(parts[1], name, start, end)
+            return self.index.neighbours(parts[1], name, top=params.get('top', 10))
+        raise KeyError(f"Unknown endpoint '/{'/'.join(parts)}'")
+
+    async def _heavy(self, name, params):
+        """Full analyses run in the worker pool; recent results are kept in memory"""
+        key = (name, json.dumps(params, sort_keys=True))
+        if key in self._results:
+            self._results.move_to_end(key)
+            return self._results[key]
+        if self.pool is None:
+            raise KeyError(f"'/{name}' needs worker processes (--workers > 0)")
+        result = await asyncio.get_running_loop().run_in_executor(self.pool, _heavy_query, name, params)
+        self._results[key] = result
+        if len(self._results) > HEAVY_RESULTS_KEPT:
+            self._results.popitem(last=False)
+        return result
+
+    async def dispatch(self, method, target):
+        """(status, payload) of one request"""
+        if method != 'GET':
+            return 405, {'error': 'Only GET is supported'}
+        url = urlsplit(target)
+        parts = [p for p in url.path.split('/') if p]
+        started = time.perf_counter()
+        try:
+            params = _query_params(url.query)
+            if len(parts) == 1 and parts[0] in self.HEAVY:
+                result = await self._heavy(parts[0], params)
+            else:
+                result = self._light(parts, params)
+        except KeyError as exc:
+            return 404, {'error': exc.args[0] if exc.args else str(exc)}
+        except (ValueError, TypeError) as exc:
+            return 400, {'error': str(exc)}
+        return 200, {'query': url.path, 'params': params,
+                     'elapsed_ms': round(1000 * (time.perf_counter() - started), 3), 'result': result}
+
+    async def _handle(self, reader, writer):
+        """HTTP/1.1 with keep-alive; requests are read line by line from the stream"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                if int(headers.get('content-length', 0)):
+                    await reader.readexactly(int(headers['content-length']))
+
+                status, payload = await self.dispatch(method, target)
+                body = json.dumps(payload, default=_json_default).encode('utf-8')
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}[status]
+                writer.write(f'HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n'
+                             f'Content-Length: {len(body)}\r\n'
+                             f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self._handle, host, port)
+        print(f"Serving {self.index.n_papers} records of {self.path} on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def run(self, host='127.0.0.1', port=8765):
+        try:
+            asyncio.run(self.serve(host, port))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+
+
+def serve(path, host='127.0.0.1', port=8765, workers=2, cache=None):
+    """Load a corpus and serve it until interrupted"""
+    started = time.perf_counter()
+    index = CorpusIndex.from_export(path, cache=cache)
+    print(f"Indexes built in {time.perf_counter() - started:.1f} s")
+    QueryService(index, path, workers=workers).run(host, port)
+
+
+if __name__ == '__main__':
+    file = sys.argv[1] if len(sys.argv) > 1 else 'Scopus_VR_ED_full_filters.csv'
+    serve(file, port=int(os.environ.get('BIBLIOMETRIC_PORT', 8765)))
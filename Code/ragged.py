@@ -0,0 +1,189 @@
+import functools
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from fields import field_pairs, read_scopus_csv, split_field
+
+
+class RaggedField:
+    """Multi-valued field (authors, keywords, references...) as ragged integer arrays
+
+    Row ``i`` holds the value IDs ``ids[offsets[i]:offsets[i + 1]]`` (int32)
+    and every ID indexes ``table``, the distinct strings of the field in
+    order of first appearance. A value is stored once however many papers
+    share it, so the field costs 4 bytes per item plus 8 per row instead of
+    one Python string (and list slot) per item, and explode, group-by and
+    incidence builders are plain numpy operations on ``ids``.
+    """
+
+    def __init__(self, offsets, ids, table):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.table = np.asarray(table, dtype=object)
+
+    @classmethod
+    def from_pairs(cls, pairs, n_rows=None):
+        """Build from (paper, value) rows such as the output of split_field / field_pairs"""
+        paper = pairs['paper'].to_numpy(dtype=np.int64)
+        values = pairs['value'].to_numpy()
+        if len(paper) and (np.diff(paper) < 0).any():
+            order = np.argsort(paper, kind='stable')
+            paper, values = paper[order], values[order]
+        if n_rows is None:
+            n_rows = int(paper.max()) + 1 if len(paper) else 0
+        ids, table = pd.factorize(values)
+        offsets = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(paper, minlength=n_rows), out=offsets[1:])
+        return cls(offsets, ids, np.asarray(table, dtype=object))
+
+    @classmethod
+    def from_lists(cls, lists):
+        """Build from one list of strings per row"""
+        lengths = np.fromiter((len(items) for items in lists), dtype=np.int64)
+        values = [item for items in lists for item in items]
+        return cls.from_pairs(pd.DataFrame({'paper': np.repeat(np.arange(len(lengths)), lengths),
+                                            'value': pd.Series(values, dtype=object)}), len(lengths))
+
+    @classmethod
+    def from_values(cls, values, sep=';', regex=False, lower=False):
+        """Split a column of joined strings (items are stripped, empty items dropped)"""
+        return cls.from_pairs(split_field(values, sep=sep, regex=regex, lower=lower), len(values))
+
+    # -- shape ------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def n_values(self):
+        return len(self.table)
+
+    @property
+    def lengths(self):
+        """Number of items of every row"""
+        return np.diff(self.offsets)
+
+    @property
+    def rows(self):
+        """Row of every item (the exploded paper index)"""
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.lengths)
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.ids.nbytes + sum(len(s) for s in self.table)
+
+    def __getitem__(self, row):
+        return self.table[self.ids[self.offsets[row]:self.offsets[row + 1]]].tolist()
+
+    def __iter__(self):
+        """Rows as lists of strings, for code written against lists of lists"""
+        values = self.table[self.ids].tolist()
+        for start, end in zip(self.offsets[:-1], self.offsets[1:]):
+            yield values[start:end]
+
+    # -- derived views ----------------------------------------------------
+
+    def pairs(self):
+        """(paper, value) rows, as returned by split_field"""
+        return pd.DataFrame({'paper': self.rows, 'value': self.table[self.ids]})
+
+    def unique(self):
+        """Same field with repeated values inside a row dropped (first occurrence kept)"""
+        key = self.rows * max(self.n_values, 1) + self.ids
+        _, first = np.unique(key, return_index=True)
+        keep = np.zeros(len(self.ids), dtype=bool)
+        keep[first] = True
+        offsets = np.zeros_like(self.offsets)
+        np.cumsum(np.bincount(self.rows[keep], minlength=len(self)), out=offsets[1:])
+        return RaggedField(offsets, self.ids[keep], self.table)
+
+    def counts(self):
+        """Occurrences of every value (papers per value for a field without repeats)"""
+        return np.bincount(self.ids, minlength=self.n_values)
+
+    def incidence(self, dtype=np.float64):
+        """Sparse (rows x values) incidence, built directly on the ragged arrays (repeats add up)"""
+        matrix = sparse.csr_matrix((np.ones(len(self.ids), dtype=dtype), self.ids, self.offsets),
+                                   shape=(len(self), self.n_values))
+        matrix.sum_duplicates()
+        return matrix
+
+    def take(self, rows):
+        """Field restricted to some rows (positions or a boolean mask), in the given order"""
+        rows = np.arange(len(self))[rows] if np.asarray(rows).dtype == bool else np.asarray(rows, dtype=np.int64)
+        lengths = self.lengths[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        starts = np.repeat(self.offsets[rows] - offsets[:-1], lengths)
+        return RaggedField(offsets, self.ids[np.arange(offsets[-1]) + starts], self.table)
+
+    def select(self, mask):
+        """Keep only the values whose ``mask[id]`` is true (IDs and table are left unchanged)"""
+        keep = np.asarray(mask, dtype=bool)[self.ids]
+        offsets = np.zeros_like(self.offsets)
+        np.cumsum(np.bincount(self.rows[keep], minlength=len(self)), out=offsets[1:])
+        return RaggedField(offsets, self.ids[keep], self.table)
+
+    def lower(self):
+        """Same field with lower-cased values; values equal but for case share one ID (once per row)"""
+        ids, table = pd.factorize(pd.Series(self.table, dtype=object).str.lower())
+        return RaggedField(self.offsets, ids[self.ids], np.asarray(table, dtype=object)).unique()
+
+    # -- serialization ----------------------------------------------------
+
+    def to_arrays(self):
+        """Plain numeric arrays (the table as one UTF-8 buffer and its offsets), no pickling needed"""
+        encoded = [s.encode('utf-8') for s in self.table.astype(str)]
+        table_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in encoded], out=table_offsets[1:])
+        return {'offsets': self.offsets, 'ids': self.ids,
+                'table_bytes': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+                'table_offsets': table_offsets}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        buffer = np.asarray(arrays['table_bytes'], dtype=np.uint8).tobytes()
+        bounds = np.asarray(arrays['table_offsets'], dtype=np.int64)
+        table = [buffer[a:b].decode('utf-8') for a, b in zip(bounds[:-1], bounds[1:])]
+        return cls(arrays['offsets'], arrays['ids'], np.array(table, dtype=object))
+
+    def save(self, path):
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls.from_arrays(arrays)
+
+    def __getstate__(self):
+        return self.to_arrays()
+
+    def __setstate__(self, state):
+        restored = RaggedField.from_arrays(state)
+        self.offsets, self.ids, self.table = restored.offsets, restored.ids, restored.table
+
+
+def field_ragged(df, field, lower=None):
+    """Distinct values of a field per paper (as field_pairs) in ragged form"""
+    return RaggedField.from_pairs(field_pairs(df, field, lower=lower), len(df))
+
+
+def field_arrays(df, field, lower=None):
+    """field_ragged as plain arrays, the form kept in the result cache"""
+    return field_ragged(df, field, lower=lower).to_arrays()
+
+
+def corpus_fields(path, fields, cache=None, load=read_scopus_csv):
+    """Ragged fields of a CSV export, split once and kept next to the result cache
+
+    With a ResultCache the arrays of every field are stored as .npy files
+    keyed on the export's content, so later runs read them back without
+    loading the CSV or splitting any string; the export is read at most once
+    (only when some field is missing from the cache).
+    """
+    load = functools.lru_cache(maxsize=1)(load)
+    if cache is None:
+        df = load(path)
+        return {field: field_ragged(df, field) for field in fields}
+    return {field: RaggedField.from_arrays(cache.call(field_arrays, path, field, load=load)) for field in fields}
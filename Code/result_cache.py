@@ -0,0 +1,410 @@
+"""Content-addressed disk cache for expensive analysis results
+
+    cache = ResultCache('.bibliometric_cache', max_bytes=2 * 1024 ** 3)
+    countries = cache.memoize(analyze_countries, ignore=('output_folder',))
+    production_df, citation_df = countries('Scopus_export.csv')   # computed
+    production_df, citation_df = countries('Scopus_export.csv')   # read back from disk
+
+Entries are keyed by the content hash of the corpus (the file bytes, or the
+values of a DataFrame), the function and its loader, the hash of every module
+of the package (a helper the function imports may change its result), the
+user-edited tables registered with register_state and the other parameters,
+so editing the export or the code gives a new key. Results
+are stored as Parquet (DataFrame / Series), .npy (arrays) or .npz (sparse
+matrices) inside tuples/dicts; anything else is pickled. The least recently
+used entries are evicted when the cache grows past ``max_bytes``.
+"""
+import os
+import json
+import time
+import shutil
+import pickle
+import hashlib
+import inspect
+import functools
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+DEFAULT_DIR = os.environ.get('BIBLIOMETRIC_CACHE_DIR', '.bibliometric_cache')
+DEFAULT_MAX_BYTES = int(os.environ.get('BIBLIOMETRIC_CACHE_BYTES', 2 * 1024 ** 3))
+SPEC_FILE = 'spec.json'
+# Small containers are stored element by element, larger ones are pickled whole
+MAX_CONTAINER_ITEMS = 64
+
+
+def _digest(*parts):
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def file_hash(path, block_size=1 << 20):
+    """Content hash of a file, read in blocks"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def frame_hash(df):
+    """Content hash of a DataFrame: vectorised row hashes of all values plus the column labels"""
+    rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return _digest(rows.tobytes(), json.dumps([str(c) for c in df.columns]), df.shape)
+
+
+@functools.lru_cache(maxsize=None)
+def _source_hash(path):
+    return file_hash(path) if path and os.path.exists(path) else ''
+
+
+@functools.lru_cache(maxsize=None)
+def _package_hash(directory):
+    """Hash of every .py file under a directory (the package's own modules)"""
+    parts = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(('.', '__')))
+        parts.extend((os.path.relpath(os.path.join(root, f), directory), _source_hash(os.path.join(root, f)))
+                     for f in sorted(files) if f.endswith('.py'))
+    return _digest(*(f'{name}:{digest}' for name, digest in parts))
+
+
+# Module-level tables edited by the user that results depend on besides their arguments
+# (e.g. manual institution merges); name -> function returning the table. Memo tables
+# filled as the code runs (resolved countries...) must not be registered: they would
+# change every key after each lookup
+_STATE = {}
+
+
+def register_state(name, getter):
+    """Hash the (JSON-able) value of ``getter()`` into every key while it is not empty"""
+    _STATE[name] = getter
+
+
+def _state_hash():
+    values = [(name, getter()) for name, getter in sorted(_STATE.items())]
+    return _digest(*(f'{name}={_json_params(value)}' for name, value in values if value))
+
+
+def _json_params(params):
+    return json.dumps(params, sort_keys=True, default=repr)
+
+
+def _plain(value):
+    """numpy scalars -> Python scalars so they fit in the JSON spec"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ResultCache:
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = {}
+        self.misses = {}
+        self._file_hashes = {}
+        # Bytes of the entries as last seen by this process (None: not scanned yet)
+        self._bytes = None
+        os.makedirs(directory, exist_ok=True)
+
+    # -- corpus hashing ---------------------------------------------------
+
+    def _hash_file(self, path):
+        """File hashes are remembered per (path, size, mtime) on disk, so a large export is hashed once"""
+        stat = os.stat(path)
+        stamp = f'{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}'
+        if stamp not in self._file_hashes:
+            memo_path = os.path.join(self.directory, 'file_hashes.json')
+            try:
+                with open(memo_path) as fh:
+                    memo = json.load(fh)
+            except (OSError, ValueError):
+                memo = {}
+            if stamp not in memo:
+                memo[stamp] = file_hash(path)
+                tmp = memo_path + f'.{os.getpid()}.tmp'
+                with open(tmp, 'w') as fh:
+                    json.dump(memo, fh)
+                os.replace(tmp, memo_path)
+            self._file_hashes[stamp] = memo[stamp]
+        return self._file_hashes[stamp]
+
+    def corpus_hash(self, corpus):
+        """Content hash of a corpus given as a file path or a DataFrame"""
+        if isinstance(corpus, pd.DataFrame):
+            return frame_hash(corpus)
+        if isinstance(corpus, (str, os.PathLike)) and os.path.isfile(corpus):
+            return self._hash_file(corpus)
+        raise TypeError(f"Cannot hash corpus of type {type(corpus).__name__}")
+
+    def key(self, name, corpus_hash, params, code_hash='', version=1):
+        return _digest(name, corpus_hash, code_hash, version, _json_params(params))
+
+    # -- storage ----------------------------------------------------------
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _dump(self, value, folder, stem):
+        """Write ``value`` under ``folder`` and return the JSON spec to read it back"""
+        if isinstance(value, pd.DataFrame):
+            labels = list(value.columns)
+            frame = value.copy(deep=False)
+            frame.columns = [str(c) for c in labels]
+            file = stem + '.parquet'
+            frame.to_parquet(os.path.join(folder, file))
+            return {'type': 'frame', 'file': file, 'columns': [_plain(c) for c in labels]}
+        if isinstance(value, pd.Series):
+            spec = self._dump(value.to_frame('values'), folder, stem)
+            return {**spec, 'type': 'series', 'name': _plain(value.name)}
+        if sparse.issparse(value):
+            file = stem + '.npz'
+            sparse.save_npz(os.path.join(folder, file), sparse.csr_matrix(value))
+            return {'type': 'sparse', 'file': file, 'format': value.format}
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            file = stem + '.npy'
+            np.save(os.path.join(folder, file), value, allow_pickle=False)
+            return {'type': 'array', 'file': file}
+        if isinstance(value, (tuple, list)) and len(value) <= MAX_CONTAINER_ITEMS:
+            return {'type': type(value).__name__,
+                    'items': [self._dump(v, folder, f'{stem}_{i}') for i, v in enumerate(value)]}
+        if isinstance(value, dict) and len(value) <= MAX_CONTAINER_ITEMS and all(isinstance(k, str) for k in value):
+            return {'type': 'dict',
+                    'items': {k: self._dump(v, folder, f'{stem}_{i}') for i, (k, v) in enumerate(value.items())}}
+        value = _plain(value)
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return {'type': 'value', 'value': value}
+        return self._pickle(value, folder, stem)
+
+    def _pickle(self, value, folder, stem):
+        file = stem + '.pkl'
+        with open(os.path.join(folder, file), 'wb') as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        return {'type': 'pickle', 'file': file}
+
+    def _load(self, spec, folder):
+        kind = spec['type']
+        if kind in ('frame', 'series'):
+            frame = pd.read_parquet(os.path.join(folder, spec['file']))
+            frame.columns = spec['columns']
+            return frame['values'].rename(spec['name']) if kind == 'series' else frame
+        if kind == 'sparse':
+            return sparse.load_npz(os.path.join(folder, spec['file'])).asformat(spec['format'])
+        if kind == 'array':
+            return np.load(os.path.join(folder, spec['file']), allow_pickle=False)
+        if kind in ('tuple', 'list'):
+            items = [self._load(s, folder) for s in spec['items']]
+            return tuple(items) if kind == 'tuple' else items
+        if kind == 'dict':
+            return {k: self._load(s, folder) for k, s in spec['items'].items()}
+        if kind == 'value':
+            return spec['value']
+        with open(os.path.join(folder, spec['file']), 'rb') as fh:
+            return pickle.load(fh)
+
+    def get(self, key):
+        """(True, value) on a hit, (False, None) on a miss; a hit refreshes the entry's LRU time"""
+        folder = self._path(key)
+        spec_path = os.path.join(folder, SPEC_FILE)
+        try:
+            with open(spec_path) as fh:
+                entry = json.load(fh)
+            value = self._load(entry['value'], folder)
+        except (OSError, ValueError, KeyError):
+            return False, None
+        os.utime(spec_path)
+        return True, value
+
+    def put(self, key, value, **meta):
+        """Store a result; entries larger than the whole budget are not kept
+
+        The entry is written to a private folder and renamed into place, so
+        processes sharing the cache never see half-written entries; when
+        another process stored the same key first, its entry is kept.
+        """
+        folder = self._path(key)
+        tmp = folder + f'.{os.getpid()}.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            spec = self._dump(value, tmp, 'value')
+        except Exception:
+            # Values Parquet cannot store (mixed-type object columns...) are pickled whole
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            try:
+                spec = self._pickle(value, tmp, 'value')
+            except Exception:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+        size = sum(e.stat().st_size for e in os.scandir(tmp))
+        if size > self.max_bytes:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return False
+        with open(os.path.join(tmp, SPEC_FILE), 'w') as fh:
+            json.dump({'key': key, 'size': size, 'created': time.time(), 'value': spec, **meta}, fh, default=repr)
+        try:
+            os.replace(tmp, folder)
+        except OSError:
+            # The folder exists: a complete entry (spec.json is written last) of the same key holds
+            # the same value and is kept; a broken one is replaced, unless another process is faster
+            if os.path.exists(os.path.join(folder, SPEC_FILE)):
+                shutil.rmtree(tmp, ignore_errors=True)
+                return True
+            shutil.rmtree(folder, ignore_errors=True)
+            try:
+                os.replace(tmp, folder)
+            except OSError:
+                shutil.rmtree(tmp, ignore_errors=True)
+                return False
+        if self._bytes is None:
+            self._bytes = int(self.entries()['size'].sum())
+        else:
+            self._bytes += size
+        if self._bytes > self.max_bytes:
+            self.evict()
+        return True
+
+    # -- bookkeeping ------------------------------------------------------
+
+    def entries(self):
+        """One row per cache entry: key, function, corpus hash, size and last access time"""
+        rows = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                spec_path = os.path.join(entry.path, SPEC_FILE)
+                if entry.name.endswith('.tmp'):
+                    continue
+                # Another process may evict or replace the entry while it is read
+                try:
+                    with open(spec_path) as fh:
+                        spec = json.load(fh)
+                    last_access = os.path.getmtime(spec_path)
+                except (OSError, ValueError):
+                    continue
+                rows.append({'key': entry.name, 'function': spec.get('function'), 'corpus': spec.get('corpus'),
+                             'size': spec.get('size', 0), 'last_access': last_access,
+                             'params': spec.get('params')})
+        return pd.DataFrame(rows, columns=['key', 'function', 'corpus', 'size', 'last_access', 'params'])
+
+    def evict(self, max_bytes=None):
+        """Remove least recently used entries until the cache fits in ``max_bytes``"""
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries().sort_values('last_access')
+        excess = entries['size'].sum() - budget
+        removed = 0
+        for key, size in zip(entries['key'], entries['size']):
+            if excess <= 0:
+                break
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            excess -= size
+            removed += 1
+        self._bytes = int(excess + budget)
+        return removed
+
+    def invalidate(self, function=None, corpus=None):
+        """Remove the entries of a function (name), of a corpus (path, DataFrame or hash), or all of them"""
+        entries = self.entries()
+        match = np.ones(len(entries), dtype=bool)
+        if function is not None:
+            name = function if isinstance(function, str) else f'{function.__module__}.{function.__qualname__}'
+            functions = entries['function'].astype(str)
+            match &= ((functions == name) | functions.str.endswith('.' + name)).to_numpy()
+        if corpus is not None:
+            digest = corpus if isinstance(corpus, str) and not os.path.exists(corpus) else self.corpus_hash(corpus)
+            match &= (entries['corpus'] == digest).to_numpy()
+        for key in entries['key'][match]:
+            shutil.rmtree(self._path(key), ignore_errors=True)
+        self._bytes = int(entries['size'][~match].sum())
+        return int(match.sum())
+
+    def clear(self):
+        return self.invalidate()
+
+    def stats(self):
+        entries = self.entries()
+        return {'entries': len(entries), 'bytes': int(entries['size'].sum()), 'max_bytes': self.max_bytes,
+                'hits': sum(self.hits.values()), 'misses': sum(self.misses.values())}
+
+    # -- memoization ------------------------------------------------------
+
+    def _code_hash(self, func, load=None):
+        """Hash of the package's modules (those of ``func`` and of this cache), the loader and
+        the registered user-edited tables"""
+        directories = {os.path.dirname(os.path.abspath(__file__))}
+        for f in (func, load):
+            try:
+                directories.add(os.path.dirname(os.path.abspath(inspect.getsourcefile(f))))
+            except TypeError:
+                pass
+        loader = f'{load.__module__}.{load.__qualname__}' if load is not None else ''
+        return _digest(*(_package_hash(d) for d in sorted(directories)), loader, _state_hash())
+
+    def call(self, func, corpus, *args, load=None, ignore=(), version=1, **kwargs):
+        """``func(data, *args, **kwargs)`` through the cache
+
+        The key is the content hash of ``corpus`` (an export path or a
+        DataFrame), the function and loader names, the hash of the package's
+        modules and registered user-edited tables, ``version`` and the other bound
+        arguments minus ``ignore`` (output folders, plot-only options). ``data`` is ``load(corpus)`` when ``load`` is given,
+        so a hit keyed on the export file does not even read it.
+        """
+        signature = inspect.signature(func)
+        bound = signature.bind(None, *args, **kwargs)
+        bound.apply_defaults()
+        first = next(iter(signature.parameters))
+        params = {k: v for k, v in bound.arguments.items() if k != first and k not in ignore}
+        name = f'{func.__module__}.{func.__qualname__}'
+        corpus_key = self.corpus_hash(corpus)
+        key = self.key(name, corpus_key, params, self._code_hash(func, load), version)
+        hit, value = self.get(key)
+        if hit:
+            self.hits[name] = self.hits.get(name, 0) + 1
+            return value
+        self.misses[name] = self.misses.get(name, 0) + 1
+        value = func(load(corpus) if load is not None else corpus, *args, **kwargs)
+        try:
+            self.put(key, value, function=name, corpus=corpus_key, params=_json_params(params))
+        except Exception as e:
+            # A cache that cannot be written (full disk, concurrent cleanup...) must not fail the analysis
+            print(f"Warning: result of {name} not cached: {e}")
+        return value
+
+    def memoize(self, func=None, *, ignore=(), version=1):
+        """Decorator form of ``call``: the first parameter of ``func`` is the corpus"""
+        if func is None:
+            return functools.partial(self.memoize, ignore=ignore, version=version)
+
+        @functools.wraps(func)
+        def wrapper(corpus, *args, **kwargs):
+            return self.call(func, corpus, *args, ignore=ignore, version=version, **kwargs)
+
+        wrapper.cache = self
+        return wrapper
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect or clean the result cache')
+    parser.add_argument('action', choices=['stats', 'list', 'evict', 'clear', 'invalidate'])
+    parser.add_argument('--cache-dir', default=DEFAULT_DIR)
+    parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_BYTES)
+    parser.add_argument('--function', help='Function name for invalidate')
+    parser.add_argument('--corpus', help='Corpus file (or hash) for invalidate')
+    args = parser.parse_args()
+
+    cache = ResultCache(args.cache_dir, args.max_bytes)
+    if args.action == 'stats':
+        print(json.dumps(cache.stats(), indent=2))
+    elif args.action == 'list':
+        print(cache.entries().drop(columns='params').to_string(index=False))
+    elif args.action == 'evict':
+        print(f"{cache.evict()} entries evicted")
+    elif args.action == 'clear':
+        print(f"{cache.clear()} entries removed")
+    else:
+        print(f"{cache.invalidate(function=args.function, corpus=args.corpus)} entries removed")
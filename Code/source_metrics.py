@@ -0,0 +1,131 @@
+import os
+import numpy as np
+import pandas as pd
+
+from fields import read_scopus_csv
+from indices import grouped_hg_index
+
+SOURCE_COLUMNS = ['Source title', 'Journal', 'Publication Name']
+YEAR_COLUMNS = ['Year', 'Publication Year', 'Year of Publication']
+
+
+def _find_column(df, candidates, what):
+    column = next((col for col in candidates if col in df.columns), None)
+    if column is None:
+        raise ValueError(f"No column with {what} information found")
+    return column
+
+
+def source_metrics(df, reference_year=None):
+    """Impact metrics for every source (journal, proceedings...) in one pass
+
+    Returns one row per source with NP (publications), TC (total citations),
+    mean citations, h/g/m-index and the first publication year (PY_start),
+    plus a source x year table of publication counts. ``reference_year``
+    (default: last year in the data) is the "current" year of the m-index.
+    """
+    source_col = _find_column(df, SOURCE_COLUMNS, 'source')
+    year_col = _find_column(df, YEAR_COLUMNS, 'year')
+
+    data = pd.DataFrame({
+        'source': df[source_col],
+        'year': pd.to_numeric(df[year_col], errors='coerce'),
+        'cited_by': pd.to_numeric(df['Cited by'], errors='coerce').fillna(0) if 'Cited by' in df.columns else 0,
+    }).dropna(subset=['source', 'year'])
+    year = data['year'].to_numpy(dtype=np.int64)
+    cites = data['cited_by'].to_numpy(dtype=np.float64)
+    codes, sources = pd.factorize(data['source'])
+    n_sources = len(sources)
+
+    # Sums, counts and first years as grouped reductions over integer codes
+    n_pubs = np.bincount(codes, minlength=n_sources)
+    total_cites = np.bincount(codes, weights=cites, minlength=n_sources)
+    first_year = np.full(n_sources, np.iinfo(np.int64).max)
+    np.minimum.at(first_year, codes, year)
+    h, g = grouped_hg_index(codes, cites, n_sources)
+
+    if reference_year is None:
+        reference_year = int(year.max()) if len(year) else 0
+    years_active = np.maximum(reference_year - first_year + 1, 1)
+
+    metrics = pd.DataFrame({
+        'Source': np.asarray(sources),
+        'NP': n_pubs,
+        'TC': total_cites.astype(np.int64),
+        'Mean_TC': total_cites / np.maximum(n_pubs, 1),
+        'h_index': h,
+        'g_index': g,
+        'm_index': h / years_active,
+        'PY_start': first_year,
+    }).sort_values(['h_index', 'TC'], ascending=False).reset_index(drop=True)
+
+    # Publications per year: one bincount over combined (source, year) codes
+    y0 = int(year.min()) if len(year) else 0
+    n_years = int(year.max()) - y0 + 1 if len(year) else 0
+    counts = np.bincount(codes * n_years + (year - y0), minlength=n_sources * n_years)
+    per_year = pd.DataFrame(counts.reshape(n_sources, n_years), index=np.asarray(sources),
+                            columns=np.arange(y0, y0 + n_years))
+    per_year.index.name = 'Source'
+    return metrics, per_year
+
+
+def bradford_zones(df):
+    """Bradford's law zones: sources ranked by productivity, split into three zones
+    holding about one third of the articles each (as bibliometrix bradford())
+    """
+    source_col = _find_column(df, SOURCE_COLUMNS, 'source')
+    freq = df[source_col].dropna().value_counts()
+    table = pd.DataFrame({'Source': freq.index, 'Rank': np.arange(1, len(freq) + 1), 'Freq': freq.to_numpy()})
+    table['cumFreq'] = table['Freq'].cumsum()
+    total = table['cumFreq'].iloc[-1] if len(table) else 0
+    breaks = [0, round(total / 3), round(2 * total / 3), total]
+    zone = np.searchsorted(breaks[1:], table['cumFreq'].to_numpy(), side='left') + 1
+    table['Zone'] = ['Zone ' + str(z) for z in np.minimum(zone, 3)]
+    return table
+
+
+def plot_source_metric(metrics, metric='h_index', top_n=10, output_folder='source_analysis'):
+    """Horizontal bar chart of the top sources by one metric"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    os.makedirs(output_folder, exist_ok=True)
+    top = metrics.nlargest(top_n, metric).sort_values(metric, ascending=True)
+    fig, ax = plt.subplots(figsize=(12, 8))
+    bars = ax.barh(top['Source'], top[metric], color=sns.color_palette("viridis", len(top)))
+    for bar in bars:
+        width = bar.get_width()
+        ax.text(width, bar.get_y() + bar.get_height() / 2, f' {width:.2f}' if metric == 'm_index' else f' {int(width)}',
+                ha='left', va='center', fontsize=11)
+    ax.set_title(f'Top {top_n} Sources by {metric}', pad=20, fontsize=16)
+    ax.set_xlabel(metric, labelpad=10)
+    ax.grid(axis='x', alpha=0.3)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+
+    output_path = os.path.join(output_folder, f'top_sources_by_{metric}.png')
+    plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close()
+    print(f"Chart saved: {output_path}")
+    return output_path
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    output_folder = 'source_analysis'
+    os.makedirs(output_folder, exist_ok=True)
+
+    df = read_scopus_csv(file)
+    metrics, per_year = source_metrics(df)
+    zones = bradford_zones(df)
+    metrics.to_csv(os.path.join(output_folder, 'source_metrics.csv'), index=False)
+    per_year.to_csv(os.path.join(output_folder, 'source_publications_per_year.csv'))
+    zones.to_csv(os.path.join(output_folder, 'bradford_zones.csv'), index=False)
+
+    print("\nTop sources by h-index:")
+    print(metrics.head(10).to_string(index=False))
+    print("\nBradford zones:")
+    print(zones.groupby('Zone').agg(Sources=('Source', 'count'), Articles=('Freq', 'sum')))
+    plot_source_metric(metrics, 'h_index', output_folder=output_folder)
@@ -0,0 +1,330 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Vocabularies used to build names, institutions and text fields
+SURNAMES = [
+    'Garcia', 'Smith', 'Wang', 'Li', 'Zhang', 'Liu', 'Chen', 'Yang', 'Huang', 'Zhao',
+    'Rodriguez', 'Martinez', 'Lopez', 'Gonzalez', 'Fernandez', 'Perez', 'Sanchez', 'Romero',
+    'Johnson', 'Williams', 'Brown', 'Jones', 'Miller', 'Davis', 'Wilson', 'Anderson', 'Taylor',
+    'Thomas', 'Moore', 'Jackson', 'Martin', 'Lee', 'Kim', 'Park', 'Choi', 'Jung', 'Kang',
+    'Muller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Meyer', 'Wagner', 'Becker',
+    'Rossi', 'Russo', 'Ferrari', 'Esposito', 'Bianchi', 'Romano', 'Colombo', 'Ricci',
+    'Dubois', 'Durand', 'Leroy', 'Moreau', 'Simon', 'Laurent', 'Lefebvre', 'Michel',
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Pereira', 'Costa', 'Carvalho', 'Almeida',
+    'Yilmaz', 'Kaya', 'Demir', 'Sahin', 'Celik', 'Papadopoulos', 'Nikolaidis', 'Georgiou',
+    'Tanaka', 'Suzuki', 'Takahashi', 'Watanabe', 'Ito', 'Nakamura', 'Kobayashi', 'Sato',
+    'Ivanov', 'Smirnov', 'Kuznetsov', 'Popov', 'Nowak', 'Kowalski', 'Wisniewski', 'Novak',
+    'Jensen', 'Nielsen', 'Hansen', 'Andersson', 'Johansson', 'Karlsson', 'Nilsson', 'Virtanen',
+    'Patel', 'Sharma', 'Singh', 'Kumar', 'Gupta', 'Khan', 'Ahmed', 'Ali', 'Hassan', 'Hussain',
+    'Conde', 'Torres', 'Vazquez', 'Castro', 'Ortega', 'Rubio', 'Molina', 'Delgado', 'Morales',
+]
+GIVEN_NAMES = [
+    'Daniel', 'Maria', 'Jose', 'Ana', 'David', 'Laura', 'Carlos', 'Elena', 'Javier', 'Lucia',
+    'John', 'Mary', 'James', 'Sarah', 'Michael', 'Emma', 'Robert', 'Anna', 'William', 'Julia',
+    'Wei', 'Jing', 'Hao', 'Yan', 'Lei', 'Min', 'Jun', 'Xin', 'Tao', 'Ying',
+    'Hans', 'Petra', 'Klaus', 'Sabine', 'Marco', 'Giulia', 'Luca', 'Chiara', 'Pierre', 'Claire',
+    'Ji-Hoon', 'Seo-Yeon', 'Hiroshi', 'Yuki', 'Ahmet', 'Ayse', 'Nikos', 'Eleni', 'Rahul', 'Priya',
+    'Joao', 'Beatriz', 'Lars', 'Ingrid', 'Olga', 'Ivan', 'Piotr', 'Katarzyna', 'Omar', 'Fatima',
+]
+INITIALS = 'ABCDEFGHIJKLMNOPRSTVW'
+
+# (country, relative weight, cities)
+COUNTRIES = [
+    ('China', 30, ['Beijing', 'Shanghai', 'Wuhan', 'Hangzhou']),
+    ('United States', 25, ['Boston', 'Stanford', 'Chicago', 'Seattle']),
+    ('Spain', 9, ['Madrid', 'Barcelona', 'Santiago de Compostela', 'Valencia']),
+    ('United Kingdom', 8, ['London', 'Oxford', 'Manchester', 'Edinburgh']),
+    ('Germany', 7, ['Berlin', 'Munich', 'Hamburg', 'Aachen']),
+    ('Australia', 5, ['Sydney', 'Melbourne', 'Brisbane']),
+    ('Turkey', 5, ['Ankara', 'Istanbul', 'Izmir']),
+    ('South Korea', 5, ['Seoul', 'Daejeon', 'Busan']),
+    ('Canada', 4, ['Toronto', 'Montreal', 'Vancouver']),
+    ('Greece', 4, ['Athens', 'Thessaloniki', 'Patras']),
+    ('Italy', 4, ['Rome', 'Milan', 'Bologna']),
+    ('France', 4, ['Paris', 'Lyon', 'Grenoble']),
+    ('Japan', 4, ['Tokyo', 'Kyoto', 'Osaka']),
+    ('Brazil', 3, ['Sao Paulo', 'Rio de Janeiro', 'Campinas']),
+    ('India', 3, ['Delhi', 'Bangalore', 'Mumbai']),
+    ('Portugal', 2, ['Lisbon', 'Porto', 'Braga']),
+    ('Netherlands', 2, ['Amsterdam', 'Delft', 'Utrecht']),
+    ('Sweden', 2, ['Stockholm', 'Lund', 'Uppsala']),
+    ('Mexico', 2, ['Mexico City', 'Monterrey']),
+    ('Poland', 1, ['Warsaw', 'Krakow']),
+    ('Finland', 1, ['Helsinki', 'Espoo']),
+    ('Denmark', 1, ['Copenhagen', 'Aarhus']),
+    ('Saudi Arabia', 1, ['Riyadh', 'Jeddah']),
+    ('Pakistan', 1, ['Lahore', 'Islamabad']),
+]
+INSTITUTION_PATTERNS = [
+    'University of {city}', '{city} University', '{city} Institute of Technology',
+    'National Research Council {city}', '{city} University of Education', 'Polytechnic University of {city}',
+]
+DEPARTMENTS = [
+    'Department of Computer Science', 'Department of Education', 'Faculty of Psychology',
+    'Department of Physics', 'School of Engineering', 'Department of Applied Mathematics',
+    'Institute of Educational Technology', 'Department of Medicine',
+]
+TOPIC_WORDS = [
+    'virtual', 'reality', 'augmented', 'immersive', 'learning', 'education', 'students', 'teachers',
+    'training', 'simulation', 'serious', 'games', 'gamification', 'engagement', 'motivation',
+    'presence', 'embodiment', 'headset', 'environment', 'design', 'evaluation', 'framework',
+    'systematic', 'review', 'meta-analysis', 'experimental', 'study', 'effects', 'performance',
+    'collaborative', 'online', 'medical', 'surgical', 'anatomy', 'science', 'laboratory',
+    'spatial', 'cognition', 'cognitive', 'load', 'attitudes', 'acceptance', 'usability',
+    'higher', 'primary', 'secondary', 'classroom', 'metaverse', 'interaction', 'feedback',
+]
+KEYWORDS = [
+    'virtual reality', 'augmented reality', 'education', 'e-learning', 'serious games',
+    'gamification', 'higher education', 'immersive learning', 'simulation', 'engineering education',
+    'medical education', 'mixed reality', 'metaverse', 'students', 'motivation', 'presence',
+    'head-mounted display', 'teacher training', 'stem education', 'collaborative learning',
+    'technology acceptance model', 'usability', 'cognitive load', 'embodiment', 'game-based learning',
+    'distance education', 'covid-19', 'machine learning', 'artificial intelligence', 'human computer interaction',
+    # Variant spellings so keyword normalisation has something to fold
+    'VR', 'virtual-reality', 'AR', 'serious game', 'head mounted displays', 'Virtual Reality',
+]
+SOURCES = [
+    'Computers and Education', 'Education and Information Technologies', 'Interactive Learning Environments',
+    'Virtual Reality', 'British Journal of Educational Technology', 'IEEE Access', 'Sustainability (Switzerland)',
+    'Applied Sciences (Switzerland)', 'Journal of Computer Assisted Learning', 'Lecture Notes in Computer Science',
+    'ACM International Conference Proceeding Series', 'Frontiers in Psychology', 'Educational Technology and Society',
+    'IEEE Transactions on Learning Technologies', 'Multimedia Tools and Applications', 'Medical Education',
+    'Anatomical Sciences Education', 'Computers in Human Behavior', 'Electronics (Switzerland)', 'Sensors',
+]
+DOCUMENT_TYPES = ['Article', 'Conference Paper', 'Review', 'Book Chapter', 'Book']
+DOCUMENT_TYPE_WEIGHTS = [0.632, 0.316, 0.025, 0.020, 0.007]
+
+COLUMNS = [
+    'Authors', 'Author full names', 'Author(s) ID', 'Title', 'Year', 'Source title', 'Volume',
+    'Issue', 'Page start', 'Page end', 'Cited by', 'DOI', 'Link', 'Affiliations',
+    'Authors with affiliations', 'Abstract', 'Author Keywords', 'Index Keywords', 'References',
+    'Correspondence Address', 'Publisher', 'ISSN', 'Language of Original Document',
+    'Document Type', 'Publication Stage', 'Open Access', 'Source', 'EID',
+]
+
+
+def _zipf_weights(n, exponent):
+    """Normalised rank-frequency weights p(r) ~ r^-exponent"""
+    weights = np.arange(1, n + 1, dtype=float) ** -exponent
+    return weights / weights.sum()
+
+
+def _draw(rng, cdf, size):
+    """Sample indices from a precomputed CDF (rng.choice with p= rebuilds it every call)"""
+    return np.minimum(np.searchsorted(cdf, rng.random(size), side='right'), len(cdf) - 1)
+
+
+def _author_names(author_ids):
+    """Deterministic (short name, full name) pairs for author IDs"""
+    n_s, n_g, n_i = len(SURNAMES), len(GIVEN_NAMES), len(INITIALS)
+    short, full = [], []
+    for a in author_ids:
+        a = int(a)
+        surname = SURNAMES[a % n_s]
+        given = GIVEN_NAMES[(a // n_s) % n_g]
+        rest = a // (n_s * n_g)
+        middle = ''
+        while rest:
+            middle += INITIALS[rest % n_i]
+            rest //= n_i
+        initials = given[0] + '.' + ''.join(m + '.' for m in middle)
+        short.append(f"{surname} {initials}")
+        full.append(f"{surname}, {given}{' ' + middle if middle else ''}")
+    return short, full
+
+
+class _CorpusModel:
+    """Corpus-wide random state shared by every chunk"""
+
+    def __init__(self, n_records, seed, start_year, end_year, author_exponent,
+                 mean_authors, mean_references, local_citation_share):
+        rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.n_records = n_records
+        self.mean_authors = mean_authors
+        self.mean_references = mean_references
+        self.local_citation_share = local_citation_share
+
+        # Publication years grow roughly exponentially; papers are ordered by year
+        years = np.arange(start_year, end_year + 1)
+        year_weights = np.exp(0.15 * (years - start_year))
+        self.years = np.sort(rng.choice(years, size=n_records, p=year_weights / year_weights.sum()))
+        self.end_year = end_year
+
+        # Author pool with power-law productivity (Lotka-like)
+        self.n_authors = max(10, int(n_records * mean_authors * 0.45))
+        self.author_cdf = np.cumsum(_zipf_weights(self.n_authors, author_exponent))
+        self.author_perm = rng.permutation(self.n_authors)
+
+        # Institutions, each bound to a country and city
+        country_weights = np.array([c[1] for c in COUNTRIES], dtype=float)
+        self.n_institutions = max(20, min(5000, self.n_authors // 50))
+        self.inst_country = rng.choice(len(COUNTRIES), size=self.n_institutions,
+                                       p=country_weights / country_weights.sum())
+        self.inst_city = rng.integers(0, 1 << 30, size=self.n_institutions)
+        self.inst_pattern = rng.integers(0, len(INSTITUTION_PATTERNS), size=self.n_institutions)
+        self.inst_weights = _zipf_weights(self.n_institutions, 0.8)
+        self.author_institution = _draw(rng, np.cumsum(self.inst_weights), self.n_authors)
+        self.author_department = rng.integers(0, len(DEPARTMENTS), size=self.n_authors)
+
+        # Titles and first authors must be known up front to build in-corpus references
+        self.title_words = rng.choice(len(TOPIC_WORDS), size=(n_records, 8),
+                                      p=_zipf_weights(len(TOPIC_WORDS), 0.7))
+        self.title_length = rng.integers(5, 9, size=n_records)
+        self.first_author = self._draw_authors(rng, n_records)
+        self.source = rng.choice(len(SOURCES), size=n_records, p=_zipf_weights(len(SOURCES), 1.1))
+
+        # External (out-of-corpus) references with power-law popularity
+        self.n_external = max(100, n_records * 2)
+        self.external_cdf = np.cumsum(_zipf_weights(self.n_external, 0.9))
+        self.keyword_cdf = np.cumsum(_zipf_weights(len(KEYWORDS), 0.9))
+
+    def _draw_authors(self, rng, size):
+        return self.author_perm[_draw(rng, self.author_cdf, size)]
+
+    def institution_name(self, inst):
+        country, _, cities = COUNTRIES[self.inst_country[inst]]
+        city = cities[self.inst_city[inst] % len(cities)]
+        return INSTITUTION_PATTERNS[self.inst_pattern[inst]].format(city=city), city, country
+
+    def title(self, i):
+        words = [TOPIC_WORDS[w] for w in self.title_words[i, :self.title_length[i]]]
+        return ' '.join(words).capitalize()
+
+    def reference(self, i):
+        """Scopus-style reference string for an in-corpus paper"""
+        short, _ = _author_names([self.first_author[i]])
+        return (f"{short[0]}, {self.title(i)}, {SOURCES[self.source[i]]}, "
+                f"{1 + i % 60}, pp. {1 + i % 400}-{12 + i % 400}, ({self.years[i]})")
+
+    def external_reference(self, j):
+        short, _ = _author_names([(j * 7919) % self.n_authors])
+        words = ' '.join(TOPIC_WORDS[(j * k) % len(TOPIC_WORDS)] for k in (3, 5, 7, 11, 13))
+        year = 1970 + j % 50
+        return (f"{short[0]}, {words.capitalize()}, {SOURCES[j % len(SOURCES)]}, "
+                f"{1 + j % 40}, pp. {1 + j % 300}-{9 + j % 300}, ({year})")
+
+
+def _generate_chunk(model, start, stop):
+    rng = np.random.default_rng([model.seed, start])
+    n = stop - start
+    rows = {col: [] for col in COLUMNS}
+
+    n_authors = 1 + rng.poisson(model.mean_authors - 1, size=n)
+    # A few large team papers give the heavy tail seen in real exports
+    big = rng.random(n) < 0.01
+    n_authors[big] += rng.integers(10, 60, size=big.sum())
+    n_refs = rng.poisson(model.mean_references, size=n)
+    doc_types = rng.choice(len(DOCUMENT_TYPES), size=n, p=DOCUMENT_TYPE_WEIGHTS)
+
+    for k in range(n):
+        i = start + k
+        year = int(model.years[i])
+
+        # Authors: first author is fixed by the model, co-authors drawn from the pool
+        others = model._draw_authors(rng, n_authors[k] - 1)
+        author_ids = list(dict.fromkeys([int(model.first_author[i])] + [int(a) for a in others]))
+        short, full = _author_names(author_ids)
+
+        affil_strings, authors_with_affil = [], []
+        for a, s in zip(author_ids, short):
+            inst, city, country = model.institution_name(model.author_institution[a])
+            affil = f"{DEPARTMENTS[model.author_department[a]]}, {inst}, {city}, {country}"
+            affil_strings.append(affil)
+            authors_with_affil.append(f"{s}, {affil}")
+        affiliations = list(dict.fromkeys(affil_strings))
+
+        # References: mix of earlier corpus papers and popular external works
+        refs = []
+        n_local = rng.binomial(n_refs[k], model.local_citation_share) if i > 0 else 0
+        if n_local:
+            refs.extend(model.reference(int(j)) for j in np.unique(rng.integers(0, i, size=n_local)))
+        n_external = n_refs[k] - n_local
+        if n_external:
+            ext = np.unique(_draw(rng, model.external_cdf, n_external))
+            refs.extend(model.external_reference(int(j)) for j in ext)
+
+        keywords = np.unique(_draw(rng, model.keyword_cdf, rng.integers(3, 7)))
+        index_keywords = np.unique(_draw(rng, model.keyword_cdf, rng.integers(4, 10)))
+        abstract_words = rng.choice(len(TOPIC_WORDS), size=rng.integers(60, 160))
+
+        age = model.end_year - year + 1
+        cited_by = int(rng.negative_binomial(0.6, 0.6 / (0.6 + 2.0 * age)))
+        # The seed is part of the identifiers, so corpora of different seeds share no EID or DOI
+        eid = 85000000000 + model.seed * 10 ** 8 + i
+        source = SOURCES[model.source[i]]
+        first_inst, first_city, first_country = model.institution_name(
+            model.author_institution[author_ids[0]])
+
+        rows['Authors'].append('; '.join(short))
+        rows['Author full names'].append('; '.join(f"{f} ({50000000000 + a})" for f, a in zip(full, author_ids)))
+        rows['Author(s) ID'].append('; '.join(str(50000000000 + a) for a in author_ids))
+        rows['Title'].append(model.title(i))
+        rows['Year'].append(year)
+        rows['Source title'].append(source)
+        rows['Volume'].append(str(1 + i % 60))
+        rows['Issue'].append(str(1 + i % 12))
+        rows['Page start'].append(str(1 + i % 400))
+        rows['Page end'].append(str(12 + i % 400))
+        rows['Cited by'].append(cited_by if cited_by > 0 else None)
+        rows['DOI'].append(f"10.{1000 + model.source[i]}/synth.{model.seed}.{year}.{i}")
+        rows['Link'].append(f"https://www.scopus.com/inward/record.uri?eid=2-s2.0-{eid}")
+        rows['Affiliations'].append('; '.join(affiliations))
+        rows['Authors with affiliations'].append('; '.join(authors_with_affil))
+        rows['Abstract'].append(' '.join(TOPIC_WORDS[w] for w in abstract_words).capitalize() + '.')
+        rows['Author Keywords'].append('; '.join(KEYWORDS[j] for j in keywords))
+        rows['Index Keywords'].append('; '.join(KEYWORDS[j] for j in index_keywords))
+        rows['References'].append('; '.join(refs) if refs else None)
+        rows['Correspondence Address'].append(
+            f"{full[0].split(',')[0]} {short[0].split(' ')[1]}; {first_inst}, {first_city}, {first_country}; "
+            f"email: author{author_ids[0]}@example.org")
+        rows['Publisher'].append('Synthetic Publisher')
+        rows['ISSN'].append(f"{1000 + model.source[i]:04d}{model.source[i] % 10000:04d}")
+        rows['Language of Original Document'].append('English')
+        rows['Document Type'].append(DOCUMENT_TYPES[doc_types[k]])
+        rows['Publication Stage'].append('Final')
+        rows['Open Access'].append('All Open Access; Gold Open Access' if k % 3 == 0 else None)
+        rows['Source'].append('Scopus')
+        rows['EID'].append(f"2-s2.0-{eid}")
+
+    chunk = pd.DataFrame(rows, columns=COLUMNS, index=pd.RangeIndex(start, stop))
+    chunk['Cited by'] = chunk['Cited by'].astype('Int64')
+    return chunk
+
+
+def generate_corpus_chunks(n_records, seed=0, chunk_size=50000, start_year=1995, end_year=2024,
+                           author_exponent=0.5, mean_authors=3.5, mean_references=20,
+                           local_citation_share=0.15):
+    """Yield a synthetic Scopus export as DataFrame chunks"""
+    model = _CorpusModel(n_records, seed, start_year, end_year, author_exponent,
+                         mean_authors, mean_references, local_citation_share)
+    for start in range(0, n_records, chunk_size):
+        yield _generate_chunk(model, start, min(start + chunk_size, n_records))
+
+
+def generate_corpus(n_records, seed=0, **kwargs):
+    """Generate a synthetic Scopus export in memory"""
+    return pd.concat(generate_corpus_chunks(n_records, seed=seed, **kwargs))
+
+
+def write_corpus(path, n_records, seed=0, **kwargs):
+    """Write a synthetic Scopus CSV chunk by chunk so memory stays bounded"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    for i, chunk in enumerate(generate_corpus_chunks(n_records, seed=seed, **kwargs)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    return path
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate a synthetic Scopus-format CSV export')
+    parser.add_argument('output', help='Path of the CSV file to write')
+    parser.add_argument('-n', '--records', type=int, default=1000, help='Number of records (default: 1000)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--references', type=float, default=20, help='Mean references per paper (default: 20)')
+    args = parser.parse_args()
+
+    write_corpus(args.output, args.records, seed=args.seed, mean_references=args.references)
+    print(f"Synthetic corpus with {args.records} records saved to: {args.output}")
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bibliometric
+from thesaurus import KeywordThesaurus
+from trend_topics import KeywordYearMatrix
+
+KEYWORDS = [
+    'Virtual Reality (VR); Education',
+    'VR; Augmented Reality',
+    'virtual reality; AR; Education',
+    'AR; Augmented reality; Serious Games',
+    'VR; Serious games',
+]
+
+
+def test_cooccurrence_merges_acronyms(tmp_path):
+    export = tmp_path / 'scopus.csv'
+    pd.DataFrame({'Title': [f'Paper {i}' for i in range(len(KEYWORDS))],
+                  'Author Keywords': KEYWORDS}).to_csv(export, index=False)
+    output = tmp_path / 'out'
+    assert bibliometric.main(['--no-cache', 'cooccurrence', str(export), '-o', str(output),
+                              '--no-plots', '--normalize']) == 0
+
+    matrix = pd.read_csv(output / 'keyword_cooccurrence_matrix.csv', index_col=0)
+    assert sorted(matrix.index) == ['augmented reality', 'education', 'serious games', 'virtual reality']
+    assert matrix.loc['virtual reality', 'education'] == 2
+    assert matrix.loc['virtual reality', 'augmented reality'] == 2
+    assert matrix.loc['augmented reality', 'serious games'] == 1
+
+
+def _term_counts(matrix):
+    table = matrix.frequency_over_time(terms=matrix.terms)
+    return table.reindex(columns=sorted(table.columns))
+
+
+def test_trend_matrix_does_not_depend_on_chunks():
+    df = pd.DataFrame({'Author Keywords': ['VR; Education', 'Serious games', 'Virtual Reality; AR',
+                                           'augmented reality; VR'],
+                       'Year': [2019, 2020, 2021, 2022]})
+    whole = _term_counts(KeywordYearMatrix('DE', KeywordThesaurus()).update(df, chunksize=100))
+    chunked = _term_counts(KeywordYearMatrix('DE', KeywordThesaurus()).update(df, chunksize=1))
+    assert list(whole.columns) == ['augmented reality', 'education', 'serious games', 'virtual reality']
+    pd.testing.assert_frame_equal(chunked, whole)
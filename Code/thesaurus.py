@@ -0,0 +1,311 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+
+from ragged import RaggedField, field_ragged
+from fields import read_scopus_csv
+
+# Parenthesised acronym of a keyword: "virtual reality (vr)" or "vr (virtual reality)"
+ACRONYM_PATTERN = r'^(?P<outer>[^()]+?)\s*\((?P<inner>[^()]+)\)$'
+# Plural folding of the last word of a key (Porter step 1a style, applied in order)
+PLURAL_RULES = (
+    (r'sses$', 'ss'),
+    (r'(?<=\w\w)ies$', 'y'),
+    (r'(?<=\w\w)ie$', 'y'),
+    (r'(?<=\w\w)(ch|sh|x|z)es$', r'\1'),
+    (r'(?<=\w\w)([^sui])s$', r'\1'),
+)
+# Longest single-word key folded onto a multi-word keyword with the same initials
+MAX_ACRONYM = 5
+
+
+def _read_lines(path):
+    with open(path, encoding='utf-8-sig') as fh:
+        return [line.rstrip('\r\n') for line in fh if line.strip()]
+
+
+class KeywordThesaurus:
+    """Merges keyword variants (synonyms, spelling, plural, acronym) into one label
+
+    Every keyword is reduced to a key: lower-cased, whitespace collapsed,
+    hyphens/underscores/slashes read as spaces and the last word folded to
+    its singular (PLURAL_RULES). Keywords with the same key are merged, as
+    are acronyms and their long forms ("virtual reality (vr)" defines vr; a
+    short word written in capitals, as "VR", matching the initials of exactly
+    one multi-word keyword seen so far is folded onto it). A thesaurus file
+    maps further variants onto a chosen label and a removal list drops
+    keywords altogether.
+
+    Acronyms are matched against every keyword seen, not only the current
+    batch: an acronym seen before its long form stays pending and is folded
+    when the long form turns up, and ``pop_relabelled`` tells which labels
+    were merged that way, so counts kept per label can be merged too. An
+    acronym folded once stays folded.
+
+    All folding runs on the distinct keywords of a field (its vocabulary)
+    with whole-column string operations; the key of every keyword and the
+    label of every key are remembered in hashed maps, so later batches only
+    fold the keywords not seen before, and the mapping of a vocabulary is
+    cached, so the occurrences of a field are normalised in one vectorised
+    pass over its integer IDs. The label of a key is the thesaurus label or,
+    as for institutions, its most frequent variant when first seen.
+    """
+
+    def __init__(self, path=None, remove=None, plurals=True, hyphens=True, acronyms=True):
+        self.plurals = plurals
+        self.hyphens = hyphens
+        self.acronyms = acronyms
+        self.synonyms = {}
+        self.removed = set()
+        self.keys = {}
+        self.labels = {}
+        self.expansions = {}
+        self.pending = set()
+        self._by_initials = {}
+        self._relabelled = {}
+        self._mappings = {}
+        if path:
+            self.load(path)
+        if remove:
+            self.load_removals(remove)
+
+    def _changed(self):
+        self.keys.clear()
+        self.pending.clear()
+        self._by_initials.clear()
+        self._mappings.clear()
+
+    # -- thesaurus entries ------------------------------------------------
+
+    def add(self, variant, label):
+        """Map a keyword variant onto ``label`` (an empty label removes the keyword)"""
+        self._add_entries([variant], [label])
+
+    def _add_entries(self, variants, labels):
+        """Map every variant onto its label in bulk (one fold over all entries)"""
+        labels = pd.Series(labels, dtype=object).astype(str).str.strip().to_numpy(dtype=object)
+        keys = self.fold(np.concatenate([np.asarray(variants, dtype=object), labels]))
+        keys, targets = keys[:len(labels)], keys[len(labels):]
+        dropped = labels == ''
+        self.removed.update(keys[dropped])
+        self.synonyms.update(zip(keys[~dropped], targets[~dropped]))
+        self.labels.update(zip(targets[~dropped], labels[~dropped]))
+        self._changed()
+
+    def remove(self, *terms):
+        """Drop these keywords (and all their variants) from every field"""
+        self.removed.update(self.fold(terms))
+        self._changed()
+
+    def load(self, path):
+        """Add the entries of a thesaurus file; returns how many were read
+
+        One "variant<TAB>label" (or "variant,label") per line, as the
+        VOSviewer thesaurus files; a header line "label<TAB>replace by" is
+        skipped and a line without label removes the variant.
+        """
+        lines = _read_lines(path)
+        if lines and lines[0].lower().replace(',', '\t').split('\t')[:2] == ['label', 'replace by']:
+            lines = lines[1:]
+        entries = pd.Series(lines, dtype=object)
+        tabbed = entries.str.contains('\t', regex=False).astype(bool)
+        parts = entries.where(tabbed, entries.str.replace(',', '\t', n=1, regex=False)).str.partition('\t')
+        self._add_entries(parts[0].str.strip().to_numpy(dtype=object), parts[2].to_numpy(dtype=object))
+        return len(lines)
+
+    def load_removals(self, path):
+        """Drop every keyword listed in a file (one per line); returns how many were read"""
+        terms = [line.strip() for line in _read_lines(path)]
+        self.remove(*terms)
+        return len(terms)
+
+    # -- saved state ------------------------------------------------------
+
+    def settings(self):
+        """Options and entries that decide how keywords fold (equal settings give equal keys)"""
+        return {'plurals': self.plurals, 'hyphens': self.hyphens, 'acronyms': self.acronyms,
+                'synonyms': dict(sorted(self.synonyms.items())), 'removed': sorted(self.removed)}
+
+    def state(self):
+        """JSON-serialisable settings plus the label of every key and the acronyms learnt
+        (or still pending) so far"""
+        return dict(self.settings(), labels=dict(self.labels), expansions=dict(self.expansions),
+                    pending=sorted(self.pending))
+
+    @classmethod
+    def from_state(cls, state):
+        """Thesaurus restored from ``state()``: later batches keep the labels already chosen"""
+        thesaurus = cls(plurals=state['plurals'], hyphens=state['hyphens'], acronyms=state['acronyms'])
+        thesaurus.synonyms = dict(state['synonyms'])
+        thesaurus.removed = set(state['removed'])
+        thesaurus.labels = dict(state['labels'])
+        thesaurus.expansions = dict(state['expansions'])
+        thesaurus.pending = set(state.get('pending', ()))
+        thesaurus._index_initials(list(thesaurus.labels))
+        return thesaurus
+
+    # -- folding ----------------------------------------------------------
+
+    def fold(self, terms):
+        """Key of every keyword (built-in folding only, no synonyms or acronyms)"""
+        text = pd.Series(terms, dtype=object).astype(str).str.lower()
+        text = text.str.replace(r'[‐-―]', '-', regex=True)
+        if self.hyphens:
+            text = text.str.replace(r'[-_/]+', ' ', regex=True)
+        text = text.str.replace(r'\s+', ' ', regex=True).str.strip(' .;,"\'')
+        if self.plurals:
+            for pattern, replacement in PLURAL_RULES:
+                text = text.str.replace(pattern, replacement, regex=True)
+        return text.to_numpy(dtype=object)
+
+    def _new_keys(self, terms):
+        """Keys of keywords not seen before, with synonyms and acronyms resolved"""
+        terms = pd.Index(terms, dtype=object).astype(str)
+        keys = self.fold(terms)
+        if self.acronyms:
+            parts = pd.Series(terms, dtype=object).str.lower().str.extract(ACRONYM_PATTERN)
+            defined = parts['outer'].notna().to_numpy()
+            if defined.any():
+                outer, inner = self.fold(parts['outer'][defined]), self.fold(parts['inner'][defined])
+                # The shorter part is the acronym, the key is the long form's
+                swap = pd.Series(outer).str.len().to_numpy() < pd.Series(inner).str.len().to_numpy()
+                short, long = np.where(swap, outer, inner), np.where(swap, inner, outer)
+                keys[defined] = long
+                self.expansions.update((s, l) for s, l in zip(short, long) if s != l)
+        keys = pd.Series(keys, dtype=object)
+        keys = keys.map(self.expansions).fillna(keys)
+        keys = keys.map(self.synonyms).fillna(keys)
+        return keys.to_numpy(dtype=object)
+
+    def _index_initials(self, keys):
+        """Add the multi-word keys to the initials -> keys index of every keyword seen"""
+        words = pd.Series(pd.unique(np.asarray(keys, dtype=object)), dtype=object).str.split(' ')
+        multi = words[words.str.len() > 1]
+        for initials, key in zip(multi.map(lambda w: ''.join(x[:1] for x in w)), multi.str.join(' ')):
+            self._by_initials.setdefault(initials, set()).add(key)
+
+    def _resolve_pending(self):
+        """Fold the pending acronyms that now have a long form: defined in parentheses, or
+        the only multi-word key seen with their initials"""
+        resolved = {}
+        for short in self.pending:
+            long = self.expansions.get(short)
+            if long is None and len(self._by_initials.get(short, ())) == 1:
+                long, = self._by_initials[short]
+                self.expansions[short] = long
+            if long is not None and long != short:
+                resolved[short] = long
+        if not resolved:
+            return
+        self.pending.difference_update(resolved)
+        # Variants already seen follow their acronym; labels already handed out are reported
+        keys = pd.Series(self.keys, dtype=object)
+        self.keys.update(keys.map(resolved).dropna().to_dict())
+        self._relabelled.update((short, long) for short, long in resolved.items() if short in self.labels)
+        self._mappings.clear()
+
+    def pop_relabelled(self):
+        """{old label: new label ('' when removed)} of the acronyms folded since the last call
+        whose old label was already handed out"""
+        relabelled = {self.labels[short]: self.labels.get(long, '') if long not in self.removed else ''
+                      for short, long in self._relabelled.items()}
+        self._relabelled.clear()
+        return relabelled
+
+    def mapping(self, vocabulary, counts=None):
+        """(code of every vocabulary entry, labels): code -1 for removed keywords
+
+        Keywords with the same key share a code; ``counts`` (occurrences of
+        every entry) decides the label of keys seen for the first time.
+        Cached per vocabulary.
+        """
+        vocabulary = pd.Index(vocabulary, dtype=object).astype(str)
+        digest = hashlib.blake2b('\x1f'.join(vocabulary).encode('utf-8'), digest_size=16).hexdigest()
+        if digest in self._mappings:
+            return self._mappings[digest]
+
+        keys = pd.Series(vocabulary, dtype=object).map(self.keys).to_numpy(dtype=object)
+        new = pd.isna(keys)
+        if new.any():
+            found = self._new_keys(vocabulary[new])
+            self.keys.update(zip(vocabulary[new], found))
+            if self.acronyms:
+                # Only words written in capitals are read as acronyms ("ART", not "art"); they wait
+                # in ``pending`` until a long form is known
+                capitals = np.asarray(vocabulary[new].str.strip().str.fullmatch(rf'[A-Z]{{2,{MAX_ACRONYM}}}'),
+                                      dtype=bool)
+                short = pd.Series(found[capitals], dtype=object)
+                self.pending.update(short[short.str.fullmatch(rf'[a-z]{{2,{MAX_ACRONYM}}}').astype(bool)])
+                self._index_initials(found)
+                self._resolve_pending()
+            keys = pd.Series(vocabulary, dtype=object).map(self.keys).to_numpy(dtype=object)
+
+        kept = ~pd.Series(keys).isin(self.removed).to_numpy() & (pd.Series(keys).str.len() > 0).to_numpy()
+        codes, uniques = pd.factorize(np.where(kept, keys, None))
+        # Label of a key seen for the first time: a variant folding to the key by itself (the
+        # long form rather than an acronym), the most frequent, without parentheses, the shortest
+        unlabelled = np.flatnonzero((codes >= 0) & ~pd.Series(keys).isin(self.labels.keys()).to_numpy())
+        if len(unlabelled):
+            variants = vocabulary[unlabelled]
+            counts = np.ones(len(vocabulary)) if counts is None else np.asarray(counts, dtype=np.float64)
+            order = np.lexsort((np.asarray(variants.str.len()), np.asarray(variants.str.contains('(', regex=False)),
+                                -counts[unlabelled], self.fold(variants) != keys[unlabelled]))
+            first = unlabelled[order][np.unique(codes[unlabelled][order], return_index=True)[1]]
+            self.labels.update(zip(keys[first], vocabulary[first]))
+        labels = np.array([self.labels[key] for key in uniques], dtype=object)
+        self._mappings[digest] = (codes, labels)
+        return codes, labels
+
+    # -- application ------------------------------------------------------
+
+    def apply(self, field, lower=False):
+        """Normalised copy of a RaggedField: variants merged, removed keywords dropped and
+        repeats inside a paper counted once
+
+        The field must keep the original spelling (acronyms are told apart by
+        their capitals); ``lower`` lower-cases the labels after folding.
+        """
+        codes, labels = self.mapping(field.table, field.counts())
+        ids = codes[field.ids]
+        kept = ids >= 0
+        offsets = np.zeros_like(field.offsets)
+        np.cumsum(np.bincount(field.rows[kept], minlength=len(field)), out=offsets[1:])
+        normalized = RaggedField(offsets, ids[kept], labels).unique()
+        return normalized.lower() if lower else normalized
+
+    def apply_pairs(self, pairs, lower=False):
+        """Normalised (paper, value) rows (as split_field), distinct per paper; ``lower`` as in apply"""
+        values, inverse = np.unique(pairs['value'].to_numpy(dtype=object).astype(str), return_inverse=True)
+        codes, labels = self.mapping(values, np.bincount(inverse, minlength=len(values)))
+        if lower:
+            labels = pd.Series(labels, dtype=object).str.lower().to_numpy(dtype=object)
+        ids = codes[inverse]
+        kept = ids >= 0
+        return pd.DataFrame({'paper': pairs['paper'].to_numpy()[kept],
+                             'value': labels[ids[kept]]}).drop_duplicates().reset_index(drop=True)
+
+    def table(self, vocabulary, counts=None):
+        """Variant -> label table of a vocabulary (empty label for removed keywords)"""
+        codes, labels = self.mapping(vocabulary, counts)
+        return pd.DataFrame({'Variant': pd.Index(vocabulary, dtype=object).astype(str),
+                             'Label': np.append(labels, '')[codes]})
+
+
+def normalized_field(df, field='DE', thesaurus=None):
+    """Keywords of a field as a RaggedField, normalised with a thesaurus (default: built-in folding)
+    on their original spelling and lower-cased afterwards, as field_ragged gives them"""
+    return (thesaurus or KeywordThesaurus()).apply(field_ragged(df, field, lower=False), lower=True)
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    output_folder = 'keyword_thesaurus'
+    os.makedirs(output_folder, exist_ok=True)
+    thesaurus = KeywordThesaurus()
+    keywords = field_ragged(read_scopus_csv(file), 'DE', lower=False)
+    table = thesaurus.table(keywords.table, keywords.counts())
+    merged = table[table['Variant'] != table['Label']]
+    merged.to_csv(os.path.join(output_folder, 'keyword_thesaurus.csv'), index=False, sep='\t', header=['label', 'replace by'])
+    normalized = thesaurus.apply(keywords)
+    print(f"{keywords.n_values} keywords -> {normalized.n_values} after folding ({len(merged)} variants merged)")
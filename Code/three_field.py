@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from fields import read_scopus_csv
+from ragged import field_ragged
+
+FIELD_LABELS = {
+    'AU': 'Authors', 'DE': 'Author Keywords', 'ID': 'Keywords Plus', 'SO': 'Sources',
+    'AU_CO': 'Countries', 'AU_UN': 'Affiliations', 'CR': 'Cited References', 'DT': 'Document Types',
+    'PY': 'Years',
+}
+
+
+def _top_k_codes(field, k):
+    """Keep the k values of a ragged field present in most papers"""
+    codes, uniques = field.ids, field.table
+    counts = field.counts()
+    order = np.argsort(-counts, kind='stable')[:k]
+    # Remap kept codes to 0..k-1 (in rank order); everything else becomes -1
+    remap = np.full(len(uniques), -1, dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    kept = remap[codes]
+    mask = kept >= 0
+    top = pd.DataFrame({'paper': field.rows[mask], 'code': kept[mask]})
+    labels = pd.DataFrame({'label': np.asarray(uniques)[order], 'papers': counts[order]})
+    return top, labels
+
+
+def _link_weights(left, right, n_left, n_right):
+    """Papers shared by each (left, right) value pair, as grouped counts on combined codes"""
+    joined = left.merge(right, on='paper', suffixes=('_l', '_r'))
+    combined = joined['code_l'].to_numpy() * n_right + joined['code_r'].to_numpy()
+    weights = np.bincount(combined, minlength=n_left * n_right)
+    nonzero = np.flatnonzero(weights)
+    return pd.DataFrame({'source': nonzero // n_right, 'target': nonzero % n_right, 'value': weights[nonzero]})
+
+
+def three_field_data(df, fields=('AU_CO', 'DE', 'AU_UN'), k=10):
+    """Nodes and links of a three-field plot (as bibliometrix threeFieldsPlot)
+
+    ``fields`` are bibliometrix tags (AU, DE, ID, SO, AU_CO, AU_UN, CR...) or
+    Scopus column names; ``k`` is the number of items kept per field (an int
+    or one value per field). Link values count the papers shared by two items.
+    """
+    if len(fields) != 3:
+        raise ValueError("Exactly three fields are required")
+    ks = [k] * 3 if np.isscalar(k) else list(k)
+
+    tops, node_frames = [], []
+    offset = 0
+    for column, (field, k_field) in enumerate(zip(fields, ks)):
+        top, labels = _top_k_codes(field_ragged(df, field), k_field)
+        top['code'] += offset
+        labels['field'] = field
+        labels['column'] = column
+        labels['node'] = np.arange(offset, offset + len(labels))
+        tops.append(top)
+        node_frames.append(labels)
+        offset += len(labels)
+
+    n_nodes = offset
+    links = pd.concat([_link_weights(tops[0], tops[1], n_nodes, n_nodes),
+                       _link_weights(tops[1], tops[2], n_nodes, n_nodes)], ignore_index=True)
+    nodes = pd.concat(node_frames, ignore_index=True)[['node', 'field', 'column', 'label', 'papers']]
+    return nodes, links
+
+
+def plot_three_field(nodes, links, title='Three-Field Plot', output_file=None, colors=None):
+    """Plotly Sankey of a three-field plot, laid out like the thematic evolution Sankey"""
+    import plotly.graph_objects as go
+
+    colors = colors or ['darkred', 'orange', 'steelblue']
+    node_x, node_y = [], []
+    for column, group in nodes.groupby('column', sort=True):
+        count = len(group)
+        node_x.extend([column / 2] * count)
+        node_y.extend((np.arange(count) + 1) / (count + 1))
+
+    fig = go.Figure(go.Sankey(
+        arrangement='snap',
+        node=dict(
+            pad=15,
+            thickness=20,
+            line=dict(color='black', width=0.5),
+            label=nodes['label'].tolist(),
+            color=[colors[c % len(colors)] for c in nodes['column']],
+            x=node_x,
+            y=node_y
+        ),
+        link=dict(
+            source=links['source'].tolist(),
+            target=links['target'].tolist(),
+            value=links['value'].tolist()
+        )
+    ))
+
+    fields = nodes.drop_duplicates('column').sort_values('column')['field']
+    annotations = [dict(x=column / 2, y=1.05, xref='paper', yref='paper', showarrow=False,
+                        text=FIELD_LABELS.get(field, field), font=dict(size=14),
+                        xanchor='center', yanchor='bottom')
+                   for column, field in enumerate(fields)]
+    fig.update_layout(title_text=title, font_size=14, width=1000, height=650, annotations=annotations)
+
+    if output_file:
+        fig.write_html(output_file)
+        print(f"Three-field plot saved to: {output_file}")
+    return fig
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    df = read_scopus_csv(file)
+    # Country -> Keywords -> University, as in three_field_plot.R
+    nodes, links = three_field_data(df, fields=('AU_CO', 'DE', 'AU_UN'), k=10)
+    print(nodes.to_string(index=False))
+    plot_three_field(nodes, links, output_file='three_field_plot.html')
@@ -0,0 +1,246 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from fields import iter_scopus_csv
+
+TEXT_COLUMNS = ['Title', 'Abstract']
+YEAR_COLUMN = 'Year'
+# Scopus placeholders and publisher boilerplate removed before tokenising
+BOILERPLATE = r'\[No abstract available\]|©.*$|\(C\) \d{4}.*$|Copyright.*$'
+TOKEN_PATTERN = r'(?u)\b[a-zA-Z][a-zA-Z0-9-]+\b'
+
+
+def _chunks(source, chunksize):
+    """Title + abstract text and year of every record, chunk by chunk (path or DataFrame)"""
+    if isinstance(source, pd.DataFrame):
+        chunks = (source.iloc[i:i + chunksize] for i in range(0, len(source), chunksize))
+    else:
+        chunks = iter_scopus_csv(source, TEXT_COLUMNS + [YEAR_COLUMN], chunksize=chunksize)
+    for chunk in chunks:
+        text = pd.Series('', index=chunk.index)
+        for column in TEXT_COLUMNS:
+            if column in chunk.columns:
+                text = text + ' ' + chunk[column].fillna('').astype(str)
+        text = text.str.replace(BOILERPLATE, '', regex=True)
+        year = pd.to_numeric(chunk[YEAR_COLUMN], errors='coerce') if YEAR_COLUMN in chunk.columns else \
+            pd.Series(np.nan, index=chunk.index)
+        yield text.to_numpy(), year.to_numpy(dtype=np.float64)
+
+
+class TopicModel:
+    """Streaming TF-IDF + topic model over titles and abstracts
+
+    Terms are hashed into ``n_features`` buckets (no vocabulary is held in
+    memory). A first pass over the chunks counts document frequencies, which
+    give the IDF weights and prune buckets outside [min_df, max_df] (relaxed,
+    with a note, when that range keeps no term); the model
+    (mini-batch NMF on TF-IDF, or online LDA on counts) is then fitted with
+    ``partial_fit`` one chunk at a time, so memory depends on ``chunksize``
+    and the pruned vocabulary, not on the corpus size.
+    """
+
+    def __init__(self, n_topics=10, method='nmf', n_features=2 ** 18, ngram_range=(1, 1), min_df=5,
+                 max_df=0.5, chunksize=20000, epochs=2, random_state=0):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        if method not in ('nmf', 'lda'):
+            raise ValueError("method must be 'nmf' or 'lda'")
+        self.n_topics = n_topics
+        self.method = method
+        self.min_df = min_df
+        self.max_df = max_df
+        self.chunksize = chunksize
+        self.epochs = epochs
+        self.random_state = random_state
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=ngram_range, stop_words='english',
+                                            token_pattern=TOKEN_PATTERN, alternate_sign=False, norm=None)
+        self.features = None  # kept hash buckets
+        self.idf = None
+        self.model = None
+        self.n_documents = 0
+
+    def _weigh(self, texts):
+        """Pruned count matrix (LDA) or L2-normalised TF-IDF matrix (NMF) of one chunk"""
+        from sklearn.preprocessing import normalize
+
+        counts = self.vectorizer.transform(texts)[:, self.features]
+        if self.method == 'lda':
+            return counts
+        tfidf = counts.astype(np.float32) @ sparse.diags(self.idf.astype(np.float32))
+        return normalize(tfidf)
+
+    def fit(self, source):
+        from sklearn.decomposition import LatentDirichletAllocation, MiniBatchNMF
+
+        # Pass 1: document frequency of every hash bucket
+        doc_freq = np.zeros(self.vectorizer.n_features, dtype=np.int64)
+        n = 0
+        for texts, _ in _chunks(source, self.chunksize):
+            counts = self.vectorizer.transform(texts)
+            doc_freq += np.bincount(counts.indices, minlength=len(doc_freq))
+            n += len(texts)
+        self.n_documents = n
+        if n < self.n_topics:
+            raise ValueError(f"{n} documents cannot be split into {self.n_topics} topics; "
+                             f"use at most {n} topics (--n-topics)")
+        max_df = self.max_df * n if isinstance(self.max_df, float) else self.max_df
+        keep = (doc_freq >= self.min_df) & (doc_freq <= max_df)
+        if not keep.any() and doc_freq.any():
+            # Small or uniform corpora: keep every term rather than fail, and say how to choose
+            min_df = min(self.min_df, int(doc_freq.max()))
+            print(f"Note: no term has a document frequency in [{self.min_df}, {max_df:g}]; pruning relaxed to "
+                  f"[{min_df}, {n}] (set --min-df / --max-df to choose the range)")
+            keep = doc_freq >= max(min_df, 1)
+        self.features = np.flatnonzero(keep)
+        if len(self.features) == 0:
+            raise ValueError("No terms found in the titles and abstracts")
+        self.idf = np.log((1 + n) / (1 + doc_freq[self.features])) + 1
+        self.doc_freq = doc_freq[self.features]
+
+        if self.method == 'nmf':
+            self.model = MiniBatchNMF(n_components=self.n_topics, batch_size=min(self.chunksize, 2048),
+                                      init='nndsvda', random_state=self.random_state)
+        else:
+            self.model = LatentDirichletAllocation(n_components=self.n_topics, learning_method='online',
+                                                   total_samples=n, random_state=self.random_state)
+        # Passes 2..: mini-batch updates, one chunk at a time. A chunk with fewer documents
+        # than topics is carried into the next one; a remainder left at the end is fitted
+        # together with the last batch
+        pending = previous = None
+        for _ in range(self.epochs):
+            for texts, _ in _chunks(source, self.chunksize):
+                X = self._weigh(texts)
+                pending = X if pending is None else sparse.vstack([pending, X]).tocsr()
+                if pending.shape[0] >= self.n_topics:
+                    self.model.partial_fit(pending)
+                    previous, pending = pending, None
+        if pending is not None:
+            self.model.partial_fit(sparse.vstack([previous, pending]).tocsr() if previous is not None else pending)
+        return self
+
+    def transform(self, texts):
+        """Topic shares (rows summing to 1) of a batch of texts"""
+        weights = self.model.transform(self._weigh(texts))
+        totals = weights.sum(axis=1, keepdims=True)
+        return np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+    def topic_terms(self, source, n_terms=10, sample_chunks=1):
+        """Top terms of every topic; hash buckets are named after the most frequent
+        term mapping to them in the first ``sample_chunks`` chunks"""
+        components = self.model.components_
+        top = np.argsort(-components, axis=1)[:, :n_terms]
+        wanted = self.features[np.unique(top)]
+
+        analyzer = self.vectorizer.build_analyzer()
+        names = {}
+        for number, (texts, _) in enumerate(_chunks(source, self.chunksize)):
+            if number >= sample_chunks:
+                break
+            tokens = pd.Series([t for text in texts for t in analyzer(text)])
+            freq = tokens.value_counts()
+            buckets = self.vectorizer.transform(freq.index).indices if len(freq) else np.empty(0, dtype=np.int64)
+            freq = pd.DataFrame({'term': freq.index, 'count': freq.to_numpy(), 'bucket': buckets})
+            freq = freq[np.isin(freq['bucket'], wanted)].drop_duplicates('bucket')
+            for bucket, term in zip(freq['bucket'], freq['term']):
+                names.setdefault(bucket, term)
+
+        rows = []
+        for topic in range(components.shape[0]):
+            for rank, column in enumerate(top[topic]):
+                rows.append({'Topic': topic, 'Rank': rank + 1,
+                             'Term': names.get(self.features[column], f'#{self.features[column]}'),
+                             'Weight': float(components[topic, column])})
+        return pd.DataFrame(rows)
+
+
+def fit_topics(source, output_folder='topic_analysis', n_topics=10, method='nmf', chunksize=20000, epochs=2,
+               n_features=2 ** 18, min_df=5, max_df=0.5, n_terms=10, random_state=0):
+    """Fit a topic model on a corpus, persist the document-topic matrix and report prevalence per year
+
+    Writes to ``output_folder``:
+      doc_topic.npy                  float32 (documents x topics) topic shares, in corpus row order
+      topic_terms.csv                top terms per topic
+      topic_prevalence_by_year.csv   mean topic share of the documents of every year
+      topic_model.json               settings and corpus size
+    and returns (topic_terms, prevalence).
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    model = TopicModel(n_topics=n_topics, method=method, n_features=n_features, min_df=min_df, max_df=max_df,
+                       chunksize=chunksize, epochs=epochs, random_state=random_state).fit(source)
+
+    # Final pass: topic shares written straight to a memory-mapped .npy file,
+    # yearly sums accumulated on the way
+    doc_topic = np.lib.format.open_memmap(os.path.join(output_folder, 'doc_topic.npy'), mode='w+',
+                                          dtype=np.float32, shape=(model.n_documents, n_topics))
+    year_sums, year_docs = {}, {}
+    row = 0
+    for texts, years in _chunks(source, chunksize):
+        shares = model.transform(texts)
+        doc_topic[row:row + len(texts)] = shares
+        row += len(texts)
+        known = ~np.isnan(years)
+        codes, uniques = pd.factorize(years[known].astype(np.int64))
+        sums = np.zeros((len(uniques), n_topics))
+        np.add.at(sums, codes, shares[known])
+        for year, total, count in zip(uniques, sums, np.bincount(codes, minlength=len(uniques))):
+            year_sums[year] = year_sums.get(year, 0) + total
+            year_docs[year] = year_docs.get(year, 0) + count
+    doc_topic.flush()
+    del doc_topic
+
+    years = sorted(year_sums)
+    prevalence = pd.DataFrame([year_sums[y] / year_docs[y] for y in years], index=years,
+                              columns=[f'Topic {t}' for t in range(n_topics)])
+    prevalence.index.name = 'Year'
+    prevalence.insert(0, 'Documents', [year_docs[y] for y in years])
+    terms = model.topic_terms(source, n_terms=n_terms)
+
+    terms.to_csv(os.path.join(output_folder, 'topic_terms.csv'), index=False)
+    prevalence.to_csv(os.path.join(output_folder, 'topic_prevalence_by_year.csv'))
+    with open(os.path.join(output_folder, 'topic_model.json'), 'w') as fh:
+        json.dump({'method': method, 'n_topics': n_topics, 'n_documents': model.n_documents,
+                   'n_features': n_features, 'kept_features': int(len(model.features)),
+                   'min_df': min_df, 'max_df': max_df, 'epochs': epochs, 'chunksize': chunksize}, fh, indent=2)
+    return terms, prevalence
+
+
+def load_doc_topic(output_folder='topic_analysis', mmap=True):
+    """Document-topic matrix saved by fit_topics (memory-mapped by default)"""
+    return np.load(os.path.join(output_folder, 'doc_topic.npy'), mmap_mode='r' if mmap else None)
+
+
+def plot_topic_prevalence(prevalence, terms=None, output_file='topic_prevalence_by_year.png'):
+    """Stacked area chart of topic prevalence per year, topics labelled by their top terms"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    shares = prevalence.drop(columns='Documents', errors='ignore')
+    labels = list(shares.columns)
+    if terms is not None:
+        top = terms[terms['Rank'] <= 3].groupby('Topic')['Term'].agg(', '.join)
+        labels = [f'{col}: {top.get(int(col.split()[-1]), "")}' for col in shares.columns]
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    ax.stackplot(shares.index, shares.T.to_numpy(), labels=labels, alpha=0.85)
+    ax.set_xlabel('Year', fontsize=14)
+    ax.set_ylabel('Mean topic share', fontsize=14)
+    ax.set_title('Topic Prevalence per Year', fontsize=16)
+    ax.set_xlim(shares.index.min(), shares.index.max())
+    ax.legend(loc='upper left', bbox_to_anchor=(1.01, 1), fontsize=10)
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close()
+    print(f"Topic prevalence plot saved to: {output_file}")
+    return output_file
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    terms, prevalence = fit_topics(file)
+    print(terms.groupby('Topic')['Term'].agg(', '.join).to_string())
+    print(prevalence.round(3).to_string())
+    plot_topic_prevalence(prevalence, terms, os.path.join('topic_analysis', 'topic_prevalence_by_year.png'))
@@ -0,0 +1,214 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from fields import FIELD_COLUMNS, iter_scopus_csv, split_field
+
+YEAR_COLUMN = 'Year'
+KEYWORD_FIELDS = ('DE', 'ID')
+
+
+class KeywordYearMatrix:
+    """Sparse keyword x year occurrence counts (int32), built in one streaming pass
+
+    Every chunk of records adds to the counts, so new records (e.g. a new year
+    of exports) are folded in with ``update`` without recounting the corpus.
+    The vocabulary and the year range grow as needed. A keyword is counted
+    once per document, case-insensitively, as in bibliometrix fieldByYear.
+    """
+
+    def __init__(self, field='DE', thesaurus=None):
+        self.field = field
+        self.thesaurus = thesaurus
+        self.column = FIELD_COLUMNS.get(field, field)
+        self.terms = pd.Index([], dtype=object)
+        self.first_year = None
+        self.counts = sparse.csr_matrix((0, 0), dtype=np.int32)
+        self.n_documents = 0
+
+    @property
+    def years(self):
+        return np.arange(self.first_year, self.first_year + self.counts.shape[1]) if self.first_year is not None \
+            else np.empty(0, dtype=np.int64)
+
+    def _add_chunk(self, chunk):
+        # A thesaurus needs the original spelling to tell acronyms apart and lower-cases after folding
+        pairs = split_field(chunk[self.column], sep=';', lower=self.thesaurus is None).drop_duplicates()
+        if self.thesaurus is not None:
+            pairs = self.thesaurus.apply_pairs(pairs, lower=True)
+            self._relabel(self.thesaurus.pop_relabelled())
+        year = pd.to_numeric(chunk[YEAR_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+        self.n_documents += len(chunk)
+        pair_year = year[pairs['paper'].to_numpy()]
+        known = ~np.isnan(pair_year)
+        if not known.any():
+            return
+        values, pair_year = pairs['value'].to_numpy()[known], pair_year[known].astype(np.int64)
+
+        # New terms are appended to the vocabulary, existing ones keep their row
+        codes, uniques = pd.factorize(values)
+        rows = self.terms.get_indexer(uniques)
+        new = rows < 0
+        rows[new] = len(self.terms) + np.arange(new.sum())
+        self.terms = self.terms.append(pd.Index(uniques[new], dtype=object))
+
+        # Widen the year range when the chunk falls outside it
+        lo, hi = int(pair_year.min()), int(pair_year.max())
+        if self.first_year is None:
+            self.first_year, shift, n_years = lo, 0, hi - lo + 1
+        else:
+            last = self.first_year + self.counts.shape[1] - 1
+            new_first = min(self.first_year, lo)
+            shift, n_years = self.first_year - new_first, max(last, hi) - new_first + 1
+            self.first_year = new_first
+        old = self.counts.tocoo()
+        chunk_counts = sparse.coo_matrix((np.ones(len(values), dtype=np.int32),
+                                          (rows[codes], pair_year - self.first_year)),
+                                         shape=(len(self.terms), n_years))
+        old = sparse.coo_matrix((old.data, (old.row, old.col + shift)), shape=(len(self.terms), n_years))
+        self.counts = (old.tocsr() + chunk_counts.tocsr()).astype(np.int32)
+
+    def _relabel(self, relabelled):
+        """Merge the rows of keywords the thesaurus has folded onto another label since they were
+        counted (an acronym whose long form turned up later); rows folded onto '' are dropped"""
+        relabelled = {old.lower(): new.lower() for old, new in relabelled.items()}
+        if not relabelled or not self.terms.isin(relabelled.keys()).any():
+            return
+        terms = pd.Series(self.terms, dtype=object)
+        codes, uniques = pd.factorize(terms.map(relabelled).fillna(terms))
+        merge = sparse.csr_matrix((np.ones(len(codes), dtype=np.int32), (codes, np.arange(len(codes)))),
+                                  shape=(len(uniques), len(codes)))
+        kept = np.flatnonzero(uniques != '')
+        self.counts = (merge @ self.counts)[kept].tocsr().astype(np.int32)
+        self.terms = pd.Index(uniques[kept], dtype=object)
+
+    def update(self, source, chunksize=100000):
+        """Add the records of a CSV export (streamed in chunks) or a DataFrame"""
+        if isinstance(source, pd.DataFrame):
+            chunks = (source.iloc[i:i + chunksize] for i in range(0, len(source), chunksize))
+        else:
+            chunks = iter_scopus_csv(source, [self.column, YEAR_COLUMN], chunksize=chunksize)
+        for chunk in chunks:
+            if self.column not in chunk.columns:
+                raise ValueError(f"Column '{self.column}' not found for field '{self.field}'")
+            self._add_chunk(chunk)
+        return self
+
+    def save(self, path):
+        """Store the matrix as ``path``.npz plus the vocabulary, years and thesaurus state
+        (options, entries and chosen labels) in ``path``.json"""
+        sparse.save_npz(path + '.npz', self.counts)
+        with open(path + '.json', 'w') as fh:
+            json.dump({'field': self.field, 'first_year': self.first_year, 'n_documents': self.n_documents,
+                       'terms': self.terms.tolist(),
+                       'thesaurus': self.thesaurus.state() if self.thesaurus is not None else None}, fh)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path + '.json') as fh:
+            meta = json.load(fh)
+        matrix = cls(meta['field'])
+        if meta.get('thesaurus') is not None:
+            from thesaurus import KeywordThesaurus
+
+            matrix.thesaurus = KeywordThesaurus.from_state(meta['thesaurus'])
+        matrix.terms = pd.Index(meta['terms'], dtype=object)
+        matrix.first_year = meta['first_year']
+        matrix.n_documents = meta['n_documents']
+        matrix.counts = sparse.load_npz(path + '.npz').astype(np.int32).tocsr()
+        return matrix
+
+    def term_year_stats(self, min_freq=1):
+        """Frequency, first/last year and the 1st quartile, median and 3rd quartile year of every keyword
+
+        Quantiles are those of the year of each occurrence (type 1, as
+        bibliometrix): the first year where the cumulative count reaches the
+        quantile, found with one searchsorted over the row-wise cumulative counts.
+        """
+        counts = self.counts.tocsr()
+        counts.sort_indices()
+        freq = np.asarray(counts.sum(axis=1)).ravel()
+        keep = np.flatnonzero(freq >= max(min_freq, 1))
+        counts, freq = counts[keep], freq[keep]
+        indptr, indices = counts.indptr, counts.indices
+        cumulative = np.cumsum(counts.data, dtype=np.int64)
+        before = np.r_[0, cumulative][indptr[:-1]]
+
+        stats = pd.DataFrame({'Term': self.terms[keep], 'Freq': freq,
+                              'First_year': indices[indptr[:-1]] + self.first_year if len(keep) else [],
+                              'Last_year': indices[indptr[1:] - 1] + self.first_year if len(keep) else []})
+        for name, q in (('Year_q1', 0.25), ('Year_med', 0.5), ('Year_q3', 0.75)):
+            position = np.searchsorted(cumulative, before + q * freq, side='left')
+            stats[name] = indices[position] + self.first_year if len(keep) else []
+        return stats.sort_values(['Year_med', 'Freq'], ascending=[True, False]).reset_index(drop=True)
+
+    def trend_topics(self, min_freq=5, n_items=5, time_span=None):
+        """Top ``n_items`` keywords by frequency for every median year (bibliometrix trend topics)"""
+        stats = self.term_year_stats(min_freq)
+        if time_span is not None:
+            stats = stats[stats['Year_med'].between(*time_span)]
+        stats = stats.sort_values(['Year_med', 'Freq', 'Term'], ascending=[True, False, True])
+        return stats[stats.groupby('Year_med').cumcount() < n_items].reset_index(drop=True)
+
+    def _normalize(self, terms):
+        """Terms as stored in the vocabulary: folded by the thesaurus (when set), then lower-cased"""
+        terms = pd.Series(list(terms), dtype=object).astype(str).str.strip()
+        if self.thesaurus is not None:
+            codes, labels = self.thesaurus.mapping(terms)
+            terms = pd.Series(np.append(labels, '')[codes], dtype=object)
+        return terms.str.lower().tolist()
+
+    def frequency_over_time(self, terms=None, top=10, cumulative=False):
+        """Year x keyword counts for the given terms (default: the ``top`` most frequent)"""
+        if terms is None:
+            freq = np.asarray(self.counts.sum(axis=1)).ravel()
+            rows = np.argsort(-freq, kind='stable')[:top]
+        else:
+            rows = self.terms.get_indexer(self._normalize(terms))
+            rows = rows[rows >= 0]
+        table = pd.DataFrame(self.counts[rows].toarray().T, index=self.years, columns=self.terms[rows])
+        table.index.name = 'Year'
+        return table.cumsum() if cumulative else table
+
+
+def plot_trend_topics(trends, output_file='trend_topics.png', title='Trend Topics'):
+    """Interquartile year range of every trending keyword, with a dot at the median sized by frequency"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    trends = trends.sort_values(['Year_med', 'Freq']).reset_index(drop=True)
+    y = np.arange(len(trends))
+    fig, ax = plt.subplots(figsize=(12, max(6, 0.35 * len(trends))))
+    ax.hlines(y, trends['Year_q1'], trends['Year_q3'], color='#7f8c8d', linewidth=2, alpha=0.7)
+    sizes = 40 + 400 * trends['Freq'] / max(trends['Freq'].max(), 1)
+    ax.scatter(trends['Year_med'], y, s=sizes, color='#3498DB', alpha=0.85, zorder=3)
+    ax.set_yticks(y)
+    ax.set_yticklabels(trends['Term'], fontsize=10)
+    ax.set_xlabel('Year', fontsize=14)
+    ax.set_title(title, fontsize=16)
+    ax.grid(axis='x', alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close()
+    print(f"Trend topics plot saved to: {output_file}")
+    return output_file
+
+
+if __name__ == '__main__':
+    file = 'Scopus_VR_ED_full_filters.csv'
+    output_folder = 'trend_topics'
+    os.makedirs(output_folder, exist_ok=True)
+
+    for field in KEYWORD_FIELDS:
+        matrix = KeywordYearMatrix(field).update(file)
+        matrix.save(os.path.join(output_folder, f'keyword_year_{field}'))
+        trends = matrix.trend_topics(min_freq=5, n_items=5)
+        trends.to_csv(os.path.join(output_folder, f'trend_topics_{field}.csv'), index=False)
+        print(f"\n=== Trend topics ({matrix.column}) ===")
+        print(trends.to_string(index=False))
+        plot_trend_topics(trends, os.path.join(output_folder, f'trend_topics_{field}.png'),
+                          title=f'Trend Topics ({matrix.column})')